@@ -13,7 +13,10 @@ logger = logging.getLogger(__name__)
 # Prep db
 db = SQLAlchemy()
 from application.models.questions import Questions
+from application.models.demographics import DemographicCodes
 from application.models.results import Results
+from application.models.counts import ResultCounts
+from application.models.rollups import ResultsDailyRollup, ResultsRollupState
 
 
 def create_app(register_blueprints=True):
@@ -56,6 +59,36 @@ def create_app(register_blueprints=True):
         logger.exception("[create_app] Failed to init SQLAlchemy")
         raise
 
+    # API response and rendered page caches
+    from application.utils.cache import data_cache, results_page_cache
+    data_cache.configure(app.config, prefix="DATA_CACHE")
+    results_page_cache.configure(app.config, prefix="RESULTS_PAGE_CACHE")
+
+    # JSON encoder for API responses
+    from application.utils.serialise import serialiser
+    serialiser.configure(app.config.get("JSON_SERIALISER", "auto"))
+
+    # Pooled hCaptcha client
+    from application.utils.captcha import captcha_verifier
+    captcha_verifier.configure(app.config)
+
+    # Concurrent streamed exports
+    from application.utils.export import export_slots
+    export_slots.configure(app.config.get("EXPORT_MAX_CONCURRENT", 2))
+
+    # Write-behind result inserts (off unless WRITE_BEHIND is set)
+    from application.utils.writebehind import result_writer
+    result_writer.configure(app)
+
+    # Warm static question data. Non-fatal: the catalogue is read-through and retries on first use.
+    if register_blueprints:
+        from application.utils.catalogue import catalogue
+        with app.app_context():
+            try:
+                catalogue.load()
+            except Exception:
+                logger.exception("[create_app] Failed to preload question catalogue")
+
     # Register view blueprints
     if register_blueprints:
         with app.app_context():
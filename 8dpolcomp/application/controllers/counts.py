@@ -0,0 +1,231 @@
+import logging
+import math
+from collections import Counter, defaultdict
+
+from sqlalchemy import and_, func, or_, select, text
+from sqlalchemy.dialects.postgresql import insert
+
+from application.controllers.demographics import CODED_FIELDS, _parse_age
+from application.models.counts import ResultCounts
+from application.models.results import Results
+from application import db
+
+
+logger = logging.getLogger(__name__)
+
+
+def _count_keys(demographics):
+    """
+    (field, value) pairs a result contributes to, in a fixed order so concurrent upserts lock
+    rows in the same sequence.
+    """
+
+    keys = {("total", "")}
+
+    age = _parse_age(demographics.get("age"))
+    if age is not None:
+        keys.add(("age", str(age)))
+
+    for field in CODED_FIELDS:
+        val = demographics.get(field)
+        if isinstance(val, str) and val != "":
+            keys.add((field, val))
+
+    identities = demographics.get("identities")
+    if isinstance(identities, list):
+        keys.update(("identities", i) for i in identities if isinstance(i, str) and i != "")
+
+    return sorted(keys)
+
+
+def _age_bounds(filterset):
+    # Mirrors ResultsController._apply_filterset
+    min_age = filterset.get("min-age")
+    max_age = filterset.get("max-age")
+    if min_age is None and max_age is None:
+        return None
+    lo = int(min_age) if (min_age is not None and int(min_age) > 0) else 0
+    hi = int(max_age) if (max_age is not None and int(max_age) > 0) else 101
+    return lo, hi
+
+
+def _dimensions(filterset):
+    """
+    Split a filterset into independent dimensions answerable from ResultCounts.
+
+    Returns:
+        list[tuple[str, list[str], str]] | None: [(field, values, combine), ...] where combine is
+        "sum" (disjoint values), "any" or "all" (identities). None if the filterset needs SQL.
+    """
+
+    if filterset.get("group-ids"):
+        return None
+
+    dims = []
+
+    # Country and party are chosen independently on the form, so they stay separate dimensions
+    for field in CODED_FIELDS:
+        vals = filterset.get(field) or []
+        if vals:
+            dims.append((field, sorted(set(vals)), "sum"))
+
+    bounds = _age_bounds(filterset)
+    if bounds is not None:
+        lo, hi = bounds
+        dims.append(("age", [str(a) for a in range(lo, hi + 1)], "sum"))
+
+    identities = sorted(set(filterset.get("identities") or []))
+    if identities:
+        combine = "any" if filterset.get("any-all") == "any" else "all"
+        dims.append(("identities", identities, combine))
+
+    return dims
+
+
+class CountsController:
+    """
+    Filterset counts answered from per-day, per-value ResultCounts instead of COUNT(*).
+    """
+
+    def increment(demographics, day):
+        """
+        Add one result to the counts. Runs in the caller's session transaction.
+
+        Args:
+            demographics (dict)
+            day (date): Results.date of the new row
+        """
+
+        CountsController.increment_many([(demographics, day)])
+
+
+    def increment_many(items):
+        """
+        Add a batch of results to the counts in one upsert. Runs in the caller's session transaction.
+
+        Args:
+            items (Iterable[tuple[dict, date]]): (demographics, Results.date) per new row
+        """
+
+        tally = Counter()
+        for demographics, day in items:
+            tally.update((day, field, value) for field, value in _count_keys(demographics))
+        if not tally:
+            return
+
+        stmt = insert(ResultCounts).values([
+            {"date": day, "field": field, "value": value, "n": n}
+            for (day, field, value), n in sorted(tally.items())
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ResultCounts.date, ResultCounts.field, ResultCounts.value],
+            set_={"n": ResultCounts.n + stmt.excluded.n},
+        )
+        db.session.execute(stmt)
+
+
+    def rebuild():
+        """
+        Recompute ResultCounts from Results in one transaction. Concurrent inserts wait on the
+        TRUNCATE lock and apply their increments afterwards, so no result is lost or double counted.
+
+        Returns:
+            int: count rows written
+        """
+
+        results = Results.__table__.name
+        counts = ResultCounts.__table__.name
+
+        selects = [
+            f"SELECT date, 'total', '', count(*) FROM {results} GROUP BY date",
+            f"SELECT date, 'age', (demographics ->> 'age')::int::text, count(*) FROM {results} "
+            f"WHERE (demographics ->> 'age') ~ '^-?[0-9]{{1,3}}$' "
+            f"AND (demographics ->> 'age')::int BETWEEN -1 AND 101 GROUP BY 1, 3",
+            *(
+                f"SELECT date, '{field}', demographics ->> '{field}', count(*) FROM {results} "
+                f"WHERE jsonb_typeof(demographics -> '{field}') = 'string' "
+                f"AND demographics ->> '{field}' <> '' GROUP BY 1, 3"
+                for field in CODED_FIELDS
+            ),
+            f"SELECT date, 'identities', e.value, count(*) FROM {results} "
+            f"CROSS JOIN LATERAL (SELECT DISTINCT value FROM jsonb_array_elements_text("
+            f"  CASE WHEN jsonb_typeof(demographics -> 'identities') = 'array' "
+            f"  THEN demographics -> 'identities' ELSE '[]'::jsonb END)) AS e(value) "
+            f"WHERE e.value <> '' GROUP BY 1, 3",
+        ]
+
+        with db.engine.begin() as conn:
+            conn.execute(text(f"TRUNCATE {counts}"))
+            return conn.execute(text(
+                f"INSERT INTO {counts} (date, field, value, n) " + " UNION ALL ".join(selects)
+            )).rowcount or 0
+
+
+    def count_filtersets(filter_data, min_d, max_d, estimate=True, indices=None):
+        """
+        Answer filterset counts from ResultCounts where possible.
+
+        A filterset with at most one dimension is exact.
+        With estimate=True, multi-dimension filtersets and multi-identity filters are estimated
+        assuming independent dimensions. Group filters always need SQL.
+
+        Args:
+            filter_data (dict)
+            min_d (date), max_d (date): inclusive date bounds
+            estimate (bool): allow approximate answers
+            indices (Iterable[int] | None): only consider these filtersets
+
+        Returns:
+            dict[int, tuple[int, bool]]: {filterset index: (count, exact)} for answered filtersets
+        """
+
+        plans = {}
+        wanted = defaultdict(set)
+        for i, filterset in enumerate(filter_data["filtersets"]):
+            if indices is not None and i not in indices:
+                continue
+            dims = _dimensions(filterset)
+            if dims is None:
+                continue
+            exact = len(dims) <= 1 and not any(c != "sum" and len(v) > 1 for _, v, c in dims)
+            if not exact and not estimate:
+                continue
+            plans[i] = (dims, exact)
+            for field, values, _ in dims:
+                wanted[field].update(values)
+
+        if not plans:
+            return {}
+
+        conds = [ResultCounts.field == "total"]
+        conds += [
+            and_(ResultCounts.field == field, ResultCounts.value.in_(sorted(values)))
+            for field, values in wanted.items() if values
+        ]
+        stmt = (
+            select(ResultCounts.field, ResultCounts.value, func.sum(ResultCounts.n))
+            .where(and_(ResultCounts.date >= min_d, ResultCounts.date <= max_d), or_(*conds))
+            .group_by(ResultCounts.field, ResultCounts.value)
+        )
+        tallies = {(field, value): int(n) for field, value, n in db.session.execute(stmt)}
+        total = tallies.get(("total", ""), 0)
+
+        answered = {}
+        for i, (dims, exact) in plans.items():
+            if total == 0:
+                answered[i] = (0, True)
+                continue
+
+            frac = 1.0
+            for field, values, combine in dims:
+                counts = [tallies.get((field, v), 0) for v in values]
+                if combine == "sum" or len(counts) == 1:
+                    frac *= sum(counts) / total
+                elif combine == "any":
+                    frac *= 1 - math.prod(1 - c / total for c in counts)
+                else:
+                    frac *= math.prod(c / total for c in counts)
+
+            answered[i] = (int(round(total * frac)), exact)
+
+        return answered
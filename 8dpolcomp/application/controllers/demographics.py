@@ -0,0 +1,234 @@
+import logging
+import threading
+
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import insert
+
+from application.models.demographics import DemographicCodes
+from application.models.results import Results
+from application import db
+
+
+logger = logging.getLogger(__name__)
+
+
+# Categorical demographics encoded as DemographicCodes ids -> Results column
+CODED_FIELDS = {
+    "country": "country_id",
+    "religion": "religion_id",
+    "ethnicity": "ethnicity_id",
+    "education": "education_id",
+    "party": "party_id",
+}
+
+_lock = threading.Lock()
+_codes = {}
+
+
+def _parse_age(val):
+    try:
+        age = int(val)
+    except (TypeError, ValueError):
+        return None
+    return age if -1 <= age <= 101 else None
+
+
+class DemographicsController:
+    """
+    Dictionary encoding of categorical demographics, cached in-process.
+    """
+
+    def load_codes():
+        """
+        (Re)load the code dictionary from the database.
+
+        Returns:
+            dict[str, dict[str, int]]: {field: {value: id, ...}, ...}
+        """
+
+        global _codes
+
+        codes = {}
+        for code in DemographicCodes.query.all():
+            codes.setdefault(code.field, {})[code.value] = code.id
+
+        with _lock:
+            _codes = codes
+        return codes
+
+
+    def get_codes(field, values):
+        """
+        Map filter values to code ids. Values missing from the cache (e.g. created by another
+        worker) are looked up in DemographicCodes; only values with no code at all are dropped,
+        since no result can match them.
+
+        Args:
+            field (str): demographic field, e.g. "country" or "identities"
+            values (list[str])
+
+        Returns:
+            list[int]
+        """
+
+        if not _codes:
+            DemographicsController.load_codes()
+
+        codes = _codes.get(field, {})
+        missing = sorted({v for v in values if v not in codes})
+
+        if missing:
+            found = dict(db.session.execute(
+                select(DemographicCodes.value, DemographicCodes.id)
+                .where(DemographicCodes.field == field, DemographicCodes.value.in_(missing))
+            ).all())
+            if found:
+                with _lock:
+                    _codes.setdefault(field, {}).update(found)
+            codes = {**codes, **found}
+
+        return sorted({codes[v] for v in values if v in codes})
+
+
+    def get_or_create_code(field, value):
+        """
+        Return the code id for a value, inserting it if new.
+
+        Codes are committed on their own connection so a rolled-back result insert
+        cannot leave the cache pointing at a missing row.
+
+        Args:
+            field (str)
+            value (str)
+
+        Returns:
+            int
+        """
+
+        code = _codes.get(field, {}).get(value)
+        if code is not None:
+            return code
+
+        with db.engine.begin() as conn:
+            code = conn.execute(
+                insert(DemographicCodes)
+                .values(field=field, value=value)
+                .on_conflict_do_nothing(constraint="uq_demographic_codes_field_value")
+                .returning(DemographicCodes.id)
+            ).scalar()
+
+            if code is None:
+                code = conn.execute(
+                    select(DemographicCodes.id)
+                    .where(DemographicCodes.field == field, DemographicCodes.value == value)
+                ).scalar()
+
+        with _lock:
+            _codes.setdefault(field, {})[value] = code
+        return code
+
+
+    def encode(demographics):
+        """
+        Build typed Results columns from a demographics dict.
+
+        Args:
+            demographics (dict): validated demographics
+
+        Returns:
+            dict: {"age": int | None, "<field>_id": int | None, ..., "identity_ids": list[int]}
+        """
+
+        if not _codes:
+            DemographicsController.load_codes()
+
+        encoded = {"age": _parse_age(demographics.get("age"))}
+
+        for field, column in CODED_FIELDS.items():
+            val = demographics.get(field)
+            if isinstance(val, str) and val != "":
+                encoded[column] = DemographicsController.get_or_create_code(field, val)
+            else:
+                encoded[column] = None
+
+        identities = demographics.get("identities")
+        if not isinstance(identities, list):
+            identities = []
+        encoded["identity_ids"] = sorted({
+            DemographicsController.get_or_create_code("identities", identity)
+            for identity in identities
+            if isinstance(identity, str) and identity != ""
+        })
+
+        return encoded
+
+
+    def seed_codes_from_results():
+        """
+        Insert a code for every distinct categorical value found in Results.demographics.
+
+        Returns:
+            int: number of new codes
+        """
+
+        results = Results.__table__.name
+        codes = DemographicCodes.__table__.name
+
+        inserted = 0
+        with db.engine.begin() as conn:
+            for field in CODED_FIELDS:
+                inserted += conn.execute(text(
+                    f"INSERT INTO {codes} (field, value) "
+                    f"SELECT DISTINCT :field, demographics ->> :field FROM {results} "
+                    f"WHERE coalesce(demographics ->> :field, '') <> '' "
+                    f"ON CONFLICT ON CONSTRAINT uq_demographic_codes_field_value DO NOTHING"
+                ), {"field": field}).rowcount or 0
+
+            inserted += conn.execute(text(
+                f"INSERT INTO {codes} (field, value) "
+                f"SELECT DISTINCT 'identities', e.value FROM {results} "
+                f"CROSS JOIN LATERAL jsonb_array_elements_text("
+                f"  CASE WHEN jsonb_typeof(demographics -> 'identities') = 'array' "
+                f"  THEN demographics -> 'identities' ELSE '[]'::jsonb END) AS e(value) "
+                f"WHERE e.value <> '' "
+                f"ON CONFLICT ON CONSTRAINT uq_demographic_codes_field_value DO NOTHING"
+            )).rowcount or 0
+
+        DemographicsController.load_codes()
+        return inserted
+
+
+    def backfill_range(start_id, end_id):
+        """
+        Set typed demographic columns from JSONB for results with start_id <= id <= end_id.
+        Codes must already exist (see seed_codes_from_results).
+
+        Returns:
+            int: rows updated
+        """
+
+        results = Results.__table__.name
+        codes = DemographicCodes.__table__.name
+
+        coded = ", ".join(
+            f"{column} = (SELECT c.id FROM {codes} c "
+            f"WHERE c.field = '{field}' AND c.value = r.demographics ->> '{field}')"
+            for field, column in CODED_FIELDS.items()
+        )
+
+        stmt = text(
+            f"UPDATE {results} AS r SET "
+            f"age = CASE WHEN (r.demographics ->> 'age') ~ '^-?[0-9]{{1,3}}$' "
+            f"  AND (r.demographics ->> 'age')::int BETWEEN -1 AND 101 "
+            f"  THEN (r.demographics ->> 'age')::smallint END, "
+            f"{coded}, "
+            f"identity_ids = ARRAY("
+            f"  SELECT DISTINCT c.id FROM jsonb_array_elements_text("
+            f"    CASE WHEN jsonb_typeof(r.demographics -> 'identities') = 'array' "
+            f"    THEN r.demographics -> 'identities' ELSE '[]'::jsonb END) AS e(value) "
+            f"  JOIN {codes} c ON c.field = 'identities' AND c.value = e.value ORDER BY c.id) "
+            f"WHERE r.id BETWEEN :start_id AND :end_id"
+        )
+
+        with db.engine.begin() as conn:
+            return conn.execute(stmt, {"start_id": int(start_id), "end_id": int(end_id)}).rowcount or 0
@@ -1,15 +1,18 @@
-
 from application.models.questions import Questions
+from application.utils.catalogue import catalogue
 
 
 class QuestionsController:
     """
     Read-only query helpers for Questions.
+
+    Questions are static between deploys, so everything except get_all() is served from the
+    process-wide question catalogue rather than the database.
     """
 
     def get_all(test=False):
         """
-        Fetch all questions.
+        Fetch all questions from the database.
 
         Args:
             test (bool): If True, returns a small sample.
@@ -18,10 +21,36 @@ class QuestionsController:
             list[Questions]: Question rows.
         """
 
-        res = Questions.query.all()
+        res = Questions.query.order_by(Questions.id).all()
         return res[:5] if test else res
 
 
+    def get_rows(test=False):
+        """
+        Return cached question rows (id, text and axis weights) for templates.
+
+        Args:
+            test (bool): If True, returns a small sample.
+
+        Returns:
+            list[dict]: [{"id": <int>, "text": <str>, <axis>: <int>, ...}, ...]
+        """
+
+        rows = catalogue.rows
+        return rows[:5] if test else rows
+
+
+    def get_columns():
+        """
+        Return question column names.
+
+        Returns:
+            list[str]
+        """
+
+        return catalogue.columns
+
+
     def get_num_questions():
         """
         Get total count of questions.
@@ -30,7 +59,18 @@ class QuestionsController:
             int: number of questions.
         """
 
-        return Questions.query.count()
+        return len(catalogue.ids)
+
+
+    def get_ids():
+        """
+        Get the set of question IDs.
+
+        Returns:
+            frozenset[int]
+        """
+
+        return catalogue.id_set
 
 
     def get_texts(test=False):
@@ -44,11 +84,21 @@ class QuestionsController:
             list[dict]: [{"id": <int>, "text": <str>}, ...]
         """
 
-        qs = Questions.query.all()
-        texts = [{"id": q.id, "text": q.text} for q in qs]
+        texts = catalogue.texts
         return texts[:5] if test else texts
 
 
+    def get_texts_json():
+        """
+        Return question texts for frontend, pre-serialised.
+
+        Returns:
+            str: JSON list of {"id": <int>, "text": <str>}
+        """
+
+        return catalogue.texts_json
+
+
     def get_scores(test=False):
         """
         Return per-question scoring weights.
@@ -60,14 +110,7 @@ class QuestionsController:
             dict[int, dict[str, float]]: {question_id: {axis: weight, ...}, ...}
         """
 
-        axes = ["society", "politics", "economics", "state", "diplomacy", "government", "technology", "religion"]
-
-        qs = Questions.query.all()
-        scores = {
-            q.id: {axis: getattr(q, axis) for axis in axes}
-            for q in qs
-        }
-
+        scores = catalogue.scores
         if test:
             return {k: scores[k] for k in sorted(scores.keys())[:5]}
         return scores
@@ -81,14 +124,12 @@ class QuestionsController:
             dict[str, float]: {axis: max_score, ...}
         """
 
-        scores = QuestionsController.get_scores()
-        if not scores:
-            return {}
+        return catalogue.max_scores_dct
+
 
-        max_scores = {}
-        for q_id, q_scores in scores.items():
-            max_scores[q_id] = {axis: abs(weight) * 2 for axis, weight in q_scores.items()}
+    def invalidate_cache():
+        """
+        Drop cached question data. Call after modifying the Questions table.
+        """
 
-        first = next(iter(max_scores.values()))
-        axis_scores = {axis: sum(v[axis] for v in max_scores.values()) for axis in first.keys()}
-        return axis_scores
+        catalogue.invalidate()
@@ -1,18 +1,171 @@
 
+import json
 import logging
-from datetime import date, datetime
+import random
+from datetime import date, datetime, timezone
 
 import numpy as np
-from sqlalchemy import and_, cast, Integer, Float, or_
+from sqlalchemy import and_, case, cast, false, Integer, Float, literal, null, Numeric, or_, select, SmallInteger, text, true, union_all
+from sqlalchemy.dialects.postgresql import array, insert, ARRAY, JSONB, REAL
 from sqlalchemy.sql.expression import func
 
+from flask import current_app
+
+from application.controllers.counts import CountsController as Counts
+from application.controllers.demographics import CODED_FIELDS, DemographicsController as Demographics
+from application.controllers.rollups import ANSWER_SLOTS, RollupsController as Rollups, split_dates
 from application.models.results import Results
+from application.utils.cache import data_cache
+from application.utils.catalogue import SCORE_AXES
+from application.utils.writebehind import result_writer
 from application import db
 
 
 logger = logging.getLogger(__name__)
 
 
+# Stored answer value -> histogram label
+ANSWER_LABELS = {2: "Strongly Agree", 1: "Agree", 0: "Neutral", -1: "Disagree", -2: "Strongly Disagree"}
+
+# Question ids in Results.answers_arr order
+ANSWER_IDS = list(range(1, 101))
+
+# (x, y) axes of each compass chart, as the quadrants in polcomp.js
+COMPASS_PAIRS = [("society", "politics"), ("economics", "state"), ("diplomacy", "government"), ("technology", "religion")]
+
+# Homepage "Sample Compasses" clouds: key -> identity filter (matches static/js/index.js)
+INDEX_SAMPLES = {
+    "recent1000": [],
+    "left1000": ["Left-Wing"],
+    "right1000": ["Right-Wing"],
+    "centrist1000": ["Centrist"],
+}
+
+INDEX_SAMPLE_SIZE = 1000
+
+
+def _scores_to_array(scores):
+    return [scores.get(axis) for axis in SCORE_AXES]
+
+
+def _answers_to_array(answers):
+    answers = {int(q_id): ans for q_id, ans in answers.items()}
+    return [answers.get(q_id) for q_id in ANSWER_IDS]
+
+
+def histogram_thresholds(bins):
+    """
+    Inner bin edges splitting [-1, 1] into equal bins, computed as histogram.js does for d3.bin().
+
+    Args:
+        bins (int)
+
+    Returns:
+        list[float]: bins - 1 ascending thresholds
+    """
+
+    return [(2 * k - bins) / bins for k in range(1, bins)]
+
+
+def _score_histograms(all_scores, bins, invert=()):
+    """
+    Bin each axis like d3.bin().domain([-1, 1]): a value on a threshold counts in the upper bin,
+    1 counts in the last bin and values outside the domain are dropped.
+
+    Args:
+        all_scores (list[dict]): per-result scores
+        bins (int)
+        invert (Iterable[str]): axes to bin negated, as the chart plots them
+
+    Returns:
+        dict[str, np.ndarray]: per-axis int64 counts, bins long (serialised as lists)
+    """
+
+    if not all_scores:
+        return {axis: np.zeros(bins, dtype=np.int64) for axis in SCORE_AXES}
+
+    thresholds = np.array(histogram_thresholds(bins), dtype=np.float64)
+    mat = np.array([[s.get(axis, 0) for axis in SCORE_AXES] for s in all_scores], dtype=np.float64)
+
+    histograms = {}
+    for j, axis in enumerate(SCORE_AXES):
+        values = -mat[:, j] if axis in invert else mat[:, j]
+        values = values[(values >= -1) & (values <= 1)]
+        histograms[axis] = np.bincount(np.searchsorted(thresholds, values, side="right"), minlength=bins)
+    return histograms
+
+
+def _density_grids(all_scores, size):
+    """
+    Count results per cell of a size x size grid over [-1, 1]^2 for each compass pair. Cells
+    follow _score_histograms binning on both axes.
+
+    Args:
+        all_scores (list[dict]): per-result scores
+        size (int): cells per side
+
+    Returns:
+        dict: {"size": size, "cells": {"<x>-<y>": [[x_cell, y_cell, n], ...]}}, non-empty cells only,
+        each pair an int64 array of shape (cells, 3) (serialised as nested lists)
+    """
+
+    cells = {f"{x_axis}-{y_axis}": np.empty((0, 3), dtype=np.int64) for x_axis, y_axis in COMPASS_PAIRS}
+    if not all_scores:
+        return {"size": size, "cells": cells}
+
+    thresholds = np.array(histogram_thresholds(size), dtype=np.float64)
+    mat = np.array([[s.get(axis, 0) for axis in SCORE_AXES] for s in all_scores], dtype=np.float64)
+
+    for x_axis, y_axis in COMPASS_PAIRS:
+        x = mat[:, SCORE_AXES.index(x_axis)]
+        y = mat[:, SCORE_AXES.index(y_axis)]
+        keep = (x >= -1) & (x <= 1) & (y >= -1) & (y <= 1)
+        flat = (np.searchsorted(thresholds, y[keep], side="right") * size
+                + np.searchsorted(thresholds, x[keep], side="right"))
+        counts = np.bincount(flat, minlength=size * size)
+        nonzero = np.flatnonzero(counts)
+        cells[f"{x_axis}-{y_axis}"] = np.column_stack([nonzero % size, nonzero // size, counts[nonzero]])
+
+    return {"size": size, "cells": cells}
+
+
+def _stratified_sample(all_scores, k, seed=None):
+    """
+    Downsample to at most k results, stratified by 8D orthant (the sign of every axis) so sparse
+    regions of the compass keep at least one point while k allows. Order is preserved.
+
+    Args:
+        all_scores (list[dict]): per-result scores
+        k (int): maximum sample size
+        seed (int | None): makes the sample reproducible; 0 when unset
+
+    Returns:
+        list[dict]
+    """
+
+    n = len(all_scores)
+    if n <= k:
+        return all_scores
+
+    mat = np.array([[s.get(axis, 0) for axis in SCORE_AXES] for s in all_scores], dtype=np.float64)
+    strata = ((mat >= 0) * (1 << np.arange(len(SCORE_AXES)))).sum(axis=1)
+    keys, inverse, sizes = np.unique(strata, return_inverse=True, return_counts=True)
+
+    # One per stratum if they all fit, the rest by size (largest remainder)
+    alloc = np.ones_like(sizes) if k >= len(keys) else np.zeros_like(sizes)
+    left = sizes - alloc
+    share = (k - alloc.sum()) * left / left.sum()
+    alloc += np.floor(share).astype(alloc.dtype)
+    for j in np.argsort(np.floor(share) - share)[:k - alloc.sum()]:
+        alloc[j] += 1
+
+    rng = np.random.default_rng(seed if seed is not None else 0)
+    chosen = np.concatenate([
+        rng.choice(np.flatnonzero(inverse == j), size=int(alloc[j]), replace=False) for j in range(len(keys))
+    ])
+    return [all_scores[i] for i in np.sort(chosen)]
+
+
 def _coerce_to_date_bounds(min_val, max_val) -> tuple[date, date]:
     """
     Convert incoming min/max values (date/datetime) into DATE bounds suitable for DB filtering.
@@ -67,6 +220,42 @@ class ResultsController:
         } for result in all_results]
 
 
+    def iter_export(filterset=None, min_d=None, max_d=None, chunk_size=1000):
+        """
+        Stream results for export in id order using a server-side cursor, so memory stays flat.
+
+        Args:
+            filterset (dict | None): frontend filterset, applied as in _apply_filterset
+            min_d (date | None), max_d (date | None): inclusive date bounds
+            chunk_size (int): rows fetched per round trip
+
+        Yields:
+            list[dict]: one chunk of rows shaped like get_all_dct()
+        """
+
+        stmt = select(
+            Results.date, Results.group_id, Results.scores, Results.answers, Results.demographics
+        ).order_by(Results.id)
+        if min_d is not None:
+            stmt = stmt.where(Results.date >= min_d)
+        if max_d is not None:
+            stmt = stmt.where(Results.date <= max_d)
+        if filterset:
+            stmt = ResultsController._apply_filterset(stmt, filterset)
+
+        # Dedicated connection so the named cursor outlives any session commits
+        with db.engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=int(chunk_size)).execute(stmt)
+            for chunk in result.partitions():
+                yield [{
+                    "date": row.date.isoformat() if row.date else None,
+                    "group_id": str(row.group_id) if row.group_id else None,
+                    "results": row.scores,
+                    "answers": row.answers,
+                    "demographics": row.demographics,
+                } for row in chunk]
+
+
     def get_all_scores():
         """
         Fetch only score blobs.
@@ -89,7 +278,7 @@ class ResultsController:
 
     def get_recent_results(n=1):
         """
-        Fetch the most recent results.
+        Fetch the most recently submitted results.
 
         Args:
             n (int): number of results
@@ -97,7 +286,7 @@ class ResultsController:
         Returns:
             list[Results]
         """
-        return Results.query.order_by(Results.id.desc()).limit(n).all()
+        return Results.query.order_by(Results.submitted_at.desc(), Results.id.desc()).limit(n).all()
 
 
     def get_random_results(n=1):
@@ -110,7 +299,8 @@ class ResultsController:
         Returns:
             list[Results]
         """
-        return Results.query.order_by(func.random()).limit(n).all()
+        stmt = ResultsController._random_window(select(Results), n)
+        return db.session.scalars(select(Results).from_statement(stmt)).all()
 
 
     def get_results_from_id(id):
@@ -121,8 +311,11 @@ class ResultsController:
             id (int)
 
         Returns:
-            Results | None
+            Results | None: an unsaved instance if the row is still queued by the write-behind writer
         """
+        pending = result_writer.pending(id)
+        if pending is not None:
+            return Results(**pending)
         return Results.query.filter_by(id=id).first()
 
 
@@ -134,14 +327,29 @@ class ResultsController:
             results (dict): {"demographics": ..., "scores": ..., "answers": ...}
             return_id (bool): if True, return inserted id
 
+        Typed demographic columns and the compact answers/scores arrays are derived from results,
+        and ResultCounts is incremented in the same transaction. With WRITE_BEHIND enabled the row
+        is queued instead and its id comes from a pre-fetched sequence block.
+
         Returns:
             int | None
         """
+        if result_writer.enabled:
+            new_id = result_writer.submit(results)
+            return new_id if return_id else None
+
         try:
-            new_result = Results(**results)
+            new_result = Results(
+                **results,
+                **Demographics.encode(results["demographics"]),
+                scores_arr=_scores_to_array(results["scores"]),
+                answers_arr=_answers_to_array(results["answers"]),
+            )
             db.session.add(new_result)
             db.session.flush()
+            Counts.increment(results["demographics"], new_result.date)
             db.session.commit()
+            data_cache.bump_generation()
             if return_id:
                 return new_result.id
         except Exception:
@@ -150,12 +358,181 @@ class ResultsController:
             raise
 
 
+    def add_results(rows):
+        """
+        Insert a batch of pre-numbered result rows in one transaction (write-behind flush).
+
+        Rows whose id already exists are skipped, so a batch recovered from a spill file can be
+        replayed safely; only inserted rows are added to ResultCounts.
+
+        Args:
+            rows (list[dict]): {"id", "date", "demographics", "scores", "answers", ...}
+
+        Returns:
+            int: rows inserted
+        """
+        try:
+            values = [
+                {
+                    **row,
+                    **Demographics.encode(row["demographics"]),
+                    "scores_arr": _scores_to_array(row["scores"]),
+                    "answers_arr": _answers_to_array(row["answers"]),
+                }
+                for row in rows
+            ]
+            stmt = insert(Results).on_conflict_do_nothing(index_elements=[Results.id]).returning(Results.id)
+            inserted = set(db.session.scalars(stmt, values))
+
+            Counts.increment_many(
+                (row["demographics"], row["date"]) for row in rows if row["id"] in inserted
+            )
+            db.session.commit()
+        except Exception:
+            logger.exception("[ResultsController.add_results] DB insert failed")
+            db.session.rollback()
+            raise
+
+        if inserted:
+            data_cache.bump_generation()
+        return len(inserted)
+
+
+    def iter_answers(start_id=None, end_id=None, chunk_size=5000):
+        """
+        Stream (id, answers, scores) in id order using a server-side cursor.
+
+        Args:
+            start_id (int | None): inclusive lower id bound
+            end_id (int | None): inclusive upper id bound
+            chunk_size (int): rows fetched per round trip
+
+        Yields:
+            list[tuple[int, dict, dict]]: one chunk of rows
+        """
+
+        stmt = select(Results.id, Results.answers, Results.scores).order_by(Results.id)
+        if start_id is not None:
+            stmt = stmt.where(Results.id >= int(start_id))
+        if end_id is not None:
+            stmt = stmt.where(Results.id <= int(end_id))
+
+        # Dedicated connection: committing writes on the session would close the named cursor
+        with db.engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=int(chunk_size)).execute(stmt)
+            for chunk in result.partitions():
+                yield [tuple(row) for row in chunk]
+
+
+    def bulk_update_scores(rows, batch_size=1000):
+        """
+        Write scores (JSONB and array) back with batched UPDATE ... FROM (VALUES ...) statements.
+
+        Args:
+            rows (list[tuple[int, dict]]): [(id, scores), ...]
+            batch_size (int): rows per statement
+
+        Returns:
+            list[date]: the date of each updated row, so callers can re-roll affected days
+        """
+
+        table = Results.__table__.name
+        updated = []
+
+        with db.engine.begin() as conn:
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                params = {}
+                values = []
+                for i, (row_id, scores) in enumerate(batch):
+                    params[f"id_{i}"] = int(row_id)
+                    params[f"s_{i}"] = json.dumps(scores)
+                    params[f"a_{i}"] = _scores_to_array(scores)
+                    values.append(f"(:id_{i}, CAST(:s_{i} AS jsonb), CAST(:a_{i} AS real[]))")
+
+                stmt = text(
+                    f"UPDATE {table} AS r SET scores = v.scores, scores_arr = v.scores_arr "
+                    f"FROM (VALUES {', '.join(values)}) AS v(id, scores, scores_arr) "
+                    f"WHERE r.id = v.id RETURNING r.date"
+                )
+                updated.extend(conn.execute(stmt, params).scalars())
+
+        if updated:
+            data_cache.bump_generation()
+        return updated
+
+
+    def backfill_arrays_range(start_id, end_id):
+        """
+        Set answers_arr/scores_arr from the JSONB columns for results with start_id <= id <= end_id.
+
+        Returns:
+            int: rows updated
+        """
+
+        table = Results.__table__.name
+        scores_cols = ", ".join(f"(scores ->> '{axis}')::real" for axis in SCORE_AXES)
+
+        stmt = text(
+            f"UPDATE {table} SET "
+            f"answers_arr = ARRAY("
+            f"  SELECT (answers ->> q::text)::smallint FROM generate_series(:first_q, :last_q) AS q ORDER BY q), "
+            f"scores_arr = ARRAY[{scores_cols}] "
+            f"WHERE id BETWEEN :start_id AND :end_id"
+        )
+
+        with db.engine.begin() as conn:
+            return conn.execute(stmt, {
+                "first_q": ANSWER_IDS[0],
+                "last_q": ANSWER_IDS[-1],
+                "start_id": int(start_id),
+                "end_id": int(end_id),
+            }).rowcount or 0
+
+
+    def _random_window(stmt, limit, pivot=None):
+        """
+        Sample `limit` rows at random without sorting the whole filtered table.
+
+        Every row carries an indexed, uniformly random sample_rank. A random pivot selects the
+        next `limit` matching rows in rank order, wrapping to the lowest ranks if fewer follow the
+        pivot, so cost scales with the sample size rather than the table size.
+
+        Trade-off: ranks are fixed at insert, so each sample is one of only N contiguous windows
+        rather than any subset of `limit` rows. A single sample is still uniform, but repeated
+        samples are correlated: rows with neighbouring ranks always appear together, and two
+        draws either overlap heavily or not at all. Fine for charts; not for resampling
+        statistics (bootstrap, averaging over repeated draws). `jobs.py sample_rank` reshuffles
+        the ranks, so samples after it are independent of those before.
+
+        Args:
+            stmt: filtered Core select (unordered, unlimited)
+            limit (int): sample size
+            pivot (float | None): window start in [0, 1); random if None
+
+        Returns:
+            CompoundSelect: at most `limit` rows
+        """
+
+        if pivot is None:
+            pivot = random.random()
+
+        head = stmt.where(Results.sample_rank >= pivot).order_by(Results.sample_rank).limit(limit)
+        tail = stmt.where(Results.sample_rank < pivot).order_by(Results.sample_rank).limit(limit)
+
+        # The outer LIMIT stops Postgres scanning the wrap-around branch once the head is full
+        return union_all(head, tail).limit(limit)
+
+
     def _apply_filterset(query, filterset):
         """
-        Apply filterset constraints directly in SQLAlchemy, matching JSON expression indexes.
+        Apply filterset constraints directly in SQLAlchemy.
+
+        Uses the typed demographic columns when TYPED_DEMOGRAPHIC_FILTERS is enabled, otherwise
+        JSONB extraction matching the JSON expression indexes.
 
         Args:
-            query: SQLAlchemy query
+            query: SQLAlchemy query or Core select
             filterset (dict): frontend filterset
 
         Returns:
@@ -167,6 +544,9 @@ class ResultsController:
         if len(group_ids) > 0:
             query = query.filter(Results.group_id.in_(group_ids))
 
+        if current_app.config.get("TYPED_DEMOGRAPHIC_FILTERS"):
+            return ResultsController._apply_filterset_typed(query, filterset)
+
         # Identities: JSONB array containment
         identities = filterset.get("identities") or []
         if len(identities) > 0:
@@ -202,6 +582,47 @@ class ResultsController:
         return query
 
 
+    def _apply_filterset_typed(query, filterset):
+        """
+        Apply demographic filterset constraints on the typed, dictionary-encoded columns.
+
+        Args:
+            query: SQLAlchemy query or Core select
+            filterset (dict): frontend filterset
+
+        Returns:
+            SQLAlchemy query
+        """
+
+        # Identities: int array overlap (any) / containment (all)
+        identities = filterset.get("identities") or []
+        if len(identities) > 0:
+            codes = Demographics.get_codes("identities", identities)
+            if filterset.get("any-all") == "any":
+                query = query.filter(Results.identity_ids.overlap(codes))
+            elif len(codes) < len(set(identities)):
+                # An unknown identity can never be matched by every row
+                query = query.filter(false())
+            else:
+                query = query.filter(Results.identity_ids.contains(codes))
+
+        min_age = filterset.get("min-age")
+        max_age = filterset.get("max-age")
+
+        if min_age is not None or max_age is not None:
+            lo = int(min_age) if (min_age is not None and int(min_age) > 0) else 0
+            hi = int(max_age) if (max_age is not None and int(max_age) > 0) else 101
+            query = query.filter(and_(Results.age >= lo, Results.age <= hi))
+
+        for filter_key, column in CODED_FIELDS.items():
+            vals = filterset.get(filter_key) or []
+            if len(vals) > 0:
+                codes = Demographics.get_codes(filter_key, vals)
+                query = query.filter(getattr(Results, column).in_(codes))
+
+        return query
+
+
     # Filter a provided query object using the filterset given
     def get_filtered_dataset(query, filterset, limit=None):
         """
@@ -238,122 +659,765 @@ class ResultsController:
         return ResultsController._apply_filterset(query, filterset)
 
 
-    # Returns list of dataset dictionaries containing scores, average scores and answers.
-    def get_filtered_datasets(filter_data):
+    def _empty_answer_counts():
+        return {
+            str(q_id): {label: 0 for label in ANSWER_LABELS.values()}
+            for q_id in range(1, 101)
+        }
+
+
+    def _scale_answer_counts(raw_answer_counts):
+        # Get scaled answer counts (per-question max -> 1)
+        answer_counts = {}
+        for q_id, inner_dict in raw_answer_counts.items():
+            denom = max(inner_dict.values()) or 1
+            answer_counts[q_id] = {k: (v / denom) for k, v in inner_dict.items()}
+        return answer_counts
+
+
+    def _dataset_dict(i, filterset, count, raw_answer_counts, all_scores, mean_scores, median_scores,
+                      histograms=None, density=None):
+        dataset = {
+            "name": f"custom_{i}",
+            "label": filterset["label"],
+            "custom_dataset": True,
+            "custom_id": i,
+            "result_id": None,
+            "color": filterset["color"],
+            "count": count,
+            "raw_answer_counts": raw_answer_counts,
+            "answer_counts": ResultsController._scale_answer_counts(raw_answer_counts),
+            "all_scores": all_scores,
+            "mean_scores": mean_scores,
+            "median_scores": median_scores
+        }
+        if histograms is not None:
+            dataset["histograms"] = histograms
+        if density is not None:
+            dataset["density"] = density
+        return dataset
+
+
+    def _build_dataset_rows(rows):
         """
-        Build datasets for the frontend data explorer.
+        Aggregate one filterset's (scores, answers) JSONB rows in Python.
+
+        Returns:
+            tuple: (count, raw_answer_counts, all_scores, mean_scores, median_scores)
+        """
+
+        all_scores = []
+        raw_answer_counts = ResultsController._empty_answer_counts()
+
+        for scores, answers in rows:
+            all_scores.append(scores)
+            for q_id, q_ans in answers.items():
+                raw_answer_counts[str(q_id)][ANSWER_LABELS[q_ans]] += 1
+
+        # Get mean and median scores for each axis
+        if len(all_scores) > 0:
+            axes = list(all_scores[0].keys())
+            mat = np.array([[scores.get(axis, 0) for axis in axes] for scores in all_scores], dtype=float)
+
+            mean_scores = {axis: round(float(np.mean(mat[:, j])), 2) for j, axis in enumerate(axes)}
+            median_scores = {axis: round(float(np.median(mat[:, j])), 2) for j, axis in enumerate(axes)}
+        else:
+            mean_scores = {}
+            median_scores = {}
+
+        return len(all_scores), raw_answer_counts, all_scores, mean_scores, median_scores
+
+
+    def _build_dataset_arrays(rows):
+        """
+        Aggregate one filterset's (scores_arr, answers_arr) rows with NumPy.
+
+        Returns:
+            tuple: (count, raw_answer_counts, all_scores, mean_scores, median_scores)
+        """
+
+        raw_answer_counts = ResultsController._empty_answer_counts()
+        if not rows:
+            return 0, raw_answer_counts, [], {}, {}
+
+        # real[] round-trips as float32 noise; scores are stored to 2dp
+        scores_mat = np.round(np.array([s for s, _ in rows], dtype=np.float64), 2)
+        answers_mat = np.array([[-9 if a is None else a for a in ans] for _, ans in rows], dtype=np.int8)
+
+        for ans, label in ANSWER_LABELS.items():
+            per_question = (answers_mat == ans).sum(axis=0)
+            for j, q_id in enumerate(ANSWER_IDS):
+                raw_answer_counts[str(q_id)][label] = int(per_question[j])
+
+        all_scores = [dict(zip(SCORE_AXES, row)) for row in scores_mat.tolist()]
+        mean_scores = {axis: round(float(v), 2) for axis, v in zip(SCORE_AXES, scores_mat.mean(axis=0))}
+        median_scores = {axis: round(float(v), 2) for axis, v in zip(SCORE_AXES, np.median(scores_mat, axis=0))}
+
+        return len(rows), raw_answer_counts, all_scores, mean_scores, median_scores
+
+
+    def _filterset_select(filter_data, filterset, *columns, pivot=None):
+        """
+        Build the date-bounded, filtered, ordered and limited select for one filterset.
+        "random" order samples via _random_window rather than ORDER BY random(). Without a limit
+        the select is unordered.
 
         Args:
             filter_data (dict)
+            filterset (dict)
+            *columns: columns to select
+            pivot (float | None): fixed random window start, for reproducible samples
 
         Returns:
-            list[dict]
+            Select | CompoundSelect
         """
-        datasets = []
 
-        # Sort query and limit by date before filtering.
+        min_d, max_d = _coerce_to_date_bounds(filter_data["min-date"], filter_data["max-date"])
+        stmt = select(*columns).where(and_(Results.date >= min_d, Results.date <= max_d))
+        stmt = ResultsController._apply_filterset(stmt, filterset)
+
+        limit = filter_data.get("limit")
+        limit = int(limit) if limit is not None else None
+
+        # Unlimited aggregates read every match, so a sort would be wasted work
+        if limit is None:
+            return stmt
+
+        # Sort before limiting. Submission time, not id: result_writer reserves ids ahead of the insert
         if filter_data["order"] == "recent":
-            query = Results.query.order_by(Results.id.desc())
-        elif filter_data["order"] == "random":
-            query = Results.query.order_by(func.random())
+            return stmt.order_by(Results.submitted_at.desc(), Results.id.desc()).limit(limit)
+
+        return ResultsController._random_window(stmt, limit, pivot=pivot)
+
+
+    def _aggregate_statement(filt_select, i, arrays=False, medians_only=False, bins=None, invert=(), grid=None):
+        """
+        Build a single statement computing count, per-axis avg/median and the answer histogram.
+
+        Args:
+            filt_select: filtered select of (scores, answers), ordering preserved for the limit
+            i (int): filterset index, returned as the "fs" column
+            arrays (bool): scores/answers are the compact array columns rather than JSONB
+            medians_only (bool): n, avg_<axis> and hist are NULL (answered elsewhere, e.g. from rollups)
+            bins (int | None): also bin scores per axis into score_hist (see _score_histograms)
+            invert (Iterable[str]): axes to bin negated
+            grid (int | None): also count compass pair density cells into density (see _density_grids)
+
+        Returns:
+            Select: one row (fs, n, avg_<axis>..., med_<axis>..., hist, score_hist, density)
+        """
+
+        # Referenced twice, so Postgres materialises it once
+        sub = filt_select.cte(f"filtered_{i}")
+
+        def axis_expr(axis):
+            if arrays:
+                return cast(sub.c.scores[SCORE_AXES.index(axis) + 1], Float)
+            return cast(sub.c.scores[axis].astext, Float)
+
+        avg_cols = [func.avg(axis_expr(axis)).label(f"avg_{axis}") for axis in SCORE_AXES]
+        med_cols = [
+            func.percentile_cont(0.5).within_group(axis_expr(axis)).label(f"med_{axis}")
+            for axis in SCORE_AXES
+        ]
+
+        if bins is not None:
+            score_hist = ResultsController._score_histogram_expr(sub, bins, invert, arrays).label("score_hist")
+        else:
+            score_hist = cast(null(), JSONB).label("score_hist")
+
+        if grid is not None:
+            density = ResultsController._density_grid_expr(sub, grid, arrays).label("density")
+        else:
+            density = cast(null(), JSONB).label("density")
+
+        if medians_only:
+            return select(
+                literal(i, Integer).label("fs"),
+                cast(null(), Integer).label("n"),
+                *(cast(null(), Float).label(f"avg_{axis}") for axis in SCORE_AXES),
+                *med_cols,
+                cast(null(), JSONB).label("hist"),
+                score_hist,
+                density
+            ).select_from(sub)
+
+        # {q_id: {answer: n}} built server-side from (question, option) counts
+        if arrays:
+            # answers_arr position == question id
+            each = func.unnest(sub.c.answers).table_valued("value", with_ordinality="key").render_derived().lateral()
+        else:
+            each = func.jsonb_each_text(sub.c.answers).table_valued("key", "value").lateral()
+        option_counts = (
+            select(each.c.key, each.c.value, func.count().label("n"))
+            .select_from(sub)
+            .join(each, true())
+            .group_by(each.c.key, each.c.value)
+            .subquery()
+        )
+        per_question = (
+            select(
+                option_counts.c.key,
+                func.jsonb_object_agg(option_counts.c.value, option_counts.c.n).label("opts")
+            )
+            .group_by(option_counts.c.key)
+            .subquery()
+        )
+        hist = select(func.jsonb_object_agg(per_question.c.key, per_question.c.opts)).scalar_subquery()
+
+        return select(
+            literal(i, Integer).label("fs"),
+            func.count().label("n"),
+            *avg_cols,
+            *med_cols,
+            hist.label("hist"),
+            score_hist,
+            density
+        ).select_from(sub)
+
+
+    def _score_histogram_expr(sub, bins, invert, arrays):
+        """
+        Per-axis score bin counts over an aggregate CTE, binned by width_bucket against the same
+        thresholds as _score_histograms.
+
+        Returns:
+            ScalarSelect: JSONB array of [axis, bucket, n], axis being the name (JSONB) or the
+            1-based scores_arr position (arrays)
+        """
+
+        if arrays:
+            each = func.unnest(sub.c.scores).table_valued("value", with_ordinality="key").render_derived().lateral()
+            # real[] round-trips as float32 noise; scores are stored to 2dp
+            value = cast(func.round(cast(each.c.value, Numeric), 2), Float)
+            inverted = each.c.key.in_([SCORE_AXES.index(axis) + 1 for axis in invert])
+        else:
+            each = func.jsonb_each_text(sub.c.scores).table_valued("key", "value").lateral()
+            value = cast(each.c.value, Float)
+            inverted = each.c.key.in_(list(invert))
+
+        if invert:
+            value = case((inverted, -value), else_=value)
+
+        group_by = [each.c.key]
+        if bins > 1:
+            thresholds = cast(array([literal(t, Float) for t in histogram_thresholds(bins)]), ARRAY(Float))
+            bucket = func.width_bucket(value, thresholds)
+            group_by.append(bucket)
+        else:
+            bucket = literal(0, Integer)
+
+        bin_counts = (
+            select(each.c.key, bucket.label("bucket"), func.count().label("n"))
+            .select_from(sub)
+            .join(each, true())
+            .where(value.between(-1, 1))
+            .group_by(*group_by)
+            .subquery()
+        )
+        return select(
+            func.jsonb_agg(func.jsonb_build_array(bin_counts.c.key, bin_counts.c.bucket, bin_counts.c.n))
+        ).scalar_subquery()
+
+
+    def _density_grid_expr(sub, size, arrays):
+        """
+        Compass pair density cells over an aggregate CTE, binned by width_bucket against the same
+        thresholds as _density_grids.
+
+        Returns:
+            ScalarSelect: JSONB array of [pair index, x_cell, y_cell, n]
+        """
+
+        def axis_value(axis):
+            if arrays:
+                # real[] round-trips as float32 noise; scores are stored to 2dp
+                return cast(func.round(cast(sub.c.scores[SCORE_AXES.index(axis) + 1], Numeric), 2), Float)
+            return cast(sub.c.scores[axis].astext, Float)
+
+        thresholds = cast(array([literal(t, Float) for t in histogram_thresholds(size)]), ARRAY(Float))
+
+        members = []
+        for p, (x_axis, y_axis) in enumerate(COMPASS_PAIRS):
+            x, y = axis_value(x_axis), axis_value(y_axis)
+            x_cell, y_cell = func.width_bucket(x, thresholds), func.width_bucket(y, thresholds)
+            members.append(
+                select(literal(p, Integer).label("pair"), x_cell.label("x"), y_cell.label("y"), func.count().label("n"))
+                .select_from(sub)
+                .where(and_(x.between(-1, 1), y.between(-1, 1)))
+                .group_by(x_cell, y_cell)
+            )
+
+        cells = union_all(*members).subquery()
+        return select(
+            func.jsonb_agg(func.jsonb_build_array(cells.c.pair, cells.c.x, cells.c.y, cells.c.n))
+        ).scalar_subquery()
+
+
+    def _parse_density(row, size):
+        """
+        Convert an aggregate row's density into the _density_grids shape.
+
+        Returns:
+            dict
+        """
+
+        flat = np.array((row.density if row is not None else None) or [], dtype=np.int64).reshape(-1, 4)
+        # Row-major by y then x, as _density_grids emits them
+        flat = flat[np.lexsort((flat[:, 1], flat[:, 2], flat[:, 0]))]
+        cells = {
+            f"{x_axis}-{y_axis}": np.ascontiguousarray(flat[flat[:, 0] == p, 1:])
+            for p, (x_axis, y_axis) in enumerate(COMPASS_PAIRS)
+        }
+        return {"size": size, "cells": cells}
+
+
+    def _parse_score_histograms(row, bins):
+        """
+        Convert an aggregate row's score_hist into per-axis counts.
+
+        Returns:
+            dict[str, np.ndarray]: as _score_histograms
+        """
+
+        histograms = {axis: np.zeros(bins, dtype=np.int64) for axis in SCORE_AXES}
+        for key, bucket, n in ((row.score_hist if row is not None else None) or []):
+            axis = SCORE_AXES[key - 1] if isinstance(key, int) else key
+            if axis in histograms and 0 <= int(bucket) < bins:
+                histograms[axis][int(bucket)] += int(n)
+        return histograms
+
+
+    def _parse_aggregate_row(row):
+        """
+        Convert an aggregate statement row into dataset components.
+
+        Returns:
+            tuple: (count, raw_answer_counts, all_scores, mean_scores, median_scores)
+        """
+
+        n = int(row.n or 0) if row is not None else 0
+
+        raw_answer_counts = ResultsController._empty_answer_counts()
+        for q_id, opts in ((row.hist if row is not None else None) or {}).items():
+            if q_id not in raw_answer_counts:
+                continue
+            for ans, count in opts.items():
+                label = ANSWER_LABELS.get(int(ans))
+                if label is not None:
+                    raw_answer_counts[q_id][label] = int(count)
+
+        if n > 0:
+            mean_scores = {axis: round(float(getattr(row, f"avg_{axis}") or 0.0), 2) for axis in SCORE_AXES}
+            median_scores = {axis: round(float(getattr(row, f"med_{axis}") or 0.0), 2) for axis in SCORE_AXES}
         else:
-            query = Results.query.order_by(func.random())
+            mean_scores = {}
+            median_scores = {}
+
+        return n, raw_answer_counts, [], mean_scores, median_scores
+
+
+    def _merge_rollup(rolled, tail, median_row):
+        """
+        Combine a rollup aggregate row, an optional raw tail aggregate row and the raw median row
+        (a medians_only aggregate over every match).
+
+        Returns:
+            tuple: (count, raw_answer_counts, all_scores, mean_scores, median_scores)
+        """
+
+        n = int(rolled.n or 0)
+        sums = np.array(rolled.sums or [0.0] * len(SCORE_AXES), dtype=np.float64)
+        hist = np.array(rolled.hist or [0] * ANSWER_SLOTS, dtype=np.int64)
+
+        raw_answer_counts = ResultsController._empty_answer_counts()
+        for j, q_id in enumerate(ANSWER_IDS):
+            for ans, label in ANSWER_LABELS.items():
+                raw_answer_counts[str(q_id)][label] = int(hist[j * 5 + ans + 2])
+
+        if tail is not None and tail.n:
+            tail_n, tail_counts, _, tail_mean, _ = ResultsController._parse_aggregate_row(tail)
+            sums += np.array([float(getattr(tail, f"avg_{axis}") or 0.0) * tail_n for axis in SCORE_AXES])
+            n += tail_n
+            for q_id, opts in tail_counts.items():
+                for label, count in opts.items():
+                    raw_answer_counts[q_id][label] += count
+
+        if n == 0:
+            return 0, raw_answer_counts, [], {}, {}
+
+        mean_scores = {axis: round(float(sums[j] / n), 2) for j, axis in enumerate(SCORE_AXES)}
+        median_scores = {axis: round(float(getattr(median_row, f"med_{axis}") or 0.0), 2) for axis in SCORE_AXES}
+        return n, raw_answer_counts, [], mean_scores, median_scores
+
+
+    def _rollup_plan(filter_data):
+        """
+        Pick filtersets answerable from ResultsDailyRollup (ROLLUP_QUERIES enabled, only rolled-up
+        dimensions touched).
+
+        Returns:
+            tuple: (filterset indices, rolled (lo, hi) | None, tail (lo, hi) | None)
+        """
+
+        if not current_app.config.get("ROLLUP_QUERIES"):
+            return [], None, None
+
+        indices = [i for i, fs in enumerate(filter_data["filtersets"]) if Rollups.answerable(fs)]
+        if not indices:
+            return [], None, None
 
         min_d, max_d = _coerce_to_date_bounds(filter_data["min-date"], filter_data["max-date"])
-        query = query.filter(and_(Results.date >= min_d, Results.date <= max_d))
+        rolled, tail = split_dates(min_d, max_d, Rollups.watermark())
+        if rolled is None:
+            return [], None, None
+        return indices, rolled, tail
 
-        limit = filter_data.get("limit")
-        limit = int(limit) if limit is not None else None
 
-        # Reuse same query for each filterset
-        for i, filterset in enumerate(filter_data["filtersets"]):
-            filt_query = ResultsController.get_filtered_dataset_query(query, filterset)
+    def _set_statement_timeout(seconds):
+        """
+        Bound the statements run for the rest of the current transaction.
 
-            if limit is not None:
-                filt_query = filt_query.limit(limit)
+        Args:
+            seconds (float): 0 or None leaves the server default
+        """
 
-            # Only pull the JSON needed by the charts
-            rows = filt_query.with_entities(Results.scores, Results.answers).all()
+        if seconds:
+            db.session.execute(
+                select(func.set_config("statement_timeout", f"{int(float(seconds) * 1000)}", True))
+            )
 
-            all_scores = []
-            raw_answer_counts = {
-                str(q_id): {"Strongly Agree": 0, "Agree": 0, "Neutral": 0, "Disagree": 0, "Strongly Disagree": 0}
-                for q_id in range(1, 101)
-            }
-            keys = {2: "Strongly Agree", 1: "Agree", 0: "Neutral", -1: "Disagree", -2: "Strongly Disagree"}
-
-            for scores, answers in rows:
-                all_scores.append(scores)
-                for q_id, q_ans in answers.items():
-                    raw_answer_counts[str(q_id)][keys[q_ans]] += 1
-
-            # Get scaled answer counts (per-question max -> 1)
-            answer_counts = {}
-            for q_id, inner_dict in raw_answer_counts.items():
-                denom = max(inner_dict.values()) or 1
-                answer_counts[q_id] = {k: (v / denom) for k, v in inner_dict.items()}
-
-            # Get mean and median scores for each axis
-            if len(all_scores) > 0:
-                axes = list(all_scores[0].keys())
-                mat = np.array([[scores.get(axis, 0) for axis in axes] for scores in all_scores], dtype=float)
-
-                mean_scores = {axis: round(float(np.mean(mat[:, j])), 2) for j, axis in enumerate(axes)}
-                median_scores = {axis: round(float(np.median(mat[:, j])), 2) for j, axis in enumerate(axes)}
+
+    def _execute_union(members):
+        """
+        Execute per-filterset selects as one UNION ALL round trip.
+
+        Returns:
+            list[Row]
+        """
+
+        if not members:
+            return []
+        stmt = members[0] if len(members) == 1 else union_all(*members)
+        return db.session.execute(stmt).all()
+
+
+    # Returns list of dataset dictionaries containing scores, average scores and answers.
+    def get_filtered_datasets(filter_data):
+        """
+        Build datasets for the frontend data explorer.
+
+        All filtersets run as a single UNION ALL statement tagged with a filterset index column.
+        In "aggregate" mode, counts, means, medians and answer histograms are computed in SQL
+        and all_scores is returned empty; "limit" may then be None to aggregate every match, and
+        statements are bounded by AGGREGATE_STATEMENT_TIMEOUT. With ARRAY_RESULT_COLUMNS enabled, the compact
+        answers_arr/scores_arr columns are read instead of JSONB, falling back to JSONB for rows not yet
+        backfilled. An integer "seed" makes "random" order samples reproducible.
+
+        With "histogram-bins" set, each dataset also carries "histograms": per-axis score counts
+        binned as histogram.js does (axes in "histogram-invert" negated first), from the score
+        matrix in "rows" mode or width_bucket in SQL in "aggregate" mode. "include-scores": false
+        drops all_scores from the response.
+
+        "density" bounds what the compass charts draw: "grid" adds "density", per compass pair
+        counts over a "density-size" square grid (NumPy in "rows" mode, SQL in "aggregate" mode);
+        "sample" replaces all_scores with a stratified sample of at most "density-points" results
+        ("rows" mode only). Counts, means, medians and histograms still cover every matched result.
+
+        Args:
+            filter_data (dict)
+
+        Returns:
+            list[dict]
+        """
+
+        filtersets = filter_data["filtersets"]
+        aggregate = filter_data.get("mode") == "aggregate"
+        arrays = bool(current_app.config.get("ARRAY_RESULT_COLUMNS"))
+        bins = filter_data.get("histogram-bins")
+        invert = tuple(filter_data.get("histogram-invert") or ())
+        include_scores = filter_data.get("include-scores", True)
+        density = filter_data.get("density")
+        grid = filter_data.get("density-size", 50) if density == "grid" else None
+
+        if arrays:
+            # Rows backfill_arrays has not reached yet are converted from JSONB, as it would
+            columns = (
+                func.coalesce(
+                    Results.scores_arr, array([cast(Results.scores[axis].astext, REAL) for axis in SCORE_AXES])
+                ).label("scores"),
+                func.coalesce(
+                    Results.answers_arr, array([cast(Results.answers[str(q)].astext, SmallInteger) for q in ANSWER_IDS])
+                ).label("answers"),
+            )
+        else:
+            columns = (Results.scores.label("scores"), Results.answers.label("answers"))
+
+        seed = filter_data.get("seed")
+        rng = random.Random(seed) if seed is not None else None
+
+        if aggregate:
+            # Aggregates may run over every match (no limit), so bound them server-side
+            ResultsController._set_statement_timeout(current_app.config.get("AGGREGATE_STATEMENT_TIMEOUT"))
+
+        # Aggregates over fully rolled-up days come from ResultsDailyRollup when the whole filtered
+        # set fits in the limit; only medians (and days after the watermark) then touch Results.
+        rolled, tail_dates = {}, None
+        if aggregate:
+            limit = filter_data.get("limit")
+            indices, rolled_dates, tail_dates = ResultsController._rollup_plan(filter_data)
+            if indices:
+                rows = ResultsController._execute_union([
+                    Rollups.aggregate_statement(filtersets[i], i, *rolled_dates) for i in indices
+                ])
+                rolled = {row.fs: row for row in rows if limit is None or int(row.n or 0) <= int(limit)}
+
+        unlimited = dict(filter_data, order="recent", limit=None)
+
+        members = []
+        for i, filterset in enumerate(filtersets):
+            pivot = rng.random() if rng is not None else None
+
+            if i in rolled:
+                # Every match is in the sample, so medians need no ORDER BY / LIMIT
+                full_select = ResultsController._filterset_select(unlimited, filterset, *columns)
+                members.append(ResultsController._aggregate_statement(
+                    full_select, i, arrays=arrays, medians_only=True, bins=bins, invert=invert, grid=grid
+                ))
+                if tail_dates is not None:
+                    tail_data = dict(unlimited, **{"min-date": tail_dates[0], "max-date": tail_dates[1]})
+                    tail_select = ResultsController._filterset_select(tail_data, filterset, *columns)
+                    # Tail rows are tagged after the filterset indices
+                    members.append(ResultsController._aggregate_statement(tail_select, len(filtersets) + i, arrays=arrays))
+                continue
+
+            filt_select = ResultsController._filterset_select(filter_data, filterset, *columns, pivot=pivot)
+
+            if aggregate:
+                members.append(ResultsController._aggregate_statement(
+                    filt_select, i, arrays=arrays, bins=bins, invert=invert, grid=grid
+                ))
             else:
-                mean_scores = {}
-                median_scores = {}
-
-            datasets.append({
-                "name": f"custom_{i}",
-                "label": filterset["label"],
-                "custom_dataset": True,
-                "custom_id": i,
-                "result_id": None,
-                "color": filterset["color"],
-                "count": len(all_scores),
-                "raw_answer_counts": raw_answer_counts,
-                "answer_counts": answer_counts,
-                "all_scores": all_scores,
-                "mean_scores": mean_scores,
-                "median_scores": median_scores
-            })
+                # Wrap so each member keeps its own ORDER BY / LIMIT
+                sub = filt_select.subquery()
+                members.append(select(literal(i, Integer).label("fs"), sub.c.scores, sub.c.answers))
+
+        rows = ResultsController._execute_union(members)
+
+        datasets = []
+        if aggregate:
+            by_fs = {row.fs: row for row in rows}
+            for i, filterset in enumerate(filtersets):
+                row = by_fs.get(i)
+                if i in rolled:
+                    parts = ResultsController._merge_rollup(rolled[i], by_fs.get(len(filtersets) + i), row)
+                    limit = filter_data.get("limit")
+                    if limit is not None and parts[0] > int(limit):
+                        # New results after the watermark pushed it over the limit: sample from Results
+                        filt_select = ResultsController._filterset_select(filter_data, filterset, *columns)
+                        row = db.session.execute(ResultsController._aggregate_statement(
+                            filt_select, i, arrays=arrays, bins=bins, invert=invert, grid=grid
+                        )).first()
+                        parts = ResultsController._parse_aggregate_row(row)
+                else:
+                    parts = ResultsController._parse_aggregate_row(row)
+                histograms = ResultsController._parse_score_histograms(row, bins) if bins is not None else None
+                cells = ResultsController._parse_density(row, grid) if grid is not None else None
+                datasets.append(ResultsController._dataset_dict(i, filterset, *parts, histograms=histograms, density=cells))
+        else:
+            by_fs = {i: [] for i in range(len(filtersets))}
+            for fs, scores, answers in rows:
+                by_fs[fs].append((scores, answers))
+            build = ResultsController._build_dataset_arrays if arrays else ResultsController._build_dataset_rows
+            for i, filterset in enumerate(filtersets):
+                count, raw_answer_counts, all_scores, mean_scores, median_scores = build(by_fs[i])
+                histograms = _score_histograms(all_scores, bins, invert) if bins is not None else None
+                cells = _density_grids(all_scores, grid) if grid is not None else None
+                if not include_scores:
+                    all_scores = []
+                elif density == "sample":
+                    all_scores = _stratified_sample(all_scores, filter_data.get("density-points", 1000), seed)
+                datasets.append(ResultsController._dataset_dict(
+                    i, filterset, count, raw_answer_counts, all_scores, mean_scores, median_scores,
+                    histograms=histograms, density=cells
+                ))
 
         return datasets
 
 
-    def get_filtered_dataset_count(filter_data):
+    def get_filtered_dataset_count(filter_data, with_accuracy=False):
         """
         Return only counts for each filterset.
 
+        With FILTER_COUNTS set to "exact" or "estimate", filtersets are answered from ResultCounts
+        where possible (see CountsController.count_filtersets). With ROLLUP_QUERIES, remaining
+        filtersets over rolled-up dimensions sum ResultsDailyRollup plus a raw count of the days after
+        its watermark. Everything else runs as COUNT(*). All statements share one UNION ALL.
+
         Args:
             filter_data (dict)
+            with_accuracy (bool): also return whether each count is exact
 
         Returns:
-            dict[int,int]
+            dict[int,int] | tuple[dict[int,int], dict[int,bool]]
         """
 
         min_d, max_d = _coerce_to_date_bounds(filter_data["min-date"], filter_data["max-date"])
-        base_query = Results.query.filter(and_(Results.date >= min_d, Results.date <= max_d))
 
         limit = filter_data.get("limit")
         limit = int(limit) if limit is not None else None
 
-        counts = {}
+        filtersets = filter_data["filtersets"]
+        counts = {i: 0 for i in range(len(filtersets))}
+        exact = {i: True for i in range(len(filtersets))}
+
+        def count_member(i, filterset, lo, hi):
+            q = select(literal(i, Integer).label("fs"), func.count(Results.id).label("n"))
+            q = q.where(and_(Results.date >= lo, Results.date <= hi))
+            return ResultsController._apply_filterset(q, filterset)
+
+        answered = {}
+        counts_mode = current_app.config.get("FILTER_COUNTS", "off")
+        if counts_mode in ("exact", "estimate"):
+            answered = Counts.count_filtersets(filter_data, min_d, max_d, estimate=False)
+
+        members = []
+        indices, rolled_dates, tail_dates = ResultsController._rollup_plan(filter_data)
+        rolled = [i for i in indices if i not in answered]
+        for i in rolled:
+            members.append(Rollups.count_statement(filtersets[i], i, *rolled_dates))
+            if tail_dates is not None:
+                members.append(count_member(i, filtersets[i], *tail_dates))
+
+        if counts_mode == "estimate":
+            remaining = [i for i in range(len(filtersets)) if i not in answered and i not in rolled]
+            answered.update(Counts.count_filtersets(filter_data, min_d, max_d, indices=remaining))
+
+        for i, (n, is_exact) in answered.items():
+            counts[i] = n
+            exact[i] = is_exact
+
+        for i, filterset in enumerate(filtersets):
+            if i not in answered and i not in rolled:
+                members.append(count_member(i, filterset, min_d, max_d))
+
+        if members:
+            # Rollup and tail rows for the same filterset are summed
+            for fs, n in ResultsController._execute_union(members):
+                counts[fs] += int(n or 0)
 
-        for i, filterset in enumerate(filter_data["filtersets"]):
-            q = ResultsController.get_filtered_dataset_query(base_query, filterset)
+        if limit is not None:
+            counts = {i: min(n, limit) for i, n in counts.items()}
 
-            q = q.order_by(None)
+        if with_accuracy:
+            return counts, exact
+        return counts
 
-            n = q.with_entities(func.count(Results.id)).scalar() or 0
 
-            if limit is not None:
-                n = min(int(n), int(limit))
+    def get_identity_sums(min_d, max_d, after=None, settle_seconds=600):
+        """
+        Per-identity and overall score sums in a single pass over Results.
 
-            counts[i] = int(n)
+        Identities are unnested and grouped with GROUPING SETS ((identity), ()); the overall group
+        only counts each result once, including results with no identities.
 
-        return counts
+        Incremental passes use an (inserted_at, id) watermark rather than id alone: ids are not
+        assigned in commit order (and result_writer reserves them ahead of the insert). inserted_at
+        is the inserting transaction's start time, so rows newer than `settle_seconds` may still have
+        uncommitted neighbours below them; they are left for the next pass, which makes every row
+        below the returned watermark final.
+
+        Args:
+            min_d (date), max_d (date): inclusive date bounds
+            after (tuple[datetime, int] | None): only include results after this (inserted_at, id)
+            settle_seconds (int): must exceed the longest insert transaction
+
+        Returns:
+            tuple[tuple[datetime, int] | None, dict[str, dict]]: (watermark of the last result
+            included, or `after` if none were, {identity: {"n": int, "sums": {axis: float}}}).
+            Pass the watermark back as `after`. The overall group is keyed "Average Result".
+        """
+
+        table = Results.__table__.name
+        sums = ", ".join(
+            f"sum((r.scores ->> '{axis}')::float8) AS s_{axis}, "
+            f"sum((r.scores ->> '{axis}')::float8) FILTER (WHERE e.first IS NOT FALSE) AS t_{axis}"
+            for axis in SCORE_AXES
+        )
+
+        def where(alias):
+            clause = (
+                f"{alias}.date >= :min_d AND {alias}.date <= :max_d "
+                f"AND {alias}.inserted_at < now() - make_interval(secs => :settle) "
+            )
+            if after is not None:
+                clause += f"AND ({alias}.inserted_at, {alias}.id) > (CAST(:after_at AS timestamptz), :after_id) "
+            return clause
+
+        # The watermark is an InitPlan of the same statement, so it shares the sums' snapshot.
+        # The () grouping set always yields a row, even with nothing new.
+        last = f"FROM {table} w WHERE {where('w')}ORDER BY w.inserted_at DESC, w.id DESC LIMIT 1"
+        stmt = text(
+            f"SELECT e.identity, GROUPING(e.identity) AS is_total, "
+            f"(SELECT w.inserted_at {last}) AS last_at, (SELECT w.id {last}) AS last_id, "
+            f"count(e.identity) AS n, count(*) FILTER (WHERE e.first IS NOT FALSE) AS n_total, {sums} "
+            f"FROM {table} r "
+            f"LEFT JOIN LATERAL ("
+            f"  SELECT d.value AS identity, row_number() OVER () = 1 AS first "
+            f"  FROM (SELECT DISTINCT value FROM jsonb_array_elements_text("
+            f"    CASE WHEN jsonb_typeof(r.demographics -> 'identities') = 'array' "
+            f"    THEN r.demographics -> 'identities' ELSE '[]'::jsonb END)) AS d"
+            f") e ON true "
+            f"WHERE {where('r')}"
+            f"GROUP BY GROUPING SETS ((e.identity), ())"
+        )
+
+        watermark = after
+        groups = {}
+        params = {"min_d": min_d, "max_d": max_d, "settle": settle_seconds}
+        if after is not None:
+            params.update(after_at=after[0], after_id=after[1])
+
+        for row in db.session.execute(stmt, params).mappings():
+            if row["is_total"]:
+                if row["last_id"] is not None:
+                    watermark = (row["last_at"], row["last_id"])
+                key, n, prefix = "Average Result", row["n_total"], "t_"
+            elif row["identity"] is not None:
+                key, n, prefix = row["identity"], row["n"], "s_"
+            else:
+                continue
+            if n:
+                groups[key] = {
+                    "n": int(n),
+                    "sums": {axis: float(row[prefix + axis] or 0.0) for axis in SCORE_AXES},
+                }
+
+        return watermark, groups
+
+
+    def identity_averages(groups, identity_keys, min_results=50):
+        """
+        Turn get_identity_sums() groups into rounded mean scores.
+
+        Args:
+            groups (dict[str, dict]): {identity: {"n": int, "sums": {axis: float}}}
+            identity_keys (list[str]): identities to report, in output order
+            min_results (int): identities with n <= min_results are omitted
+
+        Returns:
+            dict[str, dict]: {identity: {axis: mean}}
+        """
+
+        avg_identities = {}
+        for identity_key in identity_keys:
+            group = groups.get(identity_key)
+            if group is None or group["n"] <= min_results:
+                continue
+            avg_identities[identity_key] = {
+                axis: round(group["sums"][axis] / group["n"], 2) for axis in SCORE_AXES
+            }
+        return avg_identities
 
 
     def get_avg_identities(identity_keys, min_results=50):
@@ -368,35 +1432,51 @@ class ResultsController:
             dict[str, dict]
         """
 
-        axes = ["diplomacy", "economics", "government", "politics", "religion", "society", "state", "technology"]
+        _, groups = ResultsController.get_identity_sums(date(2023, 1, 1), date.today(), settle_seconds=0)
+        return ResultsController.identity_averages(groups, identity_keys, min_results)
 
-        avg_identities = {}
-        min_d = date(2023, 1, 1)
-        max_d = date.today()
 
-        for identity_key in identity_keys:
-            avg_cols = [
-                func.avg(cast(Results.scores[axis].astext, Float)).label(axis)
-                for axis in axes
-            ]
+    def build_index_snapshot(limit=INDEX_SAMPLE_SIZE):
+        """
+        Materialise the homepage sample clouds (see INDEX_SAMPLES). Written to disk by
+        `jobs.py snapshot_index` with application.utils.snapshots.write_snapshot.
 
-            q = db.session.query(
-                func.count(Results.id).label("n"),
-                *avg_cols
-            ).filter(and_(Results.date >= min_d, Results.date <= max_d))
+        Scores are stored as rows in SCORE_AXES order to keep the file compact.
 
-            if identity_key != "Average Result":
-                q = q.filter(Results.demographics["identities"].comparator.contains([identity_key]))
+        Args:
+            limit (int): results per sample
 
-            row = q.first()
-            if not row:
-                continue
+        Returns:
+            dict: {"generated": <iso>, "axes": [...], "samples": {key: {"count", "mean", "median", "scores"}}}
+        """
 
-            n = int(row.n or 0)
-            if n > min_results:
-                avg_identities[identity_key] = {
-                    axis: round(float(getattr(row, axis) or 0.0), 2)
-                    for axis in axes
-                }
+        samples = {}
+        for key, identities in INDEX_SAMPLES.items():
+            filter_data = {
+                "order": "recent",
+                "limit": limit,
+                "min-date": date(2023, 1, 1),
+                "max-date": date.today(),
+                "filtersets": [{
+                    "label": "sample",
+                    "color": "",
+                    "any-all": "any",
+                    "identities": list(identities),
+                }],
+            }
+            dataset = ResultsController.get_filtered_datasets(filter_data)[0]
+            samples[key] = {
+                "count": dataset["count"],
+                "mean": dataset["mean_scores"],
+                "median": dataset["median_scores"],
+                "scores": [
+                    [scores.get(axis, 0) for axis in SCORE_AXES]
+                    for scores in dataset["all_scores"]
+                ],
+            }
 
-        return avg_identities
+        return {
+            "generated": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "axes": SCORE_AXES,
+            "samples": samples,
+        }
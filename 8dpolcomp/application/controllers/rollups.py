@@ -0,0 +1,281 @@
+import logging
+from datetime import timedelta
+
+import numpy as np
+from sqlalchemy import and_, func, Integer, literal, select, true
+from sqlalchemy.dialects.postgresql import aggregate_order_by, insert
+
+from application.controllers.demographics import _parse_age
+from application.models.results import Results
+from application.models.rollups import ResultsDailyRollup, ResultsRollupState
+from application.utils.catalogue import SCORE_AXES
+from application import db
+
+
+logger = logging.getLogger(__name__)
+
+
+# Categorical dimensions rolled up (ResultsDailyRollup columns, same names as the filterset keys)
+ROLLUP_FIELDS = ["country", "religion", "education", "ethnicity", "party"]
+
+# Width of an age bucket in years. Buckets start at multiples of AGE_BUCKET; 100 and 101 share the last.
+AGE_BUCKET = 5
+
+ANSWER_SLOTS = 100 * 5
+
+
+def _age_bucket(val):
+    age = _parse_age(val)
+    if age is None or age < 0:
+        return -1
+    return min(age // AGE_BUCKET * AGE_BUCKET, 100)
+
+
+def _age_buckets(filterset):
+    """
+    Buckets covering a filterset's age range, mirroring ResultsController._apply_filterset.
+
+    Returns:
+        tuple[int, int] | None: (first, last) bucket; None if there is no age filter
+
+    Raises:
+        ValueError: if the range does not fall on bucket boundaries
+    """
+
+    min_age = filterset.get("min-age")
+    max_age = filterset.get("max-age")
+    if min_age is None and max_age is None:
+        return None
+
+    lo = int(min_age) if (min_age is not None and int(min_age) > 0) else 0
+    hi = int(max_age) if (max_age is not None and int(max_age) > 0) else 101
+
+    if lo % AGE_BUCKET != 0 or not (hi >= 101 or (hi + 1) % AGE_BUCKET == 0 and hi < 100):
+        raise ValueError("Age range is not bucket aligned")
+    return _age_bucket(lo), _age_bucket(hi)
+
+
+def _elementwise_sum(sub, column):
+    # sum(int[]/float8[]) position by position, as one array
+    each = func.unnest(column).table_valued("v", with_ordinality="idx").render_derived().lateral()
+    per_idx = (
+        select(each.c.idx, func.sum(each.c.v).label("s"))
+        .select_from(sub)
+        .join(each, true())
+        .group_by(each.c.idx)
+        .subquery()
+    )
+    return select(func.array_agg(aggregate_order_by(per_idx.c.s, per_idx.c.idx))).scalar_subquery()
+
+
+def split_dates(min_d, max_d, watermark):
+    """
+    Split [min_d, max_d] into the rolled-up part and the raw tail after the watermark.
+
+    Returns:
+        tuple: ((lo, hi) | None, (lo, hi) | None)
+    """
+
+    if watermark is None:
+        return None, (min_d, max_d)
+
+    rolled = (min_d, min(max_d, watermark)) if min_d <= watermark else None
+    tail_start = max(min_d, watermark + timedelta(days=1))
+    tail = (tail_start, max_d) if tail_start <= max_d else None
+    return rolled, tail
+
+
+class RollupsController:
+    """
+    Answers aggregate filterset queries from ResultsDailyRollup for days that have been rolled up.
+    """
+
+    def answerable(filterset):
+        """
+        Whether a filterset only touches rolled-up dimensions.
+
+        Args:
+            filterset (dict)
+
+        Returns:
+            bool
+        """
+
+        if filterset.get("group-ids") or filterset.get("identities"):
+            return False
+        if any("" in (filterset.get(field) or []) for field in ROLLUP_FIELDS):
+            return False
+        try:
+            _age_buckets(filterset)
+        except ValueError:
+            return False
+        return True
+
+
+    def watermark():
+        """
+        Returns:
+            date | None: last day of recorded contiguous coverage (see ResultsRollupState); later
+            days must be read from Results. None until a --full run has recorded coverage.
+        """
+
+        return db.session.execute(select(ResultsRollupState.covered_to)).scalar()
+
+
+    def state():
+        """
+        Returns:
+            ResultsRollupState | None
+        """
+
+        return db.session.get(ResultsRollupState, 1)
+
+
+    def record_coverage(covered_to, rolled_at):
+        """
+        Record that every day up to covered_to is rolled up.
+
+        Args:
+            covered_to (date)
+            rolled_at (datetime): database time at the start of the run
+        """
+
+        stmt = insert(ResultsRollupState).values(id=1, covered_to=covered_to, rolled_at=rolled_at)
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=[ResultsRollupState.id],
+            set_={"covered_to": stmt.excluded.covered_to, "rolled_at": stmt.excluded.rolled_at},
+        ))
+        db.session.commit()
+
+
+    def _filtered(filterset, min_d, max_d, *columns):
+        stmt = select(*columns).where(
+            and_(ResultsDailyRollup.date >= min_d, ResultsDailyRollup.date <= max_d)
+        )
+        for field in ROLLUP_FIELDS:
+            vals = filterset.get(field) or []
+            if vals:
+                stmt = stmt.where(getattr(ResultsDailyRollup, field).in_(vals))
+
+        buckets = _age_buckets(filterset)
+        if buckets is not None:
+            stmt = stmt.where(ResultsDailyRollup.age_bucket.between(*buckets))
+        return stmt
+
+
+    def count_statement(filterset, i, min_d, max_d):
+        """
+        Returns:
+            Select: one row (fs, n)
+        """
+
+        return RollupsController._filtered(
+            filterset, min_d, max_d,
+            literal(i, Integer).label("fs"),
+            func.coalesce(func.sum(ResultsDailyRollup.n), 0).label("n"),
+        )
+
+
+    def aggregate_statement(filterset, i, min_d, max_d):
+        """
+        Returns:
+            Select: one row (fs, n, sums, hist) with position-wise array sums
+        """
+
+        sub = RollupsController._filtered(
+            filterset, min_d, max_d,
+            ResultsDailyRollup.n, ResultsDailyRollup.score_sums, ResultsDailyRollup.answer_counts,
+        ).cte(f"rolled_{i}")
+
+        return select(
+            literal(i, Integer).label("fs"),
+            select(func.coalesce(func.sum(sub.c.n), 0)).scalar_subquery().label("n"),
+            _elementwise_sum(sub, sub.c.score_sums).label("sums"),
+            _elementwise_sum(sub, sub.c.answer_counts).label("hist"),
+        )
+
+
+    def rollup_days(start, end, chunk_size=5000):
+        """
+        Recompute rollup rows for start <= date <= end, replacing existing rows for those days.
+
+        Results are streamed in chunks and folded into per-group accumulators, so memory scales
+        with the number of groups rather than the number of results.
+
+        Args:
+            start (date), end (date)
+            chunk_size (int): result rows fetched per round trip
+
+        Returns:
+            tuple[int, int]: (results rolled up, rollup rows written)
+        """
+
+        # Imported here: ResultsController imports this module
+        from application.controllers.results import _answers_to_array
+
+        groups = {}
+        n_results = 0
+        counts = np.zeros(0, dtype=np.int64)
+        sums = np.zeros((0, len(SCORE_AXES)))
+        hist = np.zeros((0, ANSWER_SLOTS), dtype=np.int64)
+
+        stmt = (
+            select(Results.date, Results.demographics, Results.scores, Results.answers)
+            .where(and_(Results.date >= start, Results.date <= end))
+            .execution_options(yield_per=chunk_size)
+        )
+
+        for chunk in db.session.execute(stmt).partitions():
+            keys, scores, answers = [], [], []
+            for day, demographics, row_scores, row_answers in chunk:
+                demographics = demographics or {}
+                key = (
+                    day,
+                    *(demographics.get(f) if isinstance(demographics.get(f), str) else "" for f in ROLLUP_FIELDS),
+                    _age_bucket(demographics.get("age")),
+                )
+                keys.append(groups.setdefault(key, len(groups)))
+                scores.append([float(row_scores.get(axis) or 0.0) for axis in SCORE_AXES])
+                answers.append([-9 if a is None else a for a in _answers_to_array(row_answers)])
+
+            n_groups = len(groups)
+            if n_groups > len(counts):
+                grow = n_groups - len(counts)
+                counts = np.concatenate([counts, np.zeros(grow, dtype=np.int64)])
+                sums = np.vstack([sums, np.zeros((grow, len(SCORE_AXES)))])
+                hist = np.vstack([hist, np.zeros((grow, ANSWER_SLOTS), dtype=np.int64)])
+
+            g = np.array(keys, dtype=np.int64)
+            answers_mat = np.array(answers, dtype=np.int64)
+
+            counts += np.bincount(g, minlength=n_groups)
+            np.add.at(sums, g, np.array(scores, dtype=np.float64))
+
+            # Histogram slot per (row, question); unanswered/invalid answers are dropped
+            valid = (answers_mat >= -2) & (answers_mat <= 2)
+            slots = np.arange(answers_mat.shape[1]) * 5 + answers_mat + 2
+            flat = (g[:, None] * ANSWER_SLOTS + slots)[valid]
+            hist += np.bincount(flat, minlength=n_groups * ANSWER_SLOTS).reshape(n_groups, ANSWER_SLOTS)
+
+            n_results += len(keys)
+
+        columns = ["date", *ROLLUP_FIELDS, "age_bucket"]
+        rows = [
+            {
+                **dict(zip(columns, key)),
+                "n": int(counts[idx]),
+                "score_sums": sums[idx].tolist(),
+                "answer_counts": hist[idx].tolist(),
+            }
+            for key, idx in groups.items()
+        ]
+
+        with db.engine.begin() as conn:
+            conn.execute(
+                ResultsDailyRollup.__table__.delete()
+                .where(and_(ResultsDailyRollup.date >= start, ResultsDailyRollup.date <= end))
+            )
+            for i in range(0, len(rows), 1000):
+                conn.execute(insert(ResultsDailyRollup), rows[i:i + 1000])
+
+        return n_results, len(rows)
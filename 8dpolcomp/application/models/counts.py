@@ -0,0 +1,20 @@
+from application import db
+
+from sqlalchemy.dialects.postgresql import DATE
+
+
+class ResultCounts(db.Model):
+    """
+    Per-day result counts for single demographic values, maintained by ResultsController.add_result
+    and rebuilt by `python jobs.py rebuild_counts`.
+
+    field is "total" (value ""), "age" (value is the age as text), "identities" (one row per
+    identity held) or one of country, religion, ethnicity, education, party.
+    """
+
+    __tablename__ = "result_counts"
+
+    date = db.Column(DATE, primary_key=True)
+    field = db.Column(db.Text, primary_key=True)
+    value = db.Column(db.Text, primary_key=True)
+    n = db.Column(db.Integer, nullable=False, server_default=db.text("0"))
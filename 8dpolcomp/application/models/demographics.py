@@ -0,0 +1,16 @@
+from application import db
+
+
+class DemographicCodes(db.Model):
+    """
+    Dictionary encoding for categorical demographics stored on Results as small ints.
+    field is one of: country, religion, ethnicity, education, party, identities.
+    """
+
+    id = db.Column(db.SmallInteger, primary_key=True, autoincrement=True)
+    field = db.Column(db.Text, nullable=False)
+    value = db.Column(db.Text, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint("field", "value", name="uq_demographic_codes_field_value"),
+    )
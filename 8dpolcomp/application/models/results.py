@@ -1,8 +1,7 @@
-
 from application import db
 from datetime import datetime, timezone
 
-from sqlalchemy.dialects.postgresql import JSONB, DATE, UUID
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, DATE, REAL, TIMESTAMP, UUID
 
 
 class Results(db.Model):
@@ -13,3 +12,48 @@ class Results(db.Model):
     scores = db.Column(JSONB, nullable=False)
     answers = db.Column(JSONB, nullable=False)
     how_found = db.Column(db.Text, nullable=True)
+
+    # Compact copies of answers (question ids 1..100 in order) and scores (SCORE_AXES order).
+    # Dual-written with the JSONB columns, backfilled by `python jobs.py backfill_arrays`.
+    answers_arr = db.Column(ARRAY(db.SmallInteger), nullable=True)
+    scores_arr = db.Column(ARRAY(REAL), nullable=True)
+    # Uniform random key for index-backed sampling (see ResultsController._random_window)
+    sample_rank = db.Column(db.Float, nullable=False, server_default=db.text("random()"), index=True)
+    # Set by the inserting transaction. Serial ids are not assigned in commit order, so jobs that fold
+    # in new results key on this instead (see get_identity_sums); replayed write-behind spills get the replay time
+    inserted_at = db.Column(TIMESTAMP(timezone=True), nullable=False, server_default=db.text("now()"))
+    # When the result was submitted, kept through write-behind spills; "recent" order sorts on it
+    submitted_at = db.Column(TIMESTAMP(timezone=True), nullable=False, server_default=db.text("now()"))
+
+    # Typed copies of demographics for integer filtering. Kept in sync by ResultsController.add_result,
+    # backfilled by `python jobs.py backfill_demographics`. Categorical values reference DemographicCodes.
+    age = db.Column(db.SmallInteger, nullable=True)
+    country_id = db.Column(db.SmallInteger, db.ForeignKey("demographic_codes.id"), nullable=True)
+    religion_id = db.Column(db.SmallInteger, db.ForeignKey("demographic_codes.id"), nullable=True)
+    ethnicity_id = db.Column(db.SmallInteger, db.ForeignKey("demographic_codes.id"), nullable=True)
+    education_id = db.Column(db.SmallInteger, db.ForeignKey("demographic_codes.id"), nullable=True)
+    party_id = db.Column(db.SmallInteger, db.ForeignKey("demographic_codes.id"), nullable=True)
+    identity_ids = db.Column(ARRAY(db.SmallInteger), nullable=True)
+
+    # Expressions must match ResultsController._apply_filterset exactly for the planner to use them.
+    # Applied to existing databases by `python jobs.py migrate`.
+    __table_args__ = (
+        db.Index("ix_results_date", date),
+        db.Index("ix_results_group_id", group_id),
+        db.Index("ix_results_inserted_at", inserted_at, id),
+        db.Index("ix_results_submitted_at", submitted_at, id),
+        db.Index("ix_results_demo_country", demographics["country"].astext),
+        db.Index("ix_results_demo_religion", demographics["religion"].astext),
+        db.Index("ix_results_demo_ethnicity", demographics["ethnicity"].astext),
+        db.Index("ix_results_demo_education", demographics["education"].astext),
+        db.Index("ix_results_demo_party", demographics["party"].astext),
+        db.Index("ix_results_demo_age", db.cast(demographics["age"].astext, db.Integer)),
+        db.Index("ix_results_demo_identities", demographics["identities"], postgresql_using="gin"),
+        db.Index("ix_results_age", age),
+        db.Index("ix_results_country_id", country_id),
+        db.Index("ix_results_religion_id", religion_id),
+        db.Index("ix_results_ethnicity_id", ethnicity_id),
+        db.Index("ix_results_education_id", education_id),
+        db.Index("ix_results_party_id", party_id),
+        db.Index("ix_results_identity_ids", identity_ids, postgresql_using="gin"),
+    )
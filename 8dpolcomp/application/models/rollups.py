@@ -0,0 +1,43 @@
+from application import db
+
+from sqlalchemy.dialects.postgresql import ARRAY, DATE, DOUBLE_PRECISION, TIMESTAMP
+
+
+class ResultsDailyRollup(db.Model):
+    """
+    Per-day aggregates of Results for each (country, religion, education, ethnicity, party, age bucket)
+    slice. Maintained by `python jobs.py rollup_results` for closed days; see RollupsController.
+
+    Missing categorical values are stored as "" and unknown ages as age_bucket -1.
+    """
+
+    __tablename__ = "results_daily_rollup"
+
+    date = db.Column(DATE, primary_key=True)
+    country = db.Column(db.Text, primary_key=True)
+    religion = db.Column(db.Text, primary_key=True)
+    education = db.Column(db.Text, primary_key=True)
+    ethnicity = db.Column(db.Text, primary_key=True)
+    party = db.Column(db.Text, primary_key=True)
+    age_bucket = db.Column(db.SmallInteger, primary_key=True)
+
+    n = db.Column(db.Integer, nullable=False)
+    # Per-axis sum of Results.scores, in SCORE_AXES order
+    score_sums = db.Column(ARRAY(DOUBLE_PRECISION), nullable=False)
+    # Answer histogram: answer_counts[(question_id - 1) * 5 + answer + 2]
+    answer_counts = db.Column(ARRAY(db.Integer), nullable=False)
+
+
+class ResultsRollupState(db.Model):
+    """
+    Single-row coverage record for ResultsDailyRollup. Written by `python jobs.py rollup_results
+    --full` and advanced by later runs only while coverage stays contiguous, so every day up to
+    covered_to is rolled up. Without a row, rollups are not used for queries.
+    """
+
+    __tablename__ = "results_rollup_state"
+
+    id = db.Column(db.SmallInteger, primary_key=True, default=1)
+    covered_to = db.Column(DATE, nullable=False)
+    # Database time at the start of the last run
+    rolled_at = db.Column(TIMESTAMP(timezone=True), nullable=False)
@@ -7,6 +7,8 @@ let _applyXHR = null;
 
 const _SAMPLE_MIN = 1;
 const _SAMPLE_MAX = 2500;
+const _DENSITY_MIN_SAMPLE = 1000;
+const _DENSITY_GRID_SIZE = 50;
 
 function _escapeHtml(s) {
     return String(s || "")
@@ -493,6 +495,16 @@ function _build_filter_payload() {
     data["min-date"] = dates.minDate;
     data["max-date"] = dates.maxDate;
 
+    // Pre-binned histograms, matching histogram.js
+    data["histogram-bins"] = hist_bins;
+    data["histogram-invert"] = hist_invert_axes;
+
+    // Large samples are drawn as a fixed-size density grid rather than one point per result
+    if (data.limit > _DENSITY_MIN_SAMPLE) {
+        data["density"] = "grid";
+        data["density-size"] = _DENSITY_GRID_SIZE;
+    }
+
     for (const filterset_div of filterset_divs) {
         j += 1;
         let filterset = {};
@@ -535,26 +547,109 @@ function _build_filter_payload() {
     return data;
 }
 
+// Decode the binary /api/data response (see application/utils/wire.py) into the same
+// dataset objects as the JSON form
+function _decode_packed_datasets(buffer) {
+    const view = new DataView(buffer);
+    const text = new TextDecoder("utf-8");
+
+    if (text.decode(new Uint8Array(buffer, 0, 4)) !== "PCD1") {
+        throw new Error("Unknown data encoding.");
+    }
+
+    let offset = 4;
+    const readJson = () => {
+        const len = view.getUint32(offset, true);
+        const obj = JSON.parse(text.decode(new Uint8Array(buffer, offset + 4, len)));
+        offset += 4 + len;
+        return obj;
+    };
+
+    const header = readJson();
+    const axes = header.axes;
+    const labels = header.answer_labels;
+    const out = [];
+
+    while (offset < buffer.byteLength) {
+        const ds = readJson();
+
+        const scores = new Float32Array(buffer, offset, ds.n * axes.length);
+        offset += scores.byteLength;
+        ds.all_scores = new Array(ds.n);
+        for (let i = 0; i < ds.n; i++) {
+            const row = {};
+            for (let j = 0; j < axes.length; j++) {
+                // Back to the 2 dp the JSON form carries
+                row[axes[j]] = Math.round(scores[i * axes.length + j] * 100) / 100;
+            }
+            ds.all_scores[i] = row;
+        }
+
+        const counts = new Uint32Array(buffer, offset, 100 * labels.length);
+        offset += counts.byteLength;
+        ds.raw_answer_counts = {};
+        ds.answer_counts = {};
+        for (let q = 0; q < 100; q++) {
+            const raw = {};
+            let max = 0;
+            for (let k = 0; k < labels.length; k++) {
+                raw[labels[k]] = counts[q * labels.length + k];
+                max = Math.max(max, raw[labels[k]]);
+            }
+            const scaled = {};
+            for (const label of labels) scaled[label] = raw[label] / (max || 1);
+            ds.raw_answer_counts[String(q + 1)] = raw;
+            ds.answer_counts[String(q + 1)] = scaled;
+        }
+
+        delete ds.n;
+        out.push(ds);
+    }
+    return out;
+}
+
 function _run_apply_filters(data) {
     if (!data) return;
 
-    if (_applyXHR && _applyXHR.readyState !== 4) {
+    if (_applyXHR) {
         _applyXHR.abort();
     }
+    const controller = new AbortController();
+    _applyXHR = controller;
 
     show_spinner();
 
-    _applyXHR = $.ajax({
-        type: "POST",
-        contentType: "application/json",
-        data: JSON.stringify({
+    fetch("/api/data", {
+        method: "POST",
+        headers: {
+            "Content-Type": "application/json",
+            "Accept": "application/octet-stream, application/json;q=0.5"
+        },
+        body: JSON.stringify({
             "data": data
         }),
-        url: "/api/data",
-        success: async function (req) {
+        signal: controller.signal
+    })
+        .then(async function (resp) {
+            if (!resp.ok) {
+                let msg = "Error loading data, try again.";
+                try {
+                    msg = (await resp.json()).status || msg;
+                } catch (e) {
+                    // ignore
+                }
+                throw { status: msg };
+            }
+
+            const type = resp.headers.get("Content-Type") || "";
+            const decoded = type.startsWith("application/octet-stream")
+                ? _decode_packed_datasets(await resp.arrayBuffer())
+                : (await resp.json()).compass_datasets;
+
             await sleep(Math.random() * 250 + 500);
+            if (controller.signal.aborted) return;
 
-            datasets = JSON.parse(req).compass_datasets;
+            datasets = decoded;
 
             let hist_axis = $(document).find("#select-histogram").find(":selected").val();
             update_chart_data();
@@ -562,21 +657,18 @@ function _run_apply_filters(data) {
             update_pie(question_id, question_id);
             update_counts();
             hide_spinner();
-        },
-        error: function (xhr) {
-            if (xhr && xhr.statusText === "abort") return;
-
-            let msg = "Error loading data, try again.";
-            try {
-                msg = (xhr.responseText && JSON.parse(xhr.responseText).status) || msg;
-            } catch (e) {
-                // ignore
-            }
+        })
+        .catch(function (err) {
+            if (err && err.name === "AbortError") return;
+
+            let msg = (err && err.status) || "Error loading data, try again.";
             if (typeof show_polcomp_error === "function") {
                 show_polcomp_error(msg);
             }
-        }
-    });
+        })
+        .finally(function () {
+            if (_applyXHR === controller) _applyXHR = null;
+        });
 }
 
 function apply_filters() {
@@ -619,6 +711,11 @@ function set_filterset_color(event) {
         }
     }
 
+    // Density layers carry per-cell colours, so rebuild them
+    if (datasets.some(d => d.custom_id === target_id && d.density)) {
+        update_chart_data();
+    }
+
     let hist_axis = document.getElementById("select-histogram").value;
     update_histogram(hist_axis);
     update_pie(question_id, question_id);
@@ -727,8 +824,11 @@ function get_updated_count(ele) {
             }),
             url: "/api/get_filterset_count",
             success: async function (req) {
-                let counts = JSON.parse(req).counts[0];
-                document.getElementById("count_" + dataset_id).innerText = counts;
+                let res = JSON.parse(req);
+                let counts = res.counts[0];
+                // Estimated counts are prefixed with "~"
+                let approx = res.exact && res.exact[0] === false;
+                document.getElementById("count_" + dataset_id).innerText = (approx ? "~" : "") + counts;
                 ele.classList.remove("disabled-text");
                 spinner.classList.remove("spin-fa-icon");
             },
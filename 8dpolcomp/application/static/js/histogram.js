@@ -1,45 +1,49 @@
+// Axes plotted negated, and the shared bin edges. /api/data bins with the same
+// thresholds when asked ("histogram-bins"), so server and client counts agree.
+const hist_invert_axes = ["diplomacy", "government", "religion", "society"];
+const hist_bins = 20;
+const hist_thresholds = Array.from({ length: hist_bins - 1 }, (_, k) => (2 * (k + 1) - hist_bins) / hist_bins);
 
 // Get list of result values for target axis
-function get_axis_datavalues(axis_name) {
-    let invert_axes = ["diplomacy", "government", "religion", "society"];
+function get_axis_datavalues(axis_name, dataset) {
+    let dataset_axis_data = [];
+    for (data of dataset.all_scores) {
+        if (hist_invert_axes.includes(axis_name)) {
+            dataset_axis_data.push(-data[axis_name]);
+        } else {
+            dataset_axis_data.push(data[axis_name]);
+        }
+    }
+    return dataset_axis_data;
+}
+
+// Per-dataset bin counts for target axis, from server histograms where present
+function get_axis_counts(axis_name) {
+    const hist_generator = d3.bin().domain([-1, 1]).thresholds(hist_thresholds);
 
-    let axis_data = {};
+    let axis_counts = {};
 
     for (dataset of datasets) {
-        let dataset_axis_data = [];
-        for (data of dataset.all_scores) {
-            if (invert_axes.includes(axis_name)) {
-                dataset_axis_data.push(-data[axis_name]);
-            } else {
-                dataset_axis_data.push(data[axis_name]);
-            }
+        const server = dataset.histograms && dataset.histograms[axis_name];
+        if (server && server.length === hist_bins) {
+            axis_counts[dataset.label] = server;
+        } else {
+            axis_counts[dataset.label] = hist_generator(get_axis_datavalues(axis_name, dataset)).map(bin => bin.length);
         }
-        axis_data[dataset.label] = dataset_axis_data;
     }
-    return axis_data;
+    return axis_counts;
 }
 
-// Bin the above values
+// Scale the above counts
 function get_binned_datasets(values) {
     let hist_datasets = [];
-    let hist_labels = [-1];
-    let labels_generated = false;
+    let hist_labels = [-1, ...hist_thresholds, 1];
 
     let propsByFilterset = {};
     let globalMaxProp = 0;
 
     for (const filterset in values) {
-        const hist_generator = d3.bin().domain([-1, 1]).thresholds(20);
-        const bins = hist_generator(values[filterset] || []);
-
-        let counts = [];
-        for (const bin of bins) {
-            if (!labels_generated) {
-                hist_labels.push(bin.x1);
-            }
-            counts.push(bin.length);
-        }
-        labels_generated = true;
+        const counts = values[filterset] || [];
 
         const total = counts.reduce((a, b) => a + b, 0);
         const props = total > 0 ? counts.map(c => c / total) : counts.map(() => 0);
@@ -97,7 +101,7 @@ function create_histogram(axis_name) {
     document.getElementById("hist-label-r").textContent = axis_labels[axis_name][1];
 
     const ctx = document.getElementById('histogram-canvas').getContext("2d");
-    let axis_values = get_axis_datavalues(axis_name);
+    let axis_values = get_axis_counts(axis_name);
     let [hist_labels, hist_datasets] = get_binned_datasets(axis_values);
 
     let histogram = new Chart(ctx, {
@@ -165,7 +169,7 @@ function create_histogram(axis_name) {
 
 // Updates results histogram when an axis is selected
 function update_histogram(axis_name) {
-    let axis_values = get_axis_datavalues(axis_name);
+    let axis_values = get_axis_counts(axis_name);
     let [hist_labels, hist_datasets] = get_binned_datasets(axis_values);
 
     document.getElementById("hist-label-l").textContent = axis_labels[axis_name][0];
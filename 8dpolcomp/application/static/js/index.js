@@ -247,6 +247,86 @@ function _buildDataSamplePayload(key) {
     };
 }
 
+// Precomputed homepage samples (refreshed by the snapshot_index job), fetched once
+let index_snapshot = null;
+
+// The job runs hourly; older snapshots mean it has stopped, so query live instead
+const index_snapshot_max_age_ms = 6 * 60 * 60 * 1000;
+
+function _loadIndexSnapshot() {
+    if (!index_snapshot) {
+        index_snapshot = fetch("/api/snapshots/index")
+            .then(resp => (resp.ok ? resp.json() : null))
+            .catch(() => null);
+    }
+    return index_snapshot;
+}
+
+function _sampleFromSnapshot(snapshot, key) {
+    if (!snapshot || !snapshot.samples || !Array.isArray(snapshot.axes)) return null;
+
+    // Missing or unparseable "generated" counts as stale
+    const generated = Date.parse(snapshot.generated);
+    if (!(Date.now() - generated < index_snapshot_max_age_ms)) return null;
+
+    const sample = snapshot.samples[key];
+    if (!sample || !Array.isArray(sample.scores)) return null;
+
+    // Rows are stored in snapshot.axes order
+    const axes = snapshot.axes;
+    const scores = sample.scores.map(row => {
+        const s = {};
+        axes.forEach((ax, j) => { s[ax] = row[j]; });
+        return s;
+    });
+
+    return {
+        scores: scores,
+        count: Number(sample.count || scores.length || 0),
+        mean: (sample.mean && Object.keys(sample.mean).length) ? sample.mean : _meanFromScores(scores)
+    };
+}
+
+function _applyDataSample(key, scores, count, mean) {
+    const cfg = data_samples[key];
+
+    cfg.scores = scores;
+    cfg.count = count;
+    cfg.mean = mean;
+
+    if (!key_vals || typeof key_vals !== "object") key_vals = {};
+    key_vals[key] = cfg.mean;
+
+    cfg.loaded = true;
+    cfg.loading = false;
+
+    if (current_key === key) {
+        _setDataCloudVisible(true, key);
+        _updateMarkerForQuadrants(quadrants, cfg.mean);
+        _updateMarkerForQuadrants(quadrants_sample, cfg.mean);
+    }
+}
+
+function _failDataSample(key) {
+    const cfg = data_samples[key];
+
+    cfg.loaded = false;
+    cfg.loading = false;
+
+    if (current_key === key) {
+        _setDataCloudVisible(false, key);
+    }
+}
+
+async function _finishDataSampleLoad(start) {
+    const minDuration = 500 + Math.random() * 250;
+    const elapsed = Date.now() - start;
+    const wait = Math.max(0, minDuration - elapsed);
+    await _sleep(wait);
+
+    if (typeof hide_spinner === "function") hide_spinner();
+}
+
 function load_data_sample(key) {
     if (!_isDataSample(key)) return;
 
@@ -258,6 +338,22 @@ function load_data_sample(key) {
     const start = Date.now();
     if (typeof show_spinner === "function") show_spinner();
 
+    _loadIndexSnapshot().then(snapshot => {
+        const sample = _sampleFromSnapshot(snapshot, key);
+        if (sample) {
+            _applyDataSample(key, sample.scores, sample.count, sample.mean);
+            _finishDataSampleLoad(start);
+            return;
+        }
+
+        // Snapshot missing or stale: fall back to a live query
+        _loadDataSampleFromApi(key, start);
+    });
+}
+
+function _loadDataSampleFromApi(key, start) {
+    const cfg = data_samples[key];
+
     $.ajax({
         type: "POST",
         contentType: "application/json",
@@ -280,54 +376,21 @@ function load_data_sample(key) {
                 const ds = cds.find(d => d && Array.isArray(d.all_scores));
                 if (!ds) throw new Error("No dataset returned.");
 
-                cfg.scores = Array.isArray(ds.all_scores) ? ds.all_scores : [];
-                cfg.count = Number(ds.count || cfg.scores.length || 0);
-
-                cfg.mean = (ds.mean_scores && typeof ds.mean_scores === "object")
+                const scores = Array.isArray(ds.all_scores) ? ds.all_scores : [];
+                const mean = (ds.mean_scores && typeof ds.mean_scores === "object")
                     ? ds.mean_scores
-                    : _meanFromScores(cfg.scores);
-
-                if (!key_vals || typeof key_vals !== "object") key_vals = {};
-                key_vals[key] = cfg.mean;
-
-                cfg.loaded = true;
-                cfg.loading = false;
+                    : _meanFromScores(scores);
 
-                if (current_key === key) {
-                    _setDataCloudVisible(true, key);
-                    _updateMarkerForQuadrants(quadrants, cfg.mean);
-                    _updateMarkerForQuadrants(quadrants_sample, cfg.mean);
-                }
+                _applyDataSample(key, scores, Number(ds.count || scores.length || 0), mean);
             } catch (e) {
-                cfg.loaded = false;
-                cfg.loading = false;
-
-                if (current_key === key) {
-                    _setDataCloudVisible(false, key);
-                }
+                _failDataSample(key);
             }
 
-            const minDuration = 500 + Math.random() * 250;
-            const elapsed = Date.now() - start;
-            const wait = Math.max(0, minDuration - elapsed);
-            await _sleep(wait);
-
-            if (typeof hide_spinner === "function") hide_spinner();
+            await _finishDataSampleLoad(start);
         },
         error: async function () {
-            cfg.loaded = false;
-            cfg.loading = false;
-
-            if (current_key === key) {
-                _setDataCloudVisible(false, key);
-            }
-
-            const minDuration = 500 + Math.random() * 250;
-            const elapsed = Date.now() - start;
-            const wait = Math.max(0, minDuration - elapsed);
-            await _sleep(wait);
-
-            if (typeof hide_spinner === "function") hide_spinner();
+            _failDataSample(key);
+            await _finishDataSampleLoad(start);
         }
     });
 }
@@ -107,6 +107,39 @@ function _dataset_count(ds) {
     return 0;
 }
 
+// Server-side density cells for this quadrant's axis pair, if the dataset carries them
+function _density_cells(dataset, quadrant, quadrants_obj) {
+    if (!dataset || !dataset.density || !dataset.density.cells) {
+        return null;
+    }
+    return dataset.density.cells[quadrants_obj[quadrant].x + "-" + quadrants_obj[quadrant].y] || null;
+}
+
+// One square per non-empty grid cell, opacity scaled by count, so the drawn size is fixed
+function get_density_layer(dataset, cells) {
+    const size = dataset.density.size;
+    const step = 2 / size;
+    const max = cells.reduce((m, c) => Math.max(m, c[2]), 0) || 1;
+
+    let data_values = [];
+    let colors = [];
+    for (const [x, y, n] of cells) {
+        data_values.push({ x: -1 + (x + 0.5) * step, y: -1 + (y + 0.5) * step });
+        colors.push(add_transparency(dataset.color, 0.15 + 0.75 * Math.sqrt(n / max)));
+    }
+
+    return {
+        pointRadius: ctx => (ctx.chart.chartArea ? ctx.chart.chartArea.width / size / 2 : 1),
+        pointBackgroundColor: colors,
+        pointStyle: "rect",
+        pointBorderWidth: 0,
+        data: data_values,
+        label: dataset.label,
+        dataset_id: (dataset.custom_dataset === true) ? dataset.custom_id : null,
+        borderWidth: { bottom: 0, top: 1, left: 1, right: 1 }
+    };
+}
+
 // Create list of datasets to display on chart
 function get_pc_data(quadrant, quadrants_obj) {
     let pc_data = {
@@ -171,6 +204,12 @@ function get_pc_data(quadrant, quadrants_obj) {
 
     // All scores displayed under
     for (const dataset of sorted_all) {
+        const cells = _density_cells(dataset, quadrant, quadrants_obj);
+        if (cells) {
+            pc_data.datasets.push(get_density_layer(dataset, cells));
+            continue;
+        }
+
         let data_values = [];
         const count = _dataset_count(dataset);
         let [transparency, radius] = calc_point_props(dataset, count);
@@ -0,0 +1,231 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from uuid import UUID
+
+
+logger = logging.getLogger(__name__)
+
+
+# Filterset keys whose values are unordered sets of filter values
+_SET_KEYS = ("group-ids", "country", "religion", "ethnicity", "education", "party", "identities")
+
+
+def _canonical(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    return value
+
+
+def filter_cache_key(filter_data, namespace="data"):
+    """
+    Hash a validated FilterDataModel dump into a stable cache key.
+
+    Filter value lists are sorted and dates resolved to ISO strings, so equivalent requests
+    share a key. Filterset order, labels and colours are kept since they shape the response.
+
+    Args:
+        filter_data (dict): FilterDataModel.model_dump(by_alias=True)
+        namespace (str): key prefix, e.g. the endpoint
+
+    Returns:
+        str
+    """
+
+    canonical = _canonical(filter_data)
+    for filterset in canonical.get("filtersets", []):
+        for key in _SET_KEYS:
+            if isinstance(filterset.get(key), list):
+                filterset[key] = sorted(set(filterset[key]))
+
+    digest = hashlib.sha256(
+        json.dumps(canonical, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    ).hexdigest()
+    return f"{namespace}:{digest}"
+
+
+class _LocalBackend:
+    """
+    In-process LRU with per-entry expiry. Not shared between workers, so it holds no generation
+    counter: an insert on one worker could not invalidate the others.
+    """
+
+    shared = False
+
+    def __init__(self, max_entries):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._max_entries = max_entries
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class _RedisBackend:
+    """
+    Redis (or compatible) backend shared by all workers. Eviction is left to the server's
+    maxmemory policy; the generation counter lives in Redis so inserts on any worker invalidate.
+    """
+
+    shared = True
+
+    def __init__(self, url, prefix):
+        import redis
+
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self._prefix = prefix
+
+    def get(self, key):
+        value = self._client.get(self._prefix + key)
+        return value.decode("utf-8") if value is not None else None
+
+    def set(self, key, value, ttl):
+        self._client.set(self._prefix + key, value.encode("utf-8"), ex=max(1, int(ttl)))
+
+    def clear(self):
+        keys = list(self._client.scan_iter(match=self._prefix + "*"))
+        if keys:
+            self._client.delete(*keys)
+
+    def generation(self):
+        return int(self._client.get(self._prefix + "generation") or 0)
+
+    def bump_generation(self):
+        self._client.incr(self._prefix + "generation")
+
+
+class ResponseCache:
+    """
+    Cache for serialised API responses and rendered pages.
+
+    Entries stored under generation-scoped keys are invalidated when bump_generation() is called
+    (on every new result); others expire by TTL only. Generation-scoped entries need the shared
+    Redis backend: with the in-process backend they are not cached at all, since an insert on one
+    worker could not invalidate the rest. Backend errors are logged and treated as misses so a
+    cache outage never fails a request. Disabled until configured.
+    """
+
+    def __init__(self):
+        self._backend = None
+        self._ttl = 0
+
+    def configure(self, config, prefix="DATA_CACHE"):
+        """
+        Set up the backend from app config: <prefix>_SIZE (entries, 0 disables), <prefix>_TTL
+        (seconds) and optional <prefix>_REDIS_URL.
+        """
+
+        size = int(config.get(f"{prefix}_SIZE") or 0)
+        self._ttl = int(config.get(f"{prefix}_TTL") or 0)
+        self._backend = None
+
+        if size <= 0 or self._ttl <= 0:
+            return
+
+        redis_url = config.get(f"{prefix}_REDIS_URL")
+        if redis_url:
+            try:
+                self._backend = _RedisBackend(redis_url, prefix=f"polcomp:{prefix.lower()}:")
+                return
+            except ImportError:
+                logger.warning("[ResponseCache] redis package not installed; using in-process cache")
+
+        self._backend = _LocalBackend(size)
+
+
+    @property
+    def enabled(self):
+        return self._backend is not None
+
+
+    def _scoped(self, key, generational):
+        if generational:
+            return f"{key}:g{self._backend.generation()}"
+        return key
+
+
+    def get(self, key, generational=False):
+        """
+        Returns:
+            str | None: cached value, or None on miss
+        """
+
+        if self._backend is None or (generational and not self._backend.shared):
+            return None
+        try:
+            return self._backend.get(self._scoped(key, generational))
+        except Exception:
+            logger.exception("[ResponseCache] get failed")
+            return None
+
+
+    def set(self, key, value, generational=False):
+        """
+        Args:
+            key (str)
+            value (str): serialised response
+            generational (bool): invalidate on the next bump_generation(); skipped without Redis
+        """
+
+        if self._backend is None or (generational and not self._backend.shared):
+            return
+        try:
+            self._backend.set(self._scoped(key, generational), value, self._ttl)
+        except Exception:
+            logger.exception("[ResponseCache] set failed")
+
+
+    def bump_generation(self):
+        """
+        Invalidate all generation-scoped entries, e.g. after a result insert.
+        """
+
+        if self._backend is None or not self._backend.shared:
+            return
+        try:
+            self._backend.bump_generation()
+        except Exception:
+            logger.exception("[ResponseCache] bump_generation failed")
+
+
+    def clear(self):
+        if self._backend is None:
+            return
+        try:
+            self._backend.clear()
+        except Exception:
+            logger.exception("[ResponseCache] clear failed")
+
+
+data_cache = ResponseCache()
+results_page_cache = ResponseCache()
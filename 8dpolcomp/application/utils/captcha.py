@@ -0,0 +1,267 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+logger = logging.getLogger(__name__)
+
+
+class CaptchaUnavailable(Exception):
+    """
+    Verification could not be completed (network error, bad response, open breaker or too many
+    verifications in flight). The caller should answer 503, not treat the captcha as failed.
+    """
+
+
+class _CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures and rejects calls for `cooldown` seconds.
+    After the cooldown one trial call is let through; its outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, threshold, cooldown):
+        self._lock = threading.Lock()
+        self._threshold = threshold
+        self._cooldown = cooldown
+        self._failures = 0
+        self._opened_at = None
+        self._trial = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self._cooldown:
+                return "half-open"
+            return "open"
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self._cooldown or self._trial:
+                return False
+            self._trial = True
+            return True
+
+    def record(self, ok):
+        with self._lock:
+            if ok:
+                if self._opened_at is not None:
+                    logger.info("[CaptchaVerifier] Circuit closed")
+                self._failures = 0
+                self._opened_at = None
+            else:
+                self._failures += 1
+                if self._trial or (self._opened_at is None and self._failures >= self._threshold):
+                    logger.warning("[CaptchaVerifier] Circuit opened after %d failures", self._failures)
+                    self._opened_at = time.monotonic()
+            self._trial = False
+
+
+class CaptchaVerifier:
+    """
+    hCaptcha siteverify client shared by all requests in the process.
+
+    Connections are kept alive in a pooled session, every attempt is bounded by a short timeout
+    and the whole call by a deadline, and a circuit breaker fails fast while hCaptcha is down, so
+    a slow provider cannot hold WSGI workers for long. Disabled until configured.
+    """
+
+    def __init__(self):
+        self._session = None
+        self._breaker = None
+        self._slots = None
+        self._url = None
+        self._secret = None
+        self._timeout = 0
+        self._deadline = 0
+        self._retries = 0
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=1000)
+        self._counters = {}
+
+    def configure(self, config):
+        """
+        Set up from app config: HCAPTCHA_VERIFY_URL, HCAPTCHA_SECRET_KEY, HCAPTCHA_TIMEOUT
+        (seconds per attempt), HCAPTCHA_DEADLINE (seconds per verification), HCAPTCHA_RETRIES,
+        HCAPTCHA_POOL_SIZE (keep-alive connections and concurrent verifications),
+        HCAPTCHA_BREAKER_THRESHOLD and HCAPTCHA_BREAKER_COOLDOWN (seconds).
+        """
+
+        if self._session is not None:
+            self._session.close()
+
+        self._url = config.get("HCAPTCHA_VERIFY_URL")
+        self._secret = config.get("HCAPTCHA_SECRET_KEY")
+        self._timeout = float(config.get("HCAPTCHA_TIMEOUT") or 3)
+        self._deadline = float(config.get("HCAPTCHA_DEADLINE") or 6)
+        self._retries = int(config.get("HCAPTCHA_RETRIES", 1))
+        pool_size = int(config.get("HCAPTCHA_POOL_SIZE") or 10)
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        self._session = session
+
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._breaker = _CircuitBreaker(
+            threshold=int(config.get("HCAPTCHA_BREAKER_THRESHOLD") or 5),
+            cooldown=float(config.get("HCAPTCHA_BREAKER_COOLDOWN") or 30),
+        )
+        self._latencies.clear()
+        self._counters = {
+            "attempts": 0, "errors": 0, "verified": 0, "rejected": 0,
+            "breaker_open": 0, "saturated": 0,
+        }
+
+
+    @property
+    def enabled(self):
+        return self._session is not None and bool(self._url) and bool(self._secret)
+
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+
+    def _attempt(self, data, attempt, timeout):
+        start = time.perf_counter()
+        try:
+            resp = self._session.post(self._url, data=data, timeout=timeout)
+
+            if resp.status_code != 200:
+                logger.warning(
+                    "[CaptchaVerifier] verify non-200 (attempt %s): status=%s ct=%r body=%r",
+                    attempt,
+                    resp.status_code,
+                    resp.headers.get("Content-Type"),
+                    (resp.text or "")[:200],
+                )
+                raise requests.HTTPError(f"Non-200 from hCaptcha: {resp.status_code}")
+
+            try:
+                verify_response = resp.json()
+            except ValueError as e:
+                logger.warning(
+                    "[CaptchaVerifier] verify invalid JSON (attempt %s): ct=%r body=%r err=%r",
+                    attempt,
+                    resp.headers.get("Content-Type"),
+                    (resp.text or "")[:200],
+                    e,
+                )
+                raise
+
+            if not isinstance(verify_response, dict):
+                logger.warning("[CaptchaVerifier] verify response missing/invalid: %r", verify_response)
+                raise ValueError("hCaptcha response is not an object")
+
+            return verify_response
+
+        finally:
+            latency = time.perf_counter() - start
+            with self._lock:
+                self._counters["attempts"] += 1
+                self._latencies.append(latency)
+            logger.debug("[CaptchaVerifier] attempt %s took %.3fs", attempt, latency)
+
+
+    def verify(self, token, remoteip=None):
+        """
+        Verify a captcha token.
+
+        Args:
+            token (str): h-captcha-response from the client
+            remoteip (str | None): optional client IP
+
+        Returns:
+            dict: siteverify response; check its "success" key
+
+        Raises:
+            CaptchaUnavailable: if verification could not be completed
+        """
+
+        if not self.enabled:
+            raise CaptchaUnavailable("hCaptcha is not configured")
+
+        # Bound how many workers can wait on hCaptcha at once
+        if not self._slots.acquire(timeout=self._timeout):
+            self._count("saturated")
+            raise CaptchaUnavailable("Too many captcha verifications in flight")
+
+        try:
+            if not self._breaker.allow():
+                self._count("breaker_open")
+                raise CaptchaUnavailable("hCaptcha circuit open")
+
+            data = {"secret": self._secret, "response": token}
+            if remoteip:
+                data["remoteip"] = remoteip
+
+            deadline = time.monotonic() + self._deadline
+            verify_response = None
+            last_error = None
+
+            try:
+                for attempt in range(1, self._retries + 2):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        verify_response = self._attempt(data, attempt, min(self._timeout, remaining))
+                        break
+                    except (requests.RequestException, ValueError) as e:
+                        self._count("errors")
+                        last_error = e
+            finally:
+                self._breaker.record(verify_response is not None)
+
+            if verify_response is None:
+                raise CaptchaUnavailable(f"hCaptcha verification failed: {last_error!r}")
+
+            self._count("verified" if verify_response.get("success") else "rejected")
+            return verify_response
+
+        finally:
+            self._slots.release()
+
+
+    async def verify_async(self, token, remoteip=None):
+        """
+        Async variant of verify() for async views and workers. Runs on the default executor so
+        it shares the connection pool, breaker and metrics with verify().
+        """
+
+        return await asyncio.to_thread(self.verify, token, remoteip)
+
+
+    def stats(self):
+        """
+        Returns:
+            dict: counters, breaker state and attempt latency percentiles (seconds) over the
+            last 1000 attempts
+        """
+
+        with self._lock:
+            stats = dict(self._counters)
+            latencies = sorted(self._latencies)
+
+        def pct(p):
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))] if latencies else None
+
+        stats["breaker"] = self._breaker.state if self._breaker is not None else "closed"
+        stats["latency_p50"] = pct(0.50)
+        stats["latency_p95"] = pct(0.95)
+        stats["latency_max"] = latencies[-1] if latencies else None
+        return stats
+
+
+captcha_verifier = CaptchaVerifier()
@@ -0,0 +1,152 @@
+import json
+import logging
+import threading
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+
+# Canonical axis order for question weights and computed scores.
+AXES = ["society", "politics", "economics", "state", "diplomacy", "government", "technology", "religion"]
+
+# Score keys as stored in Results.scores, and the column order of Results.scores_arr, exports and
+# the binary wire format. Kept separate from AXES: stored arrays depend on this order.
+SCORE_AXES = ["diplomacy", "economics", "government", "politics", "religion", "society", "state", "technology"]
+
+
+class QuestionCatalogue:
+    """
+    Process-wide, read-through cache of the static Questions table.
+
+    The table only changes between deploys, so it is loaded once (at create_app time, or lazily
+    on first use) and held as NumPy arrays plus ready-made JSON. Call invalidate() after the
+    Questions table is modified to force a reload on next access.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+
+
+    def load(self):
+        """
+        (Re)load the catalogue from the database. Requires an app context.
+
+        Returns:
+            dict: The new snapshot.
+        """
+
+        from application.models.questions import Questions
+
+        with self._lock:
+            qs = Questions.query.order_by(Questions.id).all()
+            if not qs:
+                raise LookupError("Questions table is empty")
+
+            ids = np.array([q.id for q in qs], dtype=np.int64)
+            weights = np.array([[getattr(q, axis) for axis in AXES] for q in qs], dtype=np.float64)
+            max_scores = np.abs(weights).sum(axis=0) * 2
+
+            rows = [
+                {"id": q.id, "text": q.text, **{axis: getattr(q, axis) for axis in AXES}}
+                for q in qs
+            ]
+            texts = [{"id": q.id, "text": q.text} for q in qs]
+
+            snapshot = {
+                "ids": ids,
+                "index": {int(q_id): i for i, q_id in enumerate(ids)},
+                "id_set": frozenset(int(q_id) for q_id in ids),
+                "weights": weights,
+                "max_scores": max_scores,
+                "rows": rows,
+                "columns": ["id", *AXES, "text"],
+                "texts": texts,
+                "texts_json": json.dumps(texts),
+                "scores": {row["id"]: {axis: row[axis] for axis in AXES} for row in rows},
+                "max_scores_dct": {axis: float(max_scores[j]) for j, axis in enumerate(AXES)},
+            }
+
+            # Freeze arrays so callers cannot mutate shared state
+            for key in ("ids", "weights", "max_scores"):
+                snapshot[key].setflags(write=False)
+
+            self._snapshot = snapshot
+
+        logger.info("[QuestionCatalogue] Loaded %d questions", len(ids))
+        return snapshot
+
+
+    def invalidate(self):
+        """
+        Drop the cached snapshot; the next access reloads from the database.
+        """
+
+        with self._lock:
+            self._snapshot = None
+        logger.info("[QuestionCatalogue] Invalidated")
+
+
+    def _get(self, key):
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self.load()
+        return snapshot[key]
+
+
+    @property
+    def loaded(self):
+        return self._snapshot is not None
+
+    @property
+    def ids(self):
+        """np.ndarray[int64] (N,): question ids in weight-matrix row order."""
+        return self._get("ids")
+
+    @property
+    def index(self):
+        """dict[int, int]: question id -> weight-matrix row."""
+        return self._get("index")
+
+    @property
+    def id_set(self):
+        return self._get("id_set")
+
+    @property
+    def weights(self):
+        """np.ndarray[float64] (N, 8): per-question weights in AXES order."""
+        return self._get("weights")
+
+    @property
+    def max_scores(self):
+        """np.ndarray[float64] (8,): maximum attainable absolute score per axis."""
+        return self._get("max_scores")
+
+    @property
+    def max_scores_dct(self):
+        return self._get("max_scores_dct")
+
+    @property
+    def scores(self):
+        return self._get("scores")
+
+    @property
+    def rows(self):
+        return self._get("rows")
+
+    @property
+    def columns(self):
+        return self._get("columns")
+
+    @property
+    def texts(self):
+        return self._get("texts")
+
+    @property
+    def texts_json(self):
+        return self._get("texts_json")
+
+
+catalogue = QuestionCatalogue()
@@ -11,10 +11,76 @@ STATIC_VERSION = os.getenv("STATIC_VERSION", "1")
 SQLALCHEMY_POOL_RECYCLE = os.getenv("SQLALCHEMY_POOL_RECYCLE")
 SQLALCHEMY_TRACK_MODIFICATIONS = os.getenv("SQLALCHEMY_TRACK_MODIFICATIONS", "false").lower() == "true"
 
+# Browser/CDN cache lifetime for precomputed snapshot endpoints (seconds)
+SNAPSHOT_MAX_AGE = int(os.getenv("SNAPSHOT_MAX_AGE", "300"))
+
+# Filter on typed demographic columns instead of JSONB (enable once backfill_demographics has run)
+TYPED_DEMOGRAPHIC_FILTERS = os.getenv("TYPED_DEMOGRAPHIC_FILTERS", "false").lower() == "true"
+
+# Read answers/scores from the compact array columns (enable once backfill_arrays has run)
+ARRAY_RESULT_COLUMNS = os.getenv("ARRAY_RESULT_COLUMNS", "false").lower() == "true"
+
+# Filterset counts from ResultCounts: "off", "exact" or "estimate" (enable once rebuild_counts has run)
+FILTER_COUNTS = os.getenv("FILTER_COUNTS", "off").lower()
+
+# Answer aggregates and counts from ResultsDailyRollup (enable once rollup_results has run)
+ROLLUP_QUERIES = os.getenv("ROLLUP_QUERIES", "false").lower() == "true"
+
+# Postgres statement_timeout (seconds, 0 disables) for "aggregate" mode /api/data queries, which
+# may run over every matching result
+AGGREGATE_STATEMENT_TIMEOUT = float(os.getenv("AGGREGATE_STATEMENT_TIMEOUT", "30"))
+
+# /api/data response cache: max entries (0 disables), lifetime, optional shared Redis backend.
+# Without Redis each worker has its own cache and only seeded "random" responses are cached:
+# "recent" and unlimited aggregates change on every insert, which only Redis can signal to all workers
+DATA_CACHE_SIZE = int(os.getenv("DATA_CACHE_SIZE", "256"))
+DATA_CACHE_TTL = int(os.getenv("DATA_CACHE_TTL", "300"))
+DATA_CACHE_REDIS_URL = os.getenv("DATA_CACHE_REDIS_URL")
+
+# Rendered /results/<id> page cache: max entries (0 disables), lifetime, optional shared Redis backend
+RESULTS_PAGE_CACHE_SIZE = int(os.getenv("RESULTS_PAGE_CACHE_SIZE", "512"))
+RESULTS_PAGE_CACHE_TTL = int(os.getenv("RESULTS_PAGE_CACHE_TTL", "3600"))
+RESULTS_PAGE_CACHE_REDIS_URL = os.getenv("RESULTS_PAGE_CACHE_REDIS_URL")
+
+# Queue new results and insert them in batches on a background thread (see utils/writebehind.py):
+# queue bound, rows per insert, flush interval (seconds), ids reserved per sequence fetch, spill
+# directory for rows that cannot be queued or written (default application/data/spill)
+WRITE_BEHIND = os.getenv("WRITE_BEHIND", "false").lower() == "true"
+WRITE_BEHIND_QUEUE_SIZE = int(os.getenv("WRITE_BEHIND_QUEUE_SIZE", "10000"))
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "500"))
+WRITE_BEHIND_FLUSH_INTERVAL = float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL", "1"))
+WRITE_BEHIND_ID_BLOCK = int(os.getenv("WRITE_BEHIND_ID_BLOCK", "100"))
+WRITE_BEHIND_SPILL_DIR = os.getenv("WRITE_BEHIND_SPILL_DIR")
+
+# JSON encoder for API responses: "auto" (orjson if installed), "orjson" or "json"
+JSON_SERIALISER = os.getenv("JSON_SERIALISER", "auto").lower()
+
+# Compress /api and /results responses in-app (br if the brotli package is installed, else gzip)
+# when no proxy does it: minimum body size (bytes), gzip level, brotli quality
+RESPONSE_COMPRESSION = os.getenv("RESPONSE_COMPRESSION", "false").lower() == "true"
+RESPONSE_COMPRESSION_MIN_SIZE = int(os.getenv("RESPONSE_COMPRESSION_MIN_SIZE", "1024"))
+RESPONSE_GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "6"))
+RESPONSE_BROTLI_QUALITY = int(os.getenv("RESPONSE_BROTLI_QUALITY", "5"))
+
+# /api/export streaming data dump (off by default; `python jobs.py export_results` always works)
+EXPORT_API = os.getenv("EXPORT_API", "false").lower() == "true"
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+# Concurrent /api/export streams per process; each holds a pooled DB connection until done
+EXPORT_MAX_CONCURRENT = int(os.getenv("EXPORT_MAX_CONCURRENT", "2"))
+
 HCAPTCHA_VERIFY_URL = os.getenv("HCAPTCHA_VERIFY_URL")
 HCAPTCHA_SITE_KEY = os.getenv("HCAPTCHA_SITE_KEY")
 HCAPTCHA_SECRET_KEY = os.getenv("HCAPTCHA_SECRET_KEY")
 
+# hCaptcha client: per-attempt timeout and overall deadline (seconds), retries, keep-alive pool
+# size (also the max concurrent verifications), and circuit breaker failures/cooldown (seconds)
+HCAPTCHA_TIMEOUT = float(os.getenv("HCAPTCHA_TIMEOUT", "3"))
+HCAPTCHA_DEADLINE = float(os.getenv("HCAPTCHA_DEADLINE", "6"))
+HCAPTCHA_RETRIES = int(os.getenv("HCAPTCHA_RETRIES", "1"))
+HCAPTCHA_POOL_SIZE = int(os.getenv("HCAPTCHA_POOL_SIZE", "10"))
+HCAPTCHA_BREAKER_THRESHOLD = int(os.getenv("HCAPTCHA_BREAKER_THRESHOLD", "5"))
+HCAPTCHA_BREAKER_COOLDOWN = float(os.getenv("HCAPTCHA_BREAKER_COOLDOWN", "30"))
+
 # Relative directory
 if ENVIRONMENT == "DEV":
     import sys
@@ -0,0 +1,140 @@
+import json
+import logging
+import os
+import threading
+from typing import Any
+
+
+logger = logging.getLogger(__name__)
+
+
+DEMOGRAPHICS_PATH = "application/data/demographics/demographics.json"
+
+
+def _flatten_party_values(demo_party: Any) -> frozenset[str]:
+    """
+    Return all acceptable party values.
+
+    Supports BOTH formats:
+
+      Legacy:
+        "party": { "United States": ["Democratic Party", ...] }
+        -> acceptable value stored in DB is "United States-Democratic Party"
+
+      New:
+        "party": { "United States": [{"label": "...", "value": "United States-Democratic Party"}] }
+        -> acceptable value stored in DB is exactly the entry's "value"
+
+    """
+    acceptable: set[str] = set()
+
+    if not isinstance(demo_party, dict):
+        return frozenset(acceptable)
+
+    for country_key, party_list in demo_party.items():
+        if not isinstance(party_list, list):
+            continue
+
+        for p in party_list:
+            # Legacy string party name -> build legacy storage format
+            if isinstance(p, str):
+                acceptable.add(f"{country_key}-{p}")
+                continue
+
+            # New object format -> use value directly
+            if isinstance(p, dict):
+                v = p.get("value")
+                if isinstance(v, str) and v.strip():
+                    acceptable.add(v.strip())
+                    continue
+
+                # If "value" is missing, fall back to label in legacy scheme
+                lbl = p.get("label")
+                if isinstance(lbl, str) and lbl.strip():
+                    acceptable.add(f"{country_key}-{lbl.strip()}")
+
+    return frozenset(acceptable)
+
+
+class DemographicsRegistry:
+    """
+    Process-wide view of demographics.json: the parsed options for templates plus pre-built
+    frozensets for validation. Reloaded only when the file's mtime changes.
+    """
+
+    def __init__(self, rel_path=DEMOGRAPHICS_PATH):
+        self._rel_path = rel_path
+        self._lock = threading.Lock()
+        self._snapshot = None
+
+
+    def _build(self, demo, path, mtime):
+        # Options are strings, so unhashable or non-string inputs can never match
+        options = {
+            key: frozenset(v for v in vals if isinstance(v, str))
+            for key, vals in demo.items() if isinstance(vals, list)
+        }
+
+        ages = frozenset()
+        try:
+            ages = frozenset(int(age) for age in demo.get("age", []))
+        except (TypeError, ValueError):
+            logger.warning("[DemographicsRegistry] Non-integer age option in %s", path)
+
+        return {
+            "path": path,
+            "mtime": mtime,
+            "raw": demo,
+            "keys": frozenset(demo.keys()),
+            "options": options,
+            "party": _flatten_party_values(demo.get("party")),
+            "ages": ages,
+            "age_range": (min(ages), max(ages)) if ages else None,
+        }
+
+
+    def load(self, rel_dir):
+        """
+        Return the current snapshot, reloading if the file changed.
+
+        Args:
+            rel_dir (str): application root (REL_DIR)
+
+        Returns:
+            dict: {
+                "raw": dict (parsed file, treat as read-only),
+                "keys": frozenset[str],
+                "options": {field: frozenset[str]} for list-valued fields,
+                "party": frozenset[str] (flattened party values),
+                "ages": frozenset[int], "age_range": (min, max) | None,
+            }
+
+        Raises:
+            OSError, ValueError: if the file is missing or invalid
+        """
+
+        path = os.path.join(rel_dir, self._rel_path)
+        mtime = os.stat(path).st_mtime_ns
+
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot["path"] == path and snapshot["mtime"] == mtime:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot["path"] == path and snapshot["mtime"] == mtime:
+                return snapshot
+
+            with open(path, "r", encoding="utf-8") as f:
+                demo = json.load(f)
+            if not isinstance(demo, dict):
+                raise ValueError("demographics.json must be an object")
+
+            snapshot = self._build(demo, path, mtime)
+            self._snapshot = snapshot
+
+        logger.info("[DemographicsRegistry] Loaded %s", path)
+        return snapshot
+
+
+demo_registry = DemographicsRegistry()
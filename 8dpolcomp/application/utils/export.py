@@ -0,0 +1,240 @@
+import csv
+import io
+import json
+import threading
+import zlib
+
+from application.utils.catalogue import SCORE_AXES
+
+
+# Export columns. Demographic fields are flattened; identities are ";"-joined in CSV.
+# Scores are prefixed since "religion" is both a demographic and an axis.
+DEMOGRAPHIC_COLUMNS = ["age", "country", "religion", "ethnicity", "education", "party", "identities"]
+SCORE_COLUMNS = [f"score_{axis}" for axis in SCORE_AXES]
+ANSWER_COLUMNS = [f"q{q_id}" for q_id in range(1, 101)]
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+EXPORT_COMPRESSIONS = {"none": None, "gzip": "gz", "zstd": "zst"}
+
+
+class ExportSlots:
+    """
+    Per-process cap on concurrent streamed exports. Each one holds a pooled connection (the
+    server-side cursor) until the client has read the whole response, so slow clients must not
+    be able to drain the SQLAlchemy pool.
+    """
+
+    def __init__(self, limit=2):
+        self.configure(limit)
+
+    def configure(self, limit=2):
+        """
+        Args:
+            limit (int): concurrent exports allowed (EXPORT_MAX_CONCURRENT)
+        """
+
+        self._slots = threading.BoundedSemaphore(max(1, int(limit)))
+
+
+    def acquire(self):
+        """
+        Returns:
+            bool: False if every slot is taken (does not wait)
+        """
+
+        return self._slots.acquire(blocking=False)
+
+
+    def release(self):
+        self._slots.release()
+
+
+export_slots = ExportSlots()
+
+
+def check_export(fmt, compression):
+    """
+    Validate an export format/compression pair and its optional dependencies.
+
+    Args:
+        fmt (str): "csv", "ndjson" or "parquet"
+        compression (str): "none", "gzip" or "zstd". Parquet compresses internally.
+
+    Raises:
+        ValueError: if the pair is unknown or its package is not installed
+    """
+
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if compression not in EXPORT_COMPRESSIONS:
+        raise ValueError(f"Unknown export compression: {compression}")
+
+    try:
+        if fmt == "parquet":
+            import pyarrow.parquet  # noqa: F401
+        elif compression == "zstd":
+            import zstandard  # noqa: F401
+    except ImportError as e:
+        raise ValueError(f"{fmt}/{compression} export needs {e.name}, which is not installed") from e
+
+
+def export_filename(fmt, compression, stem="8dpolcomp_results"):
+    """
+    Returns:
+        str: e.g. "8dpolcomp_results.csv.gz"
+    """
+
+    name = f"{stem}.{EXPORT_FORMATS[fmt][1]}"
+    if fmt != "parquet" and EXPORT_COMPRESSIONS[compression]:
+        name += f".{EXPORT_COMPRESSIONS[compression]}"
+    return name
+
+
+def export_mimetype(fmt, compression):
+    if fmt != "parquet" and compression == "gzip":
+        return "application/gzip"
+    if fmt != "parquet" and compression == "zstd":
+        return "application/zstd"
+    return EXPORT_FORMATS[fmt][0]
+
+
+def _flat_row(row):
+    demographics = row.get("demographics") or {}
+    scores = row.get("results") or {}
+    answers = row.get("answers") or {}
+
+    flat = [row.get("date"), row.get("group_id")]
+    for field in DEMOGRAPHIC_COLUMNS:
+        val = demographics.get(field)
+        if field == "identities":
+            val = ";".join(val) if isinstance(val, list) else None
+        flat.append(val)
+    flat += [scores.get(axis) for axis in SCORE_AXES]
+    flat += [answers.get(str(q_id), answers.get(q_id)) for q_id in range(1, 101)]
+    return flat
+
+
+def _csv_chunks(chunks):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(["date", "group_id", *DEMOGRAPHIC_COLUMNS, *SCORE_COLUMNS, *ANSWER_COLUMNS])
+    for chunk in chunks:
+        writer.writerows(_flat_row(row) for row in chunk)
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+def _ndjson_chunks(chunks):
+    for chunk in chunks:
+        yield "".join(json.dumps(row, separators=(",", ":")) + "\n" for row in chunk).encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Write-only file object that hands written bytes back to a generator.
+    """
+
+    def __init__(self):
+        self._parts = []
+        self._pos = 0
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._parts.append(bytes(b))
+        self._pos += len(b)
+        return len(b)
+
+    def tell(self):
+        return self._pos
+
+    def take(self):
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def _parquet_chunks(chunks, compression):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema(
+        [("date", pa.string()), ("group_id", pa.string())]
+        + [(field, pa.int16() if field == "age" else pa.list_(pa.string()) if field == "identities" else pa.string())
+           for field in DEMOGRAPHIC_COLUMNS]
+        + [(column, pa.float32()) for column in SCORE_COLUMNS]
+        + [(q, pa.int8()) for q in ANSWER_COLUMNS]
+    )
+
+    def to_int(val):
+        try:
+            return int(val)
+        except (TypeError, ValueError):
+            return None
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression=compression if compression != "none" else None)
+    try:
+        for chunk in chunks:
+            columns = {name: [] for name in schema.names}
+            for row in chunk:
+                demographics = row.get("demographics") or {}
+                for name, val in zip(schema.names, _flat_row(row)):
+                    columns[name].append(val)
+                # Typed values rather than the CSV text forms
+                columns["age"][-1] = to_int(demographics.get("age"))
+                identities = demographics.get("identities")
+                columns["identities"][-1] = identities if isinstance(identities, list) else None
+            for q in ANSWER_COLUMNS:
+                columns[q] = [to_int(a) for a in columns[q]]
+            writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+            yield sink.take()
+    finally:
+        writer.close()
+    yield sink.take()
+
+
+def stream_export(chunks, fmt, compression="none"):
+    """
+    Encode row chunks incrementally.
+
+    Args:
+        chunks (Iterable[list[dict]]): e.g. ResultsController.iter_export()
+        fmt (str): "csv", "ndjson" or "parquet" (one row group per chunk)
+        compression (str): "none", "gzip" or "zstd"; applied inside the file for parquet
+
+    Yields:
+        bytes
+    """
+
+    check_export(fmt, compression)
+
+    if fmt == "parquet":
+        yield from (b for b in _parquet_chunks(chunks, compression) if b)
+        return
+
+    encoded = _csv_chunks(chunks) if fmt == "csv" else _ndjson_chunks(chunks)
+
+    if compression == "none":
+        yield from encoded
+        return
+
+    if compression == "gzip":
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    else:
+        import zstandard
+        compressor = zstandard.ZstdCompressor(level=3).compressobj()
+
+    for data in encoded:
+        out = compressor.compress(data)
+        if out:
+            yield out
+    yield compressor.flush()
@@ -0,0 +1,137 @@
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+
+AXIS_AVERAGES_PATH = "application/data/demographics/axis_averages.json"
+
+
+class ClosestMatcher:
+    """
+    Ranks identities by similarity to a result, against the averages written by `jobs.py avg_identities`.
+
+    The averages are held as an identities x axes matrix and reloaded only when the file's mtime
+    changes, so a results page view costs no disk reads and a few array operations.
+    """
+
+    def __init__(self, rel_path=AXIS_AVERAGES_PATH):
+        self._rel_path = rel_path
+        self._lock = threading.Lock()
+        self._snapshot = None
+
+
+    def _load(self, path):
+        """
+        Returns:
+            dict: {"path", "mtime", "identities": list[str], "axes": list[str], "matrix": np.ndarray}
+        """
+
+        stat = os.stat(path)
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot["path"] == path and snapshot["mtime"] == stat.st_mtime_ns:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot["path"] == path and snapshot["mtime"] == stat.st_mtime_ns:
+                return snapshot
+
+            with open(path, "r", encoding="utf-8") as f:
+                avgs = json.load(f)
+
+            identities = list(avgs.keys())
+            axes = sorted({axis for avg in avgs.values() for axis in avg})
+            # Missing axes count as 0, as avg.get(key, 0) did
+            matrix = np.array(
+                [[float(avgs[identity].get(axis, 0)) for axis in axes] for identity in identities],
+                dtype=np.float64,
+            ).reshape(len(identities), len(axes))
+            matrix.setflags(write=False)
+
+            snapshot = {
+                "path": path,
+                "mtime": stat.st_mtime_ns,
+                "identities": identities,
+                "axes": axes,
+                "matrix": matrix,
+            }
+            self._snapshot = snapshot
+
+        logger.info("[ClosestMatcher] Loaded %d identity averages", len(identities))
+        return snapshot
+
+
+    def version(self, rel_dir):
+        """
+        Returns:
+            int: mtime (ns) of the averages file, 0 if missing; changes whenever rankings may change
+        """
+
+        try:
+            return os.stat(os.path.join(rel_dir, self._rel_path)).st_mtime_ns
+        except OSError:
+            return 0
+
+
+    def _ranking(self, identities, similarity):
+        # Stable descending sort keeps file order for ties, like sorted(..., reverse=True)
+        order = np.argsort(-similarity, kind="stable")
+        return [(identities[k], float(similarity[k])) for k in order]
+
+
+    def match(self, results, rel_dir):
+        """
+        Rank identities overall and per axis.
+
+        Overall similarity is 1 / (1 + ||results - avg||). The per-axis ranking for axis a compares
+        {a: results[a]} against each average, so the other axes contribute |avg|, raised to 1.5.
+
+        Args:
+            results (dict[str, float]): axis scores
+            rel_dir (str): application root (REL_DIR)
+
+        Returns:
+            dict[str, list[tuple[str, float]]]: {"overall": [...], <axis>: [...]}, each sorted by
+            descending similarity
+
+        Raises:
+            OSError, ValueError: if the averages file is missing or invalid
+        """
+
+        if not isinstance(results, dict):
+            raise ValueError("Invalid distance inputs")
+
+        snapshot = self._load(os.path.join(rel_dir, self._rel_path))
+        identities, axes, matrix = snapshot["identities"], list(snapshot["axes"]), snapshot["matrix"]
+
+        # Axes only present on the result compare against 0
+        extra = [axis for axis in results if axis not in axes]
+        if extra:
+            axes += extra
+            matrix = np.hstack([matrix, np.zeros((len(identities), len(extra)))])
+
+        r = np.array([float(results.get(axis, 0)) for axis in axes], dtype=np.float64)
+
+        overall = 1 / (1 + np.sqrt(((r - matrix) ** 2).sum(axis=1)))
+        matches = {"overall": self._ranking(identities, overall)}
+
+        # Per axis: |r_a - avg_a| on the axis itself, |avg_k| on every other axis
+        cols = np.array([axes.index(axis) for axis in results], dtype=np.int64)
+        sq = np.repeat((np.abs(matrix) ** 1.5)[None] ** 2, len(cols), axis=0)
+        own = np.abs(r[cols][:, None] - matrix[:, cols].T) ** 1.5
+        sq[np.arange(len(cols))[:, None], np.arange(len(identities))[None, :], cols[:, None]] = own ** 2
+        per_axis = 1 / (1 + np.sqrt(sq.sum(axis=2)))
+
+        for k, axis in enumerate(results):
+            matches[axis] = self._ranking(identities, per_axis[k])
+
+        return matches
+
+
+closest_matcher = ClosestMatcher()
@@ -0,0 +1,206 @@
+import json
+import logging
+import uuid
+from datetime import date
+
+from sqlalchemy import inspect, select, text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.schema import CreateIndex
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from application import db
+
+
+logger = logging.getLogger(__name__)
+
+
+# Columns removed from the models, dropped by ensure_schema. Only list columns whose data is unused.
+DROPPED_COLUMNS = {
+    "results_daily_rollup": ["score_sumsq"],
+}
+
+# Initial values for existing rows when ensure_schema adds a column, as SQL over the same row
+# (instead of the server_default, which would stamp every old row with the migration time).
+BACKFILLED_COLUMNS = {
+    "results": {"submitted_at": "inserted_at"},
+}
+
+
+def _column_ddl(column, dialect):
+    ddl = f"{column.name} {column.type.compile(dialect=dialect)}"
+    for fk in column.foreign_keys:
+        ddl += f" REFERENCES {fk.column.table.name} ({fk.column.name})"
+    if column.server_default is not None:
+        default = column.server_default.arg
+        ddl += f" DEFAULT {default.text if hasattr(default, 'text') else repr(str(default))}"
+    if not column.nullable:
+        ddl += " NOT NULL"
+    return ddl
+
+
+def ensure_schema(concurrently=False):
+    """
+    Bring the database up to the declared models: create missing tables, add missing columns,
+    drop DROPPED_COLUMNS and create missing indexes. Idempotent. Requires an app context.
+
+    Added NOT NULL columns must declare a server_default; BACKFILLED_COLUMNS overrides it for existing rows.
+
+    Args:
+        concurrently (bool): build indexes with CREATE INDEX CONCURRENTLY (no write lock)
+
+    Returns:
+        dict[str, list[str]]: {"tables": [...], "columns": [...], "indexes": [...]} that were created
+    """
+
+    created = {"tables": [], "columns": [], "indexes": []}
+    dialect = db.engine.dialect
+
+    existing_tables = set(inspect(db.engine).get_table_names())
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            table.create(bind=db.engine)
+            created["tables"].append(table.name)
+
+    inspector = inspect(db.engine)
+
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            existing_cols = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_cols:
+                    continue
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN IF NOT EXISTS {_column_ddl(column, dialect)}"))
+                backfill = BACKFILLED_COLUMNS.get(table.name, {}).get(column.name)
+                if backfill:
+                    conn.execute(text(f"UPDATE {table.name} SET {column.name} = {backfill}"))
+                created["columns"].append(f"{table.name}.{column.name}")
+            for name in DROPPED_COLUMNS.get(table.name, []):
+                if name in existing_cols:
+                    logger.info("[ensure_schema] Dropping %s.%s", table.name, name)
+                    conn.execute(text(f"ALTER TABLE {table.name} DROP COLUMN IF EXISTS {name}"))
+
+    # CONCURRENTLY cannot run inside a transaction block
+    conn_opts = {"isolation_level": "AUTOCOMMIT"} if concurrently else {}
+    with db.engine.connect().execution_options(**conn_opts) as conn:
+        for table in db.metadata.sorted_tables:
+            existing_idx = {ix["name"] for ix in inspector.get_indexes(table.name)}
+            for index in sorted(table.indexes, key=lambda ix: ix.name):
+                if index.name in existing_idx:
+                    continue
+                ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=dialect))
+                if concurrently:
+                    ddl = ddl.replace("CREATE INDEX", "CREATE INDEX CONCURRENTLY", 1)
+                logger.info("[ensure_schema] %s", ddl)
+                conn.execute(text(ddl))
+                created["indexes"].append(index.name)
+        if not concurrently:
+            conn.commit()
+
+    return created
+
+
+class _Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) wrapper that keeps the statement's typed bind parameters."""
+
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(_Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def _plan_index_names(plan):
+    names = set()
+    if isinstance(plan, dict):
+        if "Index Name" in plan:
+            names.add(plan["Index Name"])
+        for value in plan.values():
+            names |= _plan_index_names(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            names |= _plan_index_names(value)
+    return names
+
+
+# Filter type -> (sample filterset, JSONB expression index, typed column index).
+# Sample values are real demographics.json options, so the plans match production filters.
+FILTER_INDEX_CHECKS = {
+    "country": ({"country": ["United Kingdom"]}, "ix_results_demo_country", "ix_results_country_id"),
+    "religion": ({"religion": ["Atheist"]}, "ix_results_demo_religion", "ix_results_religion_id"),
+    "ethnicity": ({"ethnicity": ["White / European"]}, "ix_results_demo_ethnicity", "ix_results_ethnicity_id"),
+    "education": ({"education": ["Bachelor's Degree"]}, "ix_results_demo_education", "ix_results_education_id"),
+    "party": ({"party": ["United Kingdom-Labour Party"]}, "ix_results_demo_party", "ix_results_party_id"),
+    "age": ({"min-age": 18, "max-age": 30}, "ix_results_demo_age", "ix_results_age"),
+    "identities (any)": (
+        {"identities": ["Left-Wing", "Liberal"], "any-all": "any"}, "ix_results_demo_identities", "ix_results_identity_ids"
+    ),
+    "identities (all)": (
+        {"identities": ["Left-Wing", "Liberal"], "any-all": "all"}, "ix_results_demo_identities", "ix_results_identity_ids"
+    ),
+    "group": ({"group-ids": [uuid.UUID(int=0)]}, "ix_results_group_id", "ix_results_group_id"),
+}
+
+
+def _typed_sample_filterset(filterset):
+    """
+    Swap sample values for ones that have codes, so typed filters do not collapse to FALSE.
+    """
+
+    from application.controllers.demographics import DemographicsController
+
+    codes = DemographicsController.load_codes()
+    sample = dict(filterset)
+    for key, vals in filterset.items():
+        if isinstance(vals, list) and key in codes and codes[key]:
+            known = list(codes[key])
+            sample[key] = [v if v in codes[key] else known[i % len(known)] for i, v in enumerate(vals)]
+    return sample
+
+
+def check_filter_indexes():
+    """
+    EXPLAIN each filter type built by ResultsController._apply_filterset and verify it can use
+    its index. Sequential scans are disabled for the check so small tables still exercise the
+    index path. Requires an app context.
+
+    Returns:
+        dict[str, tuple[bool, list[str]]]: {filter type: (index used, indexes in plan)}
+    """
+
+    from flask import current_app
+    from application.controllers.results import ResultsController
+    from application.models.results import Results
+
+    typed = bool(current_app.config.get("TYPED_DEMOGRAPHIC_FILTERS"))
+
+    checks = []
+    for name, (filterset, json_index, typed_index) in FILTER_INDEX_CHECKS.items():
+        if typed:
+            filterset, index_name = _typed_sample_filterset(filterset), typed_index
+        else:
+            index_name = json_index
+        checks.append((name, ResultsController._apply_filterset(select(Results.id), filterset), index_name))
+
+    # Date bounds are applied outside _apply_filterset
+    checks.append(("date", select(Results.id).where(Results.date >= date(2024, 1, 1)), "ix_results_date"))
+
+    report = {}
+
+    with db.engine.connect() as conn:
+        conn.execute(text("SET LOCAL enable_seqscan = off"))
+
+        for name, stmt, index_name in checks:
+            plan = conn.execute(_Explain(stmt)).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+
+            used = _plan_index_names(plan)
+            report[name] = (index_name in used, sorted(used))
+
+        conn.rollback()
+
+    return report
@@ -0,0 +1,99 @@
+import numpy as np
+
+from application.utils.catalogue import AXES, catalogue
+
+
+def answers_to_vector(answers):
+    """
+    Convert an answers mapping into a vector aligned with the catalogue weight matrix.
+
+    Args:
+        answers (dict): {question_id: answer, ...}. Keys may be int or str (JSONB).
+
+    Returns:
+        np.ndarray[float64] (N,)
+
+    Raises:
+        KeyError: If any catalogue question is unanswered.
+    """
+
+    index = catalogue.index
+    vec = np.zeros(len(index), dtype=np.float64)
+    seen = 0
+
+    for q_id, ans in answers.items():
+        row = index.get(int(q_id))
+        if row is None:
+            continue
+        vec[row] = ans
+        seen += 1
+
+    if seen != len(index):
+        raise KeyError("Missing answers")
+    return vec
+
+
+def answers_to_matrix(answers_list):
+    """
+    Stack many answers mappings into an (M, N) matrix.
+
+    Args:
+        answers_list (list[dict])
+
+    Returns:
+        np.ndarray[float64] (M, N)
+    """
+
+    mat = np.zeros((len(answers_list), len(catalogue.index)), dtype=np.float64)
+    for i, answers in enumerate(answers_list):
+        mat[i] = answers_to_vector(answers)
+    return mat
+
+
+def score_matrix(answer_matrix):
+    """
+    Score a matrix of answer vectors in one product.
+
+    Args:
+        answer_matrix (np.ndarray): (M, N) answers, or (N,) for a single vector.
+
+    Returns:
+        np.ndarray[float64]: (M, 8) (or (8,)) unrounded scores in AXES order.
+    """
+
+    return (np.asarray(answer_matrix, dtype=np.float64) @ catalogue.weights) / catalogue.max_scores
+
+
+def _to_dct(row):
+    # Python round() keeps parity with the legacy dict-based scorer
+    return {axis: round(float(row[j]), 2) for j, axis in enumerate(AXES)}
+
+
+def score_answers(answers):
+    """
+    Score a single set of answers.
+
+    Args:
+        answers (dict): {question_id: answer, ...}
+
+    Returns:
+        dict[str, float]: {axis: score, ...} rounded to 2dp, in AXES order.
+    """
+
+    return _to_dct(score_matrix(answers_to_vector(answers)))
+
+
+def score_batch(answers_list):
+    """
+    Score many sets of answers at once.
+
+    Args:
+        answers_list (list[dict]): [{question_id: answer, ...}, ...]
+
+    Returns:
+        list[dict[str, float]]: One scores dict per input, same format as score_answers().
+    """
+
+    if not answers_list:
+        return []
+    return [_to_dct(row) for row in score_matrix(answers_to_matrix(answers_list))]
@@ -0,0 +1,133 @@
+import gzip
+import json
+import logging
+from datetime import date, datetime
+from uuid import UUID
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def _default(obj):
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (date, datetime)):
+        return obj.isoformat()
+    if isinstance(obj, UUID):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class JsonSerialiser:
+    """
+    JSON encoder for API responses and page payloads.
+
+    Uses orjson when installed (writes NumPy arrays/scalars, dates and UUIDs natively), else the
+    standard library with an equivalent default hook. Output is compact either way.
+    """
+
+    def __init__(self, backend="auto"):
+        self.configure(backend)
+
+    def configure(self, backend="auto"):
+        """
+        Args:
+            backend (str): "auto" (orjson if installed), "orjson" or "json"
+        """
+
+        if backend == "orjson" and orjson is None:
+            logger.warning("[JsonSerialiser] orjson not installed; using json")
+        self.backend = "orjson" if backend in ("auto", "orjson") and orjson is not None else "json"
+
+
+    def dumps(self, obj):
+        """
+        Returns:
+            str
+        """
+
+        if self.backend == "orjson":
+            return orjson.dumps(
+                obj, default=_default,
+                option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+            ).decode("utf-8")
+        return json.dumps(obj, default=_default, separators=(",", ":"))
+
+
+serialiser = JsonSerialiser()
+
+
+def dumps(obj):
+    return serialiser.dumps(obj)
+
+
+def _accepted_encodings(accept_encoding):
+    accepted = set()
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+def compress_response(response, request, config):
+    """
+    gzip or brotli encode a buffered response body above RESPONSE_COMPRESSION_MIN_SIZE, when
+    RESPONSE_COMPRESSION is enabled and the client accepts it. Registered as an after_request
+    hook; streamed, already-encoded and non-200 responses pass through unchanged.
+
+    Args:
+        response (Response)
+        request (Request)
+        config (Config): app config
+
+    Returns:
+        Response
+    """
+
+    if not config.get("RESPONSE_COMPRESSION"):
+        return response
+    if response.status_code != 200 or response.direct_passthrough or response.is_streamed:
+        return response
+    if "Content-Encoding" in response.headers:
+        return response
+
+    response.vary.add("Accept-Encoding")
+
+    body = response.get_data()
+    if len(body) < int(config.get("RESPONSE_COMPRESSION_MIN_SIZE") or 0):
+        return response
+
+    accepted = _accepted_encodings(request.headers.get("Accept-Encoding"))
+    if brotli is not None and "br" in accepted:
+        encoding, compressed = "br", brotli.compress(body, quality=int(config.get("RESPONSE_BROTLI_QUALITY") or 5))
+    elif "gzip" in accepted:
+        encoding, compressed = "gzip", gzip.compress(body, compresslevel=int(config.get("RESPONSE_GZIP_LEVEL") or 6))
+    else:
+        return response
+
+    response.set_data(compressed)
+    response.headers["Content-Encoding"] = encoding
+
+    # The encoded bytes differ from the identity ones, so a strong validator becomes weak
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+    return response
@@ -0,0 +1,21 @@
+import json
+import os
+
+
+INDEX_SNAPSHOT_PATH = "application/data/snapshots/index_samples.json"
+
+
+def write_snapshot(snapshot, path):
+    """
+    Atomically write a snapshot as compact JSON.
+
+    Args:
+        snapshot (dict)
+        path (str | Path)
+    """
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
@@ -0,0 +1,93 @@
+import struct
+from operator import itemgetter
+
+import numpy as np
+
+from application.utils.catalogue import SCORE_AXES
+from application.utils.serialise import dumps
+
+
+# Binary compass_datasets encoding, negotiated with "Accept: application/octet-stream" on /api/data.
+#
+#   "PCD1" | u32 header length | header JSON {"status", "axes", "answer_labels"} | records...
+#
+# Each record is one dataset:
+#
+#   u32 meta length | meta JSON (dataset dict without all_scores/answer counts, plus "n")
+#   | float32[n * len(axes)] scores, row-major in `axes` order
+#   | uint32[100 * len(answer_labels)] raw answer counts, question-major in `answer_labels` order
+#
+# Integers and blocks are little-endian; JSON is UTF-8 padded with spaces to 4 bytes so every
+# block is aligned for Float32Array/Uint32Array views. Records are self-contained, so a cached
+# run of records can be prefixed with per-session ones (your_results).
+
+WIRE_MIMETYPE = "application/octet-stream"
+WIRE_MAGIC = b"PCD1"
+
+WIRE_ANSWER_LABELS = ["Strongly Agree", "Agree", "Neutral", "Disagree", "Strongly Disagree"]
+
+_PACKED_KEYS = ("all_scores", "raw_answer_counts", "answer_counts")
+
+_axis_getter = itemgetter(*SCORE_AXES)
+
+
+def _json_block(obj):
+    # Dataset meta carries NumPy histograms and density cells
+    data = dumps(obj).encode("utf-8")
+    data += b" " * (-len(data) % 4)
+    return struct.pack("<I", len(data)) + data
+
+
+def pack_preamble(status="success"):
+    """
+    Returns:
+        bytes: magic and header, to be followed by records
+    """
+
+    return WIRE_MAGIC + _json_block({
+        "status": status,
+        "axes": SCORE_AXES,
+        "answer_labels": WIRE_ANSWER_LABELS,
+    })
+
+
+def pack_dataset(dataset):
+    """
+    Encode one compass dataset as a record.
+
+    Raw answer counts come from "raw_answer_counts", or "answer_counts" for datasets that only
+    carry raw counts (your_results).
+
+    Args:
+        dataset (dict): as built by ResultsController._dataset_dict
+
+    Returns:
+        bytes
+    """
+
+    all_scores = dataset.get("all_scores") or []
+    try:
+        rows = [_axis_getter(s) for s in all_scores]
+    except KeyError:
+        rows = [[s.get(axis, 0) for axis in SCORE_AXES] for s in all_scores]
+    scores = np.array(rows, dtype="<f4").reshape(len(all_scores), len(SCORE_AXES))
+
+    raw = dataset.get("raw_answer_counts") or dataset.get("answer_counts") or {}
+    counts = np.zeros((100, len(WIRE_ANSWER_LABELS)), dtype="<u4")
+    for q_id, per_label in raw.items():
+        row = int(q_id) - 1
+        if 0 <= row < 100 and isinstance(per_label, dict):
+            counts[row] = [per_label.get(label, 0) for label in WIRE_ANSWER_LABELS]
+
+    meta = {k: v for k, v in dataset.items() if k not in _PACKED_KEYS}
+    meta["n"] = len(all_scores)
+    return _json_block(meta) + scores.tobytes() + counts.tobytes()
+
+
+def pack_datasets(datasets):
+    """
+    Returns:
+        bytes: records for each dataset, in order (no preamble)
+    """
+
+    return b"".join(pack_dataset(dataset) for dataset in datasets)
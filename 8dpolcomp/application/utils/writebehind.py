@@ -0,0 +1,353 @@
+import atexit
+import glob
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from datetime import date, datetime, timezone
+from uuid import UUID
+
+from sqlalchemy import text
+
+
+logger = logging.getLogger(__name__)
+
+
+def _dump_row(row):
+    return json.dumps({
+        **row,
+        "date": row["date"].isoformat(),
+        "group_id": str(row["group_id"]) if row.get("group_id") else None,
+        "submitted_at": row["submitted_at"].isoformat() if row.get("submitted_at") else None,
+    })
+
+
+def _load_row(line):
+    row = json.loads(line)
+    row["date"] = date.fromisoformat(row["date"])
+    row["group_id"] = UUID(row["group_id"]) if row.get("group_id") else None
+    # Older spill files have no submitted_at: fall back to the replay time
+    row["submitted_at"] = (
+        datetime.fromisoformat(row["submitted_at"]) if row.get("submitted_at") else datetime.now(timezone.utc)
+    )
+    return row
+
+
+class ResultWriter:
+    """
+    Write-behind queue for new results.
+
+    Submissions get an id at once from a block pre-fetched from the results id sequence and are
+    inserted in batches by a background thread. Rows that cannot be queued or written are spilled
+    to NDJSON files and replayed once the database accepts them again. The queue is drained at
+    interpreter exit. Disabled unless WRITE_BEHIND is set.
+
+    Ids are handed out up front so the results page can link to a row before it exists, which means
+    id order is not insert order: each worker holds its own block, and spilled rows land long after
+    higher ids. "Newest" sorts on Results.submitted_at, stamped here and kept through spills ("recent"
+    order, get_recent_results); "since the last run" keys on Results.inserted_at, the database insert
+    time, so replayed spills are still picked up (avg_identities --incremental, rollup_results late days).
+    """
+
+    def __init__(self):
+        self._app = None
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._ids = deque()
+        self._pending = {}
+        # Spilled rows awaiting replay, and rows whose spill failed (retried by the writer thread)
+        self._spilled = {}
+        self._unspilled = []
+        self._spill_seq = 0
+        self._atexit = False
+
+    def configure(self, app):
+        """
+        Set up from app config: WRITE_BEHIND, WRITE_BEHIND_QUEUE_SIZE, WRITE_BEHIND_BATCH_SIZE,
+        WRITE_BEHIND_FLUSH_INTERVAL (seconds), WRITE_BEHIND_ID_BLOCK and WRITE_BEHIND_SPILL_DIR.
+        """
+
+        config = app.config
+        self._app = app if config.get("WRITE_BEHIND") else None
+        if self._app is None:
+            return
+
+        self._queue = queue.Queue(maxsize=int(config.get("WRITE_BEHIND_QUEUE_SIZE") or 10000))
+        self._batch_size = int(config.get("WRITE_BEHIND_BATCH_SIZE") or 500)
+        self._interval = float(config.get("WRITE_BEHIND_FLUSH_INTERVAL") or 1)
+        self._id_block = int(config.get("WRITE_BEHIND_ID_BLOCK") or 100)
+        self._spill_dir = config.get("WRITE_BEHIND_SPILL_DIR") or os.path.join(
+            config["REL_DIR"], "application/data/spill"
+        )
+        self._ids.clear()
+
+
+    @property
+    def enabled(self):
+        return self._app is not None
+
+
+    def _next_id(self):
+        with self._lock:
+            if not self._ids:
+                from application import db
+                from application.models.results import Results
+
+                # nextval is not transactional, so the block stays reserved even if unused
+                with db.engine.connect() as conn:
+                    self._ids.extend(conn.execute(
+                        text("SELECT nextval(pg_get_serial_sequence(:table, 'id')) FROM generate_series(1, :n)"),
+                        {"table": Results.__table__.name, "n": self._id_block},
+                    ).scalars())
+            return self._ids.popleft()
+
+
+    def _ensure_started(self):
+        # Started lazily and per process: threads do not survive a pre-fork
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            if self._pid != os.getpid():
+                self._ids.clear()
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="result-writer", daemon=True)
+            self._thread.start()
+            if not self._atexit:
+                atexit.register(self.drain)
+                self._atexit = True
+
+
+    def submit(self, results):
+        """
+        Queue a new result.
+
+        Args:
+            results (dict): {"demographics": ..., "scores": ..., "answers": ...}
+
+        Returns:
+            int: the id the row will be inserted with
+        """
+
+        self._ensure_started()
+
+        now = datetime.now(timezone.utc)
+        row = {
+            **results,
+            "id": self._next_id(),
+            "date": results.get("date") or now.date(),
+            "submitted_at": now,
+        }
+        with self._lock:
+            self._pending[row["id"]] = row
+
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            logger.warning("[ResultWriter] Queue full, spilling result %s", row["id"])
+            self._spill([row])
+        return row["id"]
+
+
+    def pending(self, id):
+        """
+        Returns:
+            dict | None: a submitted row not yet written to the database (queued or spilled)
+        """
+
+        if not self._pending and not self._spilled and not self._unspilled:
+            return None
+        with self._lock:
+            row = self._pending.get(id) or self._spilled.get(id)
+            return row or next((r for r in self._unspilled if r["id"] == id), None)
+
+
+    def _take_batch(self, timeout):
+        try:
+            batch = [self._queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while len(batch) < self._batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+
+    def _write(self, rows):
+        from application.controllers.results import ResultsController
+
+        try:
+            with self._app.app_context():
+                ResultsController.add_results(rows)
+        except Exception:
+            logger.exception("[ResultWriter] Failed to write %d results, spilling", len(rows))
+            self._spill(rows)
+            return
+
+        with self._lock:
+            for row in rows:
+                self._pending.pop(row["id"], None)
+
+
+    def _spill(self, rows):
+        """
+        Append rows to a new NDJSON file in the spill directory (written then renamed into place).
+
+        Spilled rows stay readable through pending() until a replay has inserted them. If the
+        spill itself fails they are kept in memory and retried by the writer thread.
+        """
+
+        with self._lock:
+            self._spill_seq += 1
+            name = f"results-{time.time_ns()}-{os.getpid()}-{self._spill_seq}.ndjson"
+        path = os.path.join(self._spill_dir, name)
+
+        try:
+            os.makedirs(self._spill_dir, exist_ok=True)
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                for row in rows:
+                    f.write(_dump_row(row) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(path + ".tmp", path)
+        except Exception:
+            logger.critical(
+                "[ResultWriter] Failed to spill %d results, keeping them in memory to retry: ids=%s",
+                len(rows), [r["id"] for r in rows], exc_info=True,
+            )
+            with self._lock:
+                self._unspilled.extend(rows)
+            return
+
+        with self._lock:
+            for row in rows:
+                self._pending.pop(row["id"], None)
+                self._spilled[row["id"]] = row
+
+
+    def _forget_replayed(self):
+        """
+        Drop spilled rows from memory once a replay (by any worker) has inserted them.
+        """
+
+        from application import db
+        from application.models.results import Results
+
+        with self._lock:
+            ids = list(self._spilled)
+        if not ids:
+            return
+
+        with self._app.app_context():
+            with db.engine.connect() as conn:
+                inserted = conn.execute(
+                    text(f"SELECT id FROM {Results.__table__.name} WHERE id = ANY(:ids)"), {"ids": ids}
+                ).scalars().all()
+
+        with self._lock:
+            for row_id in inserted:
+                self._spilled.pop(row_id, None)
+
+
+    def _replay_spills(self):
+        """
+        Insert spilled rows, oldest file first. Stops at the first failure to retry later.
+        """
+
+        from application.controllers.results import ResultsController
+
+        for path in sorted(glob.glob(os.path.join(self._spill_dir, "results-*.ndjson"))):
+            # Claim by rename so only one worker replays a file
+            claimed = f"{path}.{os.getpid()}.replay"
+            try:
+                os.rename(path, claimed)
+            except OSError:
+                continue
+
+            try:
+                with open(claimed, "r", encoding="utf-8") as f:
+                    rows = [_load_row(line) for line in f if line.strip()]
+                for i in range(0, len(rows), self._batch_size):
+                    with self._app.app_context():
+                        ResultsController.add_results(rows[i:i + self._batch_size])
+            except Exception:
+                logger.exception("[ResultWriter] Failed to replay %s", path)
+                os.rename(claimed, path)
+                return
+
+            os.remove(claimed)
+            logger.info("[ResultWriter] Replayed %d spilled results from %s", len(rows), path)
+
+
+    def _take_unspilled(self):
+        with self._lock:
+            rows, self._unspilled = self._unspilled, []
+        return rows
+
+
+    def _run(self):
+        last_replay = 0.0
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch = self._take_batch(timeout=self._interval)
+            if batch:
+                self._write(batch)
+
+            if time.monotonic() - last_replay >= max(self._interval, 10):
+                last_replay = time.monotonic()
+                # Rows whose spill failed: the database may be back, otherwise they are spilled again
+                unspilled = self._take_unspilled()
+                if unspilled:
+                    self._write(unspilled)
+                try:
+                    if os.path.isdir(self._spill_dir):
+                        self._replay_spills()
+                    self._forget_replayed()
+                except Exception:
+                    logger.exception("[ResultWriter] Spill replay failed")
+
+
+    def drain(self, timeout=30):
+        """
+        Stop the writer after flushing the queue. Rows still queued after the timeout are spilled.
+
+        Args:
+            timeout (float): seconds to wait for the background thread
+        """
+
+        thread = self._thread
+        if thread is None or self._pid != os.getpid():
+            return
+
+        self._stop.set()
+        thread.join(timeout)
+        if thread.is_alive():
+            rows = []
+            while True:
+                try:
+                    rows.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if rows:
+                logger.warning("[ResultWriter] Drain timed out, spilling %d results", len(rows))
+                self._spill(rows)
+
+        unspilled = self._take_unspilled()
+        if unspilled:
+            self._spill(unspilled)
+        # Last resort: the rows are only recoverable from this log line
+        for row in self._take_unspilled():
+            logger.critical("[ResultWriter] Result lost on exit: %s", _dump_row(row))
+        self._thread = None
+
+
+result_writer = ResultWriter()
@@ -1,17 +1,25 @@
 
-import json
+import base64
 import logging
 import os
 from datetime import date, datetime
 from typing import Any, Dict, List, Literal, Optional
 from uuid import UUID
 
-import requests
-from flask import Blueprint, session, request, current_app
+from flask import Blueprint, Response, session, request, current_app, send_file, stream_with_context
 from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator, model_validator
+from sqlalchemy.exc import OperationalError
 
 from application.controllers.results import ResultsController as Results
 from application.controllers.questions import QuestionsController as Questions
+from application.utils.cache import data_cache, filter_cache_key
+from application.utils.captcha import CaptchaUnavailable, captcha_verifier
+from application.utils.demographics import demo_registry
+from application.utils.export import check_export, export_filename, export_mimetype, export_slots, stream_export
+from application.utils.scoring import score_answers
+from application.utils.serialise import compress_response, dumps
+from application.utils.snapshots import INDEX_SNAPSHOT_PATH
+from application.utils.wire import WIRE_MIMETYPE, pack_dataset, pack_datasets, pack_preamble
 
 
 logger = logging.getLogger(__name__)
@@ -20,6 +28,14 @@ logger = logging.getLogger(__name__)
 v = Blueprint("api", __name__)
 
 
+@v.after_request
+def _compress(response):
+    return compress_response(response, request, current_app.config)
+
+
+# Most results /api/data ships per filterset in "rows" mode
+ROWS_LIMIT = 2500
+
 Axis = Literal["diplomacy", "economics", "government", "politics", "religion", "society", "state", "technology"]
 
 
@@ -84,11 +100,24 @@ class FilterDataModel(BaseModel):
     model_config = ConfigDict(extra="ignore")
 
     order: Literal["random", "recent"]
-    limit: int = Field(gt=0, le=2500)
+    mode: Literal["rows", "aggregate"] = "rows"
+    # "aggregate" mode ships no rows, so it may go past ROWS_LIMIT or omit the limit entirely
+    limit: Optional[int] = Field(default=None, gt=0, validate_default=True)
+    seed: Optional[int] = Field(default=None, ge=0, le=2**31 - 1)
     min_date: date = Field(alias="min-date")
     max_date: date = Field(alias="max-date")
     filtersets: List[FiltersetModel]
 
+    # Pre-binned per-axis score histograms; axes in histogram_invert are binned negated
+    histogram_bins: Optional[int] = Field(default=None, alias="histogram-bins", ge=1, le=200)
+    histogram_invert: List[Axis] = Field(default_factory=list, alias="histogram-invert")
+    include_scores: bool = Field(default=True, alias="include-scores")
+
+    # Compass density: per-pair count grids, or a stratified sample of all_scores
+    density: Optional[Literal["grid", "sample"]] = None
+    density_size: int = Field(default=50, alias="density-size", ge=4, le=200)
+    density_points: int = Field(default=1000, alias="density-points", ge=1, le=ROWS_LIMIT)
+
     @field_validator("min_date", "max_date", mode="before")
     @classmethod
     def parse_dates(cls, v):
@@ -101,6 +130,13 @@ class FilterDataModel(BaseModel):
             return date.fromisoformat(s)
         raise ValueError("Invalid date")
 
+    @field_validator("limit")
+    @classmethod
+    def validate_limit(cls, v, info):
+        if info.data.get("mode") == "rows" and (v is None or v > ROWS_LIMIT):
+            raise ValueError(f"limit must be between 1 and {ROWS_LIMIT}")
+        return v
+
     @model_validator(mode="after")
     def validate_dates(self):
         if self.min_date > self.max_date:
@@ -120,6 +156,28 @@ class FilterCountBody(BaseModel):
     data: FilterDataModel
 
 
+class ExportFiltersetModel(FiltersetModel):
+    label: str = ""
+    color: str = ""
+
+
+class ExportBody(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
+    format: Literal["csv", "ndjson", "parquet"] = "csv"
+    compression: Literal["none", "gzip", "zstd"] = "gzip"
+    min_date: Optional[date] = Field(default=None, alias="min-date")
+    max_date: Optional[date] = Field(default=None, alias="max-date")
+    filterset: Optional[ExportFiltersetModel] = None
+
+    @field_validator("min_date", "max_date", mode="before")
+    @classmethod
+    def parse_dates(cls, v):
+        if v is None or v == "":
+            return None
+        return FilterDataModel.parse_dates(v)
+
+
 class ScoresModel(BaseModel):
     model_config = ConfigDict(extra="ignore")
 
@@ -134,54 +192,7 @@ class ScoresModel(BaseModel):
 
 
 def _load_demo_valid():
-    demo_path = os.path.join(current_app.config["REL_DIR"], "application/data/demographics/demographics.json")
-    with open(demo_path, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-
-def _flatten_party_values(demo_party: Any) -> set[str]:
-    """
-    Return all acceptable party values.
-
-    Supports BOTH formats:
-
-      Legacy:
-        "party": { "United States": ["Democratic Party", ...] }
-        -> acceptable value stored in DB is "United States-Democratic Party"
-
-      New:
-        "party": { "United States": [{"label": "...", "value": "United States-Democratic Party"}] }
-        -> acceptable value stored in DB is exactly the entry's "value"
-
-    """
-    acceptable: set[str] = set()
-
-    if not isinstance(demo_party, dict):
-        return acceptable
-
-    for country_key, party_list in demo_party.items():
-        if not isinstance(party_list, list):
-            continue
-
-        for p in party_list:
-            # Legacy string party name -> build legacy storage format
-            if isinstance(p, str):
-                acceptable.add(f"{country_key}-{p}")
-                continue
-
-            # New object format -> use value directly
-            if isinstance(p, dict):
-                v = p.get("value")
-                if isinstance(v, str) and v.strip():
-                    acceptable.add(v.strip())
-                    continue
-
-                # If "value" is missing, fall back to label in legacy scheme
-                lbl = p.get("label")
-                if isinstance(lbl, str) and lbl.strip():
-                    acceptable.add(f"{country_key}-{lbl.strip()}")
-
-    return acceptable
+    return demo_registry.load(current_app.config["REL_DIR"])
 
 
 def _validate_how_found_against_file(how_found: Any) -> tuple[str | None, str | None]:
@@ -197,9 +208,11 @@ def _validate_how_found_against_file(how_found: Any) -> tuple[str | None, str |
         logger.exception("[how_found] Failed to load demographics.json for validation")
         return None, "Validation unavailable"
 
-    allowed = demo_valid.get("how_found", [])
-    if not isinstance(allowed, list):
-        return None, "Validation unavailable"
+    allowed = demo_valid["options"].get("how_found")
+    if allowed is None:
+        if "how_found" in demo_valid["keys"]:
+            return None, "Validation unavailable"
+        allowed = frozenset()
 
     if how_found in allowed:
         return how_found, None
@@ -207,6 +220,17 @@ def _validate_how_found_against_file(how_found: Any) -> tuple[str | None, str |
     return None, f"{how_found} is not a valid how_found"
 
 
+def _is_option(demo_valid: Dict[str, Any], dem_key: str, value: Any) -> bool:
+    allowed = demo_valid["options"].get(dem_key)
+    if allowed is not None:
+        return isinstance(value, str) and value in allowed
+    # Non-list fields keep plain membership against the parsed file
+    try:
+        return value in demo_valid["raw"][dem_key]
+    except TypeError:
+        return False
+
+
 def _validate_demographics_against_file(demographics: Dict[str, Any]) -> tuple[Dict[str, Any] | None, str | None]:
     try:
         demo_valid = _load_demo_valid()
@@ -219,7 +243,7 @@ def _validate_demographics_against_file(demographics: Dict[str, Any]) -> tuple[D
 
     for dem_key, dem_val in demographics.items():
 
-        if dem_key not in demo_valid.keys():
+        if dem_key not in demo_valid["keys"]:
             return None, f"{dem_key} is not a valid demographic"
         if dem_key != "identities" and dem_val == "":
             continue
@@ -228,21 +252,16 @@ def _validate_demographics_against_file(demographics: Dict[str, Any]) -> tuple[D
             if dem_val == -1:
                 continue
 
-            # Frontend includes "Over 100" option as 101
-            if int(dem_val) == 101:
-                continue
-
             try:
-                allowed = [int(age_val) for age_val in demo_valid[dem_key]]
-                if int(dem_val) in allowed:
+                # Frontend includes "Over 100" option as 101
+                if int(dem_val) == 101 or int(dem_val) in demo_valid["ages"]:
                     continue
             except Exception:
                 return None, f"{dem_val} is not a valid {dem_key}"
             return None, f"{dem_val} is not a valid {dem_key}"
 
         elif dem_key == "party":
-            acceptable_vals = _flatten_party_values(demo_valid.get("party"))
-            if dem_val in acceptable_vals:
+            if isinstance(dem_val, str) and dem_val in demo_valid["party"]:
                 continue
             return None, f"{dem_val} is not a valid {dem_key}"
 
@@ -255,12 +274,12 @@ def _validate_demographics_against_file(demographics: Dict[str, Any]) -> tuple[D
             for identity in dem_val:
                 if identity == "":
                     continue
-                if identity not in demo_valid[dem_key]:
+                if not _is_option(demo_valid, dem_key, identity):
                     return None, f"{identity} is not a valid {dem_key}"
                 cleaned.append(identity)
             demographics["identities"] = cleaned
 
-        elif dem_val not in demo_valid[dem_key]:
+        elif not _is_option(demo_valid, dem_key, dem_val):
             return None, f"{dem_val} is not a valid {dem_key}"
 
     return demographics, None
@@ -298,22 +317,6 @@ def get_answer_counts():
         session["answer_counts"][str(q_id)][keys[q_ans]] += 1
 
 
-def calculate_results(answers: Dict[int, int], scoring: Dict[int, Dict[str, float]]) -> Dict[str, float]:
-    missing = set(scoring.keys()) - set(answers.keys())
-    if missing:
-        raise KeyError("Missing answers")
-
-    r_scores = {}
-    for q_id, q_scores in scoring.items():
-        r_scores[q_id] = {axis: q_score * answers[q_id] for axis, q_score in q_scores.items()}
-
-    first = next(iter(r_scores.values()))
-    r_sums = {axis: sum([v[axis] for v in r_scores.values()]) for axis in first.keys()}
-
-    max_scores = Questions.get_max_scores()
-    return {axis: round(val / max_scores[axis], 2) for axis, val in r_sums.items()}
-
-
 @v.route("/api/to_form", methods=["POST"])
 def to_form():
     """
@@ -341,18 +344,18 @@ def to_form():
             return {"status": "Invalid request. Please refresh and try again."}, 400
 
         try:
-            scoring = Questions.get_scores(test=False)
+            question_ids = Questions.get_ids()
         except Exception:
             logger.exception("[/api/to_form] Failed to load question scoring data")
             return {"status": "Server error. Please refresh and try again."}, 500
 
         answers = body.answers
 
-        if set(answers.keys()) != set(scoring.keys()):
+        if set(answers.keys()) != question_ids:
             logger.warning("[/api/to_form] Answer keys mismatch")
             return {"status": "Invalid request. Please refresh and try again."}, 400
 
-        results = calculate_results(answers, scoring)
+        results = score_answers(answers)
 
         session["answers"] = answers
         session["results"] = results
@@ -442,69 +445,15 @@ def to_results():
         # ----------------
         # Validate captcha
         # ----------------
-        verify_url = current_app.config.get("HCAPTCHA_VERIFY_URL")
-        secret = current_app.config.get("HCAPTCHA_SECRET_KEY")
-
-        if not verify_url or not secret:
+        if not captcha_verifier.enabled:
             logger.error("[/api/to_results] hCaptcha config missing (url/secret)")
             return {"status": "Captcha verification unavailable. Please try again."}, 503
 
-        data = {
-            "secret": secret,
-            "response": body.captcha,
-        }
-
-        # remoteip is optional; include only if present
-        if request.remote_addr:
-            data["remoteip"] = request.remote_addr
-
-        verify_response = None
-
-        # 1 retry to squash transient network hiccups
-        for attempt in (1, 2):
-            try:
-                resp = requests.post(
-                    url=verify_url,
-                    data=data,
-                    timeout=8,
-                )
-
-                if resp.status_code != 200:
-                    logger.warning(
-                        "[/api/to_results] hCaptcha verify non-200 (attempt %s): status=%s ct=%r body=%r",
-                        attempt,
-                        resp.status_code,
-                        resp.headers.get("Content-Type"),
-                        (resp.text or "")[:200],
-                    )
-                    raise requests.HTTPError(f"Non-200 from hCaptcha: {resp.status_code}")
-
-                try:
-                    verify_response = resp.json()
-                except ValueError as e:
-                    logger.warning(
-                        "[/api/to_results] hCaptcha verify invalid JSON (attempt %s): ct=%r body=%r err=%r",
-                        attempt,
-                        resp.headers.get("Content-Type"),
-                        (resp.text or "")[:200],
-                        e,
-                    )
-                    raise
-
-                break  # success path
-
-            except (requests.RequestException, ValueError) as e:
-                if attempt == 1:
-                    continue  # retry once
-                logger.warning(
-                    "[/api/to_results] Captcha verification unavailable after retry: %r",
-                    e,
-                    exc_info=True,
-                )
-                return {"status": "Captcha verification unavailable. Please try again."}, 503
-
-        if not isinstance(verify_response, dict):
-            logger.warning("[/api/to_results] hCaptcha verify response missing/invalid: %r", verify_response)
+        try:
+            # remoteip is optional; sent only if present
+            verify_response = captcha_verifier.verify(body.captcha, remoteip=request.remote_addr)
+        except CaptchaUnavailable as e:
+            logger.warning("[/api/to_results] Captcha verification unavailable: %s", e)
             return {"status": "Captcha verification unavailable. Please try again."}, 503
 
         if not verify_response.get("success"):
@@ -577,6 +526,63 @@ def to_results():
         return {"status": "Server error. Please refresh and try again."}, 500
 
 
+def _cache_generational(filter_data):
+    # Without a limit "random" order samples nothing, so the result only changes on insert
+    return filter_data["order"] == "recent" or filter_data.get("limit") is None
+
+
+def _cached_datasets_json(filter_data):
+    """
+    Serialised get_filtered_datasets() output, via the response cache.
+
+    "recent" order and unlimited aggregates are cached until the next insert (Redis backend only).
+    "random" order is only cached when the client pins a seed, and then expires by TTL.
+    """
+    recent = _cache_generational(filter_data)
+    if not recent and filter_data.get("seed") is None:
+        return dumps(Results.get_filtered_datasets(filter_data))
+
+    key = filter_cache_key(filter_data, namespace="data")
+    datasets_json = data_cache.get(key, generational=recent)
+    if datasets_json is None:
+        datasets_json = dumps(Results.get_filtered_datasets(filter_data))
+        data_cache.set(key, datasets_json, generational=recent)
+    return datasets_json
+
+
+def _cached_datasets_packed(filter_data):
+    """
+    get_filtered_datasets() output as binary records (see utils/wire.py), cached like
+    _cached_datasets_json. Stored base64-encoded since cache values are text.
+    """
+    recent = _cache_generational(filter_data)
+    if not recent and filter_data.get("seed") is None:
+        return pack_datasets(Results.get_filtered_datasets(filter_data))
+
+    key = filter_cache_key(filter_data, namespace="data-packed")
+    cached = data_cache.get(key, generational=recent)
+    if cached is not None:
+        return base64.b64decode(cached)
+
+    packed = pack_datasets(Results.get_filtered_datasets(filter_data))
+    data_cache.set(key, base64.b64encode(packed).decode("ascii"), generational=recent)
+    return packed
+
+
+def _your_results_dataset():
+    return {
+        "name": "your_results",
+        "label": "Your Results",
+        "custom_dataset": False,
+        "result_id": session.get("results_id"),
+        "color": "salmon",
+        "count": 1,
+        "point_props": [1, 8],
+        "all_scores": [session.get("results")],
+        "answer_counts": session.get("answer_counts")
+    }
+
+
 @v.route("/api/data", methods=["POST"])
 def data_api():
     """
@@ -592,11 +598,12 @@ def data_api():
         400: If request payload is invalid.
         401: If filter validation fails.
         500: If server/database query fails.
+        503: If an aggregate query exceeds AGGREGATE_STATEMENT_TIMEOUT.
     """
     try:
         payload = request.get_json(silent=True)
         if not isinstance(payload, dict):
-            return json.dumps({"status": "Invalid request. Please refresh and try again."}), 400
+            return dumps({"status": "Invalid request. Please refresh and try again."}), 400
 
         try:
             body = DataApiBody(**payload)
@@ -610,31 +617,38 @@ def data_api():
                 bad_request = False
 
             if bad_request:
-                return json.dumps({"status": "Invalid request. Please refresh and try again."}), 400
+                return dumps({"status": "Invalid request. Please refresh and try again."}), 400
 
-            return json.dumps({"status": "Filterset validation failed: Invalid filters"}), 401
+            return dumps({"status": "Filterset validation failed: Invalid filters"}), 401
 
         filter_data = body.data.model_dump(by_alias=True)
-        datasets = Results.get_filtered_datasets(filter_data)
+
+        # Binary encoding when the client prefers it; JSON stays the default
+        if request.accept_mimetypes.best_match(["application/json", WIRE_MIMETYPE]) == WIRE_MIMETYPE:
+            packed = _cached_datasets_packed(filter_data)
+            if "answer_counts" in session:
+                packed = pack_dataset(_your_results_dataset()) + packed
+            return Response(pack_preamble() + packed, mimetype=WIRE_MIMETYPE)
+
+        datasets_json = _cached_datasets_json(filter_data)
 
         if "answer_counts" in session:
-            datasets.insert(0, {
-                "name": "your_results",
-                "label": "Your Results",
-                "custom_dataset": False,
-                "result_id": session.get("results_id"),
-                "color": "salmon",
-                "count": 1,
-                "point_props": [1, 8],
-                "all_scores": [session.get("results")],
-                "answer_counts": session.get("answer_counts")
-            })
-
-        return json.dumps({"status": "success", "compass_datasets": datasets}), 200
+            your_results = dumps(_your_results_dataset())
+            datasets_json = f"[{your_results}, {datasets_json[1:]}" if datasets_json != "[]" else f"[{your_results}]"
+
+        return f'{{"status": "success", "compass_datasets": {datasets_json}}}', 200
+
+    except OperationalError as e:
+        # 57014: query_canceled, i.e. AGGREGATE_STATEMENT_TIMEOUT
+        if getattr(e.orig, "pgcode", None) != "57014":
+            logger.exception("[/api/data] Unhandled error")
+            return dumps({"status": "Server error. Please refresh and try again."}), 500
+        logger.warning("[/api/data] Aggregate query timed out")
+        return dumps({"status": "Query took too long. Please narrow the filters or date range."}), 503
 
     except Exception:
         logger.exception("[/api/data] Unhandled error")
-        return json.dumps({"status": "Server error. Please refresh and try again."}), 500
+        return dumps({"status": "Server error. Please refresh and try again."}), 500
 
 
 @v.route("/api/get_filterset_count", methods=["POST"])
@@ -656,7 +670,7 @@ def get_filterset_count():
     try:
         payload = request.get_json(silent=True)
         if not isinstance(payload, dict):
-            return json.dumps({"status": "Invalid request. Please refresh and try again."}), 400
+            return dumps({"status": "Invalid request. Please refresh and try again."}), 400
 
         try:
             body = FilterCountBody(**payload)
@@ -670,14 +684,110 @@ def get_filterset_count():
                 bad_request = False
 
             if bad_request:
-                return json.dumps({"status": "Invalid request. Please refresh and try again."}), 400
+                return dumps({"status": "Invalid request. Please refresh and try again."}), 400
 
-            return json.dumps({"status": "Filterset validation failed: Invalid filters"}), 401
+            return dumps({"status": "Filterset validation failed: Invalid filters"}), 401
 
         filter_data = body.data.model_dump(by_alias=True)
-        counts = Results.get_filtered_dataset_count(filter_data)
-        return json.dumps({"status": "success", "counts": counts}), 200
+        counts, exact = Results.get_filtered_dataset_count(filter_data, with_accuracy=True)
+        return dumps({"status": "success", "counts": counts, "exact": exact}), 200
 
     except Exception:
         logger.exception("[/api/get_filterset_count] Unhandled error")
-        return json.dumps({"status": "Server error. Please refresh and try again."}), 500
+        return dumps({"status": "Server error. Please refresh and try again."}), 500
+
+
+@v.route("/api/snapshots/index", methods=["GET"])
+def index_snapshot():
+    """
+    Serve the precomputed homepage sample clouds (see jobs.py snapshot_index).
+
+    Args:
+        None
+
+    Returns:
+        Response: JSON snapshot with ETag/Last-Modified and public Cache-Control.
+
+    Raises:
+        404: If the snapshot has not been generated yet.
+    """
+    path = os.path.join(current_app.config["REL_DIR"], INDEX_SNAPSHOT_PATH)
+    if not os.path.isfile(path):
+        return {"status": "Snapshot unavailable."}, 404
+
+    resp = send_file(
+        path,
+        mimetype="application/json",
+        conditional=True,
+        etag=True,
+        max_age=current_app.config.get("SNAPSHOT_MAX_AGE", 300),
+    )
+    resp.cache_control.public = True
+    return resp
+
+
+@v.route("/api/export", methods=["GET", "POST"])
+def export_results():
+    """
+    Stream the results dataset as CSV, NDJSON or Parquet (public data dump).
+
+    Options come from the query string (GET) or a JSON body (POST): format, compression,
+    min-date, max-date and, for POST, an optional filterset. Rows are read with a server-side
+    cursor and encoded chunk by chunk, so memory use does not grow with the table.
+
+    Args:
+        None
+
+    Returns:
+        Response: streamed attachment.
+
+    Raises:
+        400: If options are invalid or the format's package is not installed.
+        404: If EXPORT_API is disabled.
+        503: If EXPORT_MAX_CONCURRENT exports are already streaming.
+    """
+    if not current_app.config.get("EXPORT_API"):
+        return {"status": "Not found."}, 404
+
+    payload = request.get_json(silent=True) if request.method == "POST" else request.args.to_dict()
+    if not isinstance(payload, dict):
+        return {"status": "Invalid request. Please refresh and try again."}, 400
+
+    try:
+        body = ExportBody(**payload)
+        check_export(body.format, body.compression)
+    except (ValidationError, ValueError) as e:
+        logger.warning("[/api/export] Invalid export request: %s", str(e))
+        return {"status": "Invalid export request."}, 400
+
+    if not export_slots.acquire():
+        logger.warning("[/api/export] Export slots full")
+        return {"status": "Too many exports in progress. Please try again shortly."}, 503
+
+    filterset = body.filterset.model_dump(by_alias=True) if body.filterset else None
+    chunks = Results.iter_export(
+        filterset=filterset,
+        min_d=body.min_date,
+        max_d=body.max_date,
+        chunk_size=current_app.config.get("EXPORT_CHUNK_SIZE", 1000),
+    )
+
+    def generate():
+        try:
+            yield from stream_export(chunks, body.format, body.compression)
+        except Exception:
+            # Headers are already sent; the client sees a truncated download
+            logger.exception("[/api/export] Export failed mid-stream")
+            raise
+
+    resp = Response(
+        stream_with_context(generate()),
+        mimetype=export_mimetype(body.format, body.compression),
+        headers={
+            "Content-Disposition": f"attachment; filename={export_filename(body.format, body.compression)}",
+            "X-Accel-Buffering": "no",
+        },
+    )
+    # Runs when the response is closed, whether or not the stream was read to the end
+    resp.call_on_close(export_slots.release)
+    return resp
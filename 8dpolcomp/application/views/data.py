@@ -1,13 +1,13 @@
 
-import json
 import logging
-import os
 from uuid import UUID
 
 from flask import Blueprint, render_template, session, current_app, request
 
 from application.controllers.questions import QuestionsController as Questions
 from application.controllers.results import ResultsController as Results
+from application.utils.demographics import demo_registry
+from application.utils.serialise import dumps
 
 
 logger = logging.getLogger(__name__)
@@ -54,7 +54,7 @@ def data():
             if parsed:
                 page_gid = parsed
 
-        questions = Questions.get_all()
+        questions = Questions.get_rows()
 
         datasets = []
         if "answer_counts" in session:
@@ -70,21 +70,17 @@ def data():
                 "answer_counts": session.get("answer_counts")
             })
 
-        columns = []
-        if questions:
-            columns = list(questions[0].__mapper__.column_attrs.keys())
+        columns = Questions.get_columns() if questions else []
 
         data = {
             "questions": questions,
             "columns": columns,
-            "compass_datasets": json.dumps(datasets),
+            "compass_datasets": dumps(datasets),
             "completed_count": Results.get_count(),
             "group_id": page_gid or ""
         }
 
-        demo_path = os.path.join(current_app.config["REL_DIR"], "application/data/demographics/demographics.json")
-        with open(demo_path, "r", encoding="utf-8") as f:
-            demo = json.load(f)
+        demo = demo_registry.load(current_app.config["REL_DIR"])["raw"]
 
         return render_template("pages/data.html", data=data, demo=demo)
 
@@ -94,7 +90,7 @@ def data():
         data = {
             "questions": [],
             "columns": [],
-            "compass_datasets": json.dumps([]),
+            "compass_datasets": dumps([]),
             "completed_count": 0,
             "group_id": ""
         }
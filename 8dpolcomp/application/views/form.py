@@ -1,10 +1,10 @@
 
-import json
 import logging
-import os
 
 from flask import Blueprint, render_template, session, request, redirect, url_for, current_app
 
+from application.utils.demographics import demo_registry
+
 
 logger = logging.getLogger(__name__)
 
@@ -35,10 +35,7 @@ def form():
         return redirect(url_for(f"{session['template']}.{session['template']}"))
 
     try:
-        demo_path = os.path.join(current_app.config["REL_DIR"], "application/data/demographics/demographics.json")
-        with open(demo_path, "r", encoding="utf-8") as f:
-            demo = json.load(f)
-            f.close()
+        demo = demo_registry.load(current_app.config["REL_DIR"])["raw"]
     except Exception:
         logger.exception("[/form] Failed to load demographics.json")
         session["template"] = "form"
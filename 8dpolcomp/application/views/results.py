@@ -1,13 +1,13 @@
 
-import json
+import hashlib
 import logging
-import os
 
-import numpy as np
-
-from flask import Blueprint, render_template, current_app, session, redirect, url_for
+from flask import Blueprint, render_template, current_app, session, redirect, request, url_for, make_response
 
 from application.controllers.results import ResultsController as Results
+from application.utils.cache import results_page_cache
+from application.utils.matching import closest_matcher
+from application.utils.serialise import compress_response, dumps
 
 
 logger = logging.getLogger(__name__)
@@ -16,41 +16,32 @@ logger = logging.getLogger(__name__)
 v = Blueprint("results", __name__)
 
 
-def euclidean_distances(results, avgs, power=1.3):
-    if not isinstance(results, dict) or not isinstance(avgs, dict):
-        raise ValueError("Invalid distance inputs")
-
-    distances = {}
-    for identity, avg in avgs.items():
-        keys = set(results.keys()).union(avg.keys())
-        distance = 1 / (1 + np.linalg.norm([abs(results.get(key, 0) - avg.get(key, 0)) ** power for key in keys]))
-        distances[identity] = distance
-    return sorted(distances.items(), key=lambda x: x[1], reverse=True)
+@v.after_request
+def _compress(response):
+    return compress_response(response, request, current_app.config)
 
 
 def get_closest_matches(results):
     try:
-        avg_path = os.path.join(current_app.config["REL_DIR"], "application/data/demographics/axis_averages.json")
-        with open(avg_path, "r", encoding="utf-8") as f:
-            avgs = json.load(f)
+        return closest_matcher.match(results, current_app.config["REL_DIR"])
     except Exception:
         logger.exception("[get_closest_matches] Failed to load axis_averages.json")
         return {"overall": []}
 
-    axes = results.keys()
-    distances_by_axis = {"overall": euclidean_distances(results, avgs, power=1)}
-
-    for axis in axes:
-        single_axis_result = {axis: results[axis]}
-        distances_by_axis[axis] = euclidean_distances(single_axis_result, avgs, power=1.5)
 
-    return distances_by_axis
+def _page_response(body, etag):
+    resp = make_response(body)
+    resp.set_etag(etag)
+    return resp.make_conditional(request)
 
 
 def serve_results_by_id(results_id, result_name, color):
     """
     Render results for a specific result ID.
 
+    Rendered pages are cached by result ID, closest-match averages version and the visitor's own
+    results_id (shown in the header), and served with a strong ETag for conditional GET.
+
     Args:
         results_id (int): Database result ID.
         result_name (str): Display name for the result.
@@ -61,7 +52,18 @@ def serve_results_by_id(results_id, result_name, color):
 
     Raises:
         302: Redirects to instructions if results cannot be loaded.
+        304: If the client's cached copy is current.
     """
+    cache_key = ":".join(str(part) for part in (
+        "results", results_id, result_name, color,
+        closest_matcher.version(current_app.config["REL_DIR"]),
+        session.get("results_id"),
+    ))
+    cached = results_page_cache.get(cache_key)
+    if cached is not None:
+        etag, body = cached.split("\n", 1)
+        return _page_response(body, etag)
+
     try:
         id_results = Results.get_results_from_id(results_id + 1)
     except Exception:
@@ -78,7 +80,7 @@ def serve_results_by_id(results_id, result_name, color):
         group_id = str(id_results.group_id) if getattr(id_results, "group_id", None) else None
 
         data = {
-            "compass_datasets": json.dumps([{
+            "compass_datasets": dumps([{
                 "name": f"test_no_{result_name.replace(' ', '_')}",
                 "label": f"Test #{result_name}",
                 "custom_dataset": False,
@@ -89,7 +91,7 @@ def serve_results_by_id(results_id, result_name, color):
                 "all_scores": [scores],
             }]),
             "results_id": results_id,
-            "closest_matches": json.dumps(get_closest_matches(scores)),
+            "closest_matches": dumps(get_closest_matches(scores)),
             "group_id": group_id
         }
     except Exception:
@@ -97,7 +99,10 @@ def serve_results_by_id(results_id, result_name, color):
         session["template"] = "instructions"
         return redirect(url_for("instructions.instructions"))
 
-    return render_template("pages/results.html", data=data)
+    body = render_template("pages/results.html", data=data)
+    etag = hashlib.sha256(body.encode("utf-8")).hexdigest()[:32]
+    results_page_cache.set(cache_key, f"{etag}\n{body}")
+    return _page_response(body, etag)
 
 
 @v.route("/results/<int:results_id>", methods=["GET"])
@@ -1,5 +1,4 @@
 
-import json
 import logging
 
 from flask import Blueprint, render_template, session, request, redirect, url_for
@@ -37,7 +36,7 @@ def test():
 
     # Get question texts, pass to front.
     try:
-        texts = json.dumps(Questions.get_texts(test=False))
+        texts = Questions.get_texts_json()
     except Exception:
         logger.exception("[/test] Failed to load question texts")
         session["template"] = "instructions"
@@ -1,6 +1,8 @@
 
 import sys
 import json
+import time
+import argparse
 import logging
 from pathlib import Path
 
@@ -26,17 +28,31 @@ if not logger.handlers:
 
 # ---------- jobs ----------
 
-def job_avg_identities(app):
+def job_avg_identities(app, argv=()):
     """
     Calculates and saves average axis values per identity.
-    Intended schedule: monthly
+    Intended schedule: hourly with --incremental; monthly without (full recompute)
     Output: application/data/demographics/axis_averages.json
+    Options:
+        --incremental      fold in only results inserted since the last run, using stored running sums
+                           (falls back to a full run if no state exists)
+        --settle-seconds   leave results inserted this recently for the next run, so inserts that
+                           commit late are not skipped (default 600)
     """
-    
+
+    from datetime import date, datetime
+
     from application.controllers.results import ResultsController as Results
 
+    parser = argparse.ArgumentParser(prog="jobs.py avg_identities")
+    parser.add_argument("--incremental", action="store_true")
+    parser.add_argument("--settle-seconds", type=int, default=600)
+    args = parser.parse_args(list(argv))
+
     demo_path = PROJECT_ROOT / "application" / "data" / "demographics" / "demographics.json"
     avgs_path = PROJECT_ROOT / "application" / "data" / "demographics" / "axis_averages.json"
+    # Running sums/counts and the (inserted_at, id) watermark of the last result folded in
+    state_path = PROJECT_ROOT / "application" / "data" / "demographics" / "axis_averages_state.json"
 
     logger.info("Loading demographics: %s", demo_path)
 
@@ -45,26 +61,547 @@ def job_avg_identities(app):
         identities = list(demographics["identities"])
         identities.append("Average Result")
 
-    logger.info("Calculating averages for %d identities...", len(identities))
+    state = None
+    if args.incremental:
+        try:
+            with open(state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            logger.info("No state at %s, running a full recompute", state_path)
+        if state is not None and "after" not in state:
+            # Older states tracked ids (a last id or a set of seen ids) rather than the watermark
+            logger.info("State at %s predates the (inserted_at, id) watermark, running a full recompute", state_path)
+            state = None
 
     with app.app_context():
-        avg_identities = Results.get_avg_identities(identities, min_results=50)
+        if state is None:
+            logger.info("Calculating averages for %d identities...", len(identities))
+            after, groups = Results.get_identity_sums(
+                date(2023, 1, 1), date.today(), settle_seconds=args.settle_seconds
+            )
+        else:
+            after = state["after"] and (datetime.fromisoformat(state["after"][0]), state["after"][1])
+            logger.info("Folding in results inserted after %s...", state["after"])
+            after, new_groups = Results.get_identity_sums(
+                date(2023, 1, 1), date.today(), after=after, settle_seconds=args.settle_seconds
+            )
+            groups = state["groups"]
+            for key, group in new_groups.items():
+                running = groups.setdefault(key, {"n": 0, "sums": {axis: 0.0 for axis in group["sums"]}})
+                running["n"] += group["n"]
+                for axis, total in group["sums"].items():
+                    running["sums"][axis] += total
+            logger.info("Folded in %d results", new_groups.get("Average Result", {}).get("n", 0))
+
+        avg_identities = Results.identity_averages(groups, identities, min_results=50)
 
     logger.info("Writing averages: %s", avgs_path)
 
     with open(avgs_path, "w", encoding="utf-8") as f:
         json.dump(avg_identities, f, indent=4)
 
+    with open(state_path, "w", encoding="utf-8") as f:
+        json.dump({"after": after and [after[0].isoformat(), after[1]], "groups": groups}, f)
+
     logger.info("Job output written successfully.")
 
 
+def job_rescore_results(app, argv=()):
+    """
+    Recomputes stored Results.scores from Results.answers using current question weights, then
+    re-rolls the ResultsDailyRollup days that changed.
+    Intended schedule: on demand, after the Questions table changes
+    Options:
+        --start-id / --end-id  inclusive id range (resume from the last logged id)
+        --chunk-size           rows streamed per round trip
+        --dry-run              log a diff of changed scores without writing
+    """
+
+    from application.controllers.results import ResultsController as Results
+    from application.controllers.rollups import RollupsController as Rollups
+    from application.utils.catalogue import AXES, catalogue
+    from application.utils.scoring import answers_to_vector, score_matrix
+
+    parser = argparse.ArgumentParser(prog="jobs.py rescore_results")
+    parser.add_argument("--start-id", type=int, default=None)
+    parser.add_argument("--end-id", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--max-diffs", type=int, default=20, help="Diff lines to log in dry-run mode")
+    args = parser.parse_args(list(argv))
+
+    with app.app_context():
+        catalogue.invalidate()
+        catalogue.load()
+
+        scanned = changed = written = invalid = 0
+        diffs_logged = 0
+        touched_days = set()
+        max_delta = {axis: 0.0 for axis in AXES}
+        started = time.monotonic()
+
+        logger.info(
+            "Re-scoring results: ids [%s, %s], chunk=%d, dry_run=%s",
+            args.start_id, args.end_id, args.chunk_size, args.dry_run
+        )
+
+        for chunk in Results.iter_answers(args.start_id, args.end_id, chunk_size=args.chunk_size):
+            ids, vecs, old_scores = [], [], []
+            for row_id, answers, scores in chunk:
+                try:
+                    vecs.append(answers_to_vector(answers or {}))
+                except (KeyError, TypeError, ValueError):
+                    invalid += 1
+                    continue
+                ids.append(row_id)
+                old_scores.append(scores or {})
+
+            updates = []
+            if vecs:
+                new_mat = score_matrix(vecs)
+                for row_id, old, row in zip(ids, old_scores, new_mat):
+                    new = {axis: round(float(row[j]), 2) for j, axis in enumerate(AXES)}
+                    if new == {axis: old.get(axis) for axis in AXES}:
+                        continue
+
+                    updates.append((row_id, new))
+                    for axis in AXES:
+                        delta = abs(new[axis] - float(old.get(axis) or 0))
+                        max_delta[axis] = max(max_delta[axis], delta)
+
+                    if args.dry_run and diffs_logged < args.max_diffs:
+                        logger.info("  id=%d %s", row_id, {
+                            axis: (old.get(axis), new[axis]) for axis in AXES if old.get(axis) != new[axis]
+                        })
+                        diffs_logged += 1
+
+            if updates and not args.dry_run:
+                days = Results.bulk_update_scores(updates)
+                written += len(days)
+                touched_days.update(days)
+
+            scanned += len(chunk)
+            changed += len(updates)
+            elapsed = time.monotonic() - started
+            logger.info(
+                "Progress: last_id=%d scanned=%d changed=%d invalid=%d (%.0f rows/s)",
+                chunk[-1][0], scanned, changed, invalid, scanned / elapsed if elapsed else 0
+            )
+
+        # Rollups hold score sums, so days with rescored results are stale until re-rolled.
+        # Days after the recorded coverage are read from Results and rolled by the next run.
+        state = Rollups.state()
+        if state is not None:
+            stale = sorted(day for day in touched_days if day <= state.covered_to)
+            # Consecutive days in one pass, up to a week as in rollup_results
+            runs = []
+            for day in stale:
+                if runs and (day - runs[-1][1]).days == 1 and (day - runs[-1][0]).days < 7:
+                    runs[-1][1] = day
+                else:
+                    runs.append([day, day])
+            for first, last in runs:
+                Rollups.rollup_days(first, last)
+            logger.info("Re-rolled %d rollup days with rescored results", len(stale))
+
+    logger.info("Re-score summary: scanned=%d changed=%d written=%d invalid=%d", scanned, changed, written, invalid)
+    logger.info("Max absolute change per axis: %s", {axis: round(v, 2) for axis, v in max_delta.items()})
+    if args.dry_run:
+        logger.info("Dry run: no rows written.")
+
+
+def job_snapshot_index(app, argv=()):
+    """
+    Materialises the homepage sample clouds (recent/left/right/centrist 1000) with means and medians.
+    Intended schedule: hourly
+    Output: application/data/snapshots/index_samples.json (served by /api/snapshots/index)
+    """
+
+    from application.controllers.results import ResultsController as Results
+    from application.utils.snapshots import INDEX_SNAPSHOT_PATH, write_snapshot
+
+    out_path = PROJECT_ROOT / INDEX_SNAPSHOT_PATH
+
+    logger.info("Building homepage snapshot...")
+
+    with app.app_context():
+        snapshot = Results.build_index_snapshot()
+
+    for key, sample in snapshot["samples"].items():
+        logger.info("  %s: %d results", key, sample["count"])
+
+    logger.info("Writing snapshot: %s", out_path)
+    write_snapshot(snapshot, out_path)
+    logger.info("Job output written successfully.")
+
+
+def job_sample_rank(app, argv=()):
+    """
+    Assigns fresh random Results.sample_rank values, refreshing the random sample windows.
+    Intended schedule: monthly (the column itself is added by `migrate`)
+    """
+
+    from sqlalchemy import text
+    from application import db
+    from application.models.results import Results
+
+    table = Results.__table__.name
+
+    with app.app_context():
+        with db.engine.begin() as conn:
+            logger.info("Reshuffling sample ranks...")
+            n = conn.execute(text(f"UPDATE {table} SET sample_rank = random()")).rowcount
+            logger.info("Reshuffled %d rows", n)
+
+        with db.engine.begin() as conn:
+            conn.execute(text(f"ANALYZE {table}"))
+
+
+def job_migrate(app, argv=()):
+    """
+    Applies declared tables, columns and indexes to the database, then verifies filter indexes.
+    Intended schedule: on deploy
+    Options:
+        --concurrently  build indexes without blocking writes
+        --skip-check    skip the EXPLAIN index check
+    """
+
+    from application.utils.migrations import ensure_schema
+
+    parser = argparse.ArgumentParser(prog="jobs.py migrate")
+    parser.add_argument("--concurrently", action="store_true")
+    parser.add_argument("--skip-check", action="store_true")
+    args = parser.parse_args(list(argv))
+
+    with app.app_context():
+        created = ensure_schema(concurrently=args.concurrently)
+
+    for kind, names in created.items():
+        logger.info("Created %s: %s", kind, ", ".join(names) if names else "none")
+
+    if not args.skip_check:
+        job_check_indexes(app)
+
+
+def job_check_indexes(app, argv=()):
+    """
+    EXPLAINs each data explorer filter type and fails if it cannot use its index.
+    Intended schedule: on deploy (run by `migrate`)
+    """
+
+    from application.utils.migrations import check_filter_indexes
+
+    with app.app_context():
+        report = check_filter_indexes()
+
+    failed = []
+    for name, (ok, used) in report.items():
+        logger.info("  %-18s %s  (plan indexes: %s)", name, "OK  " if ok else "FAIL", ", ".join(used) or "none")
+        if not ok:
+            failed.append(name)
+
+    if failed:
+        raise RuntimeError(f"Filters not using their index: {', '.join(failed)}")
+    logger.info("All filter types use their indexes.")
+
+
+def job_bench_sampling(app, argv=()):
+    """
+    Benchmarks the sample_rank window sampler against ORDER BY random().
+    Intended schedule: on demand
+    """
+
+    import statistics
+    from datetime import date
+    from sqlalchemy import and_, select
+    from sqlalchemy.sql.expression import func
+    from application import db
+    from application.controllers.results import ResultsController as Results
+    from application.models.results import Results as ResultsModel
+
+    parser = argparse.ArgumentParser(prog="jobs.py bench_sampling")
+    parser.add_argument("--limit", type=int, default=2500)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args(list(argv))
+
+    filtersets = {
+        "unfiltered": {},
+        "identity": {"identities": ["Left-Wing"], "any-all": "any"},
+        "country+age": {"country": ["United States"], "min-age": 18, "max-age": 35},
+        "no-match": {"party": ["-"]},
+    }
+
+    def timed(stmt):
+        times = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            db.session.execute(stmt).all()
+            times.append((time.perf_counter() - started) * 1000)
+        return statistics.median(times)
+
+    with app.app_context():
+        logger.info("Rows in table: %d", Results.get_count())
+
+        for name, filterset in filtersets.items():
+            base = select(ResultsModel.id).where(and_(
+                ResultsModel.date >= date(2023, 1, 1), ResultsModel.date <= date.today()
+            ))
+            base = Results._apply_filterset(base, filterset)
+
+            legacy_ms = timed(base.order_by(func.random()).limit(args.limit))
+            window_ms = timed(Results._random_window(base, args.limit))
+
+            logger.info(
+                "%-12s ORDER BY random(): %8.1f ms | sample_rank window: %8.1f ms | x%.1f",
+                name, legacy_ms, window_ms, legacy_ms / window_ms if window_ms else 0
+            )
+
+
+def _backfill_id_range(prog, argv, update_range, default_chunk=10000):
+    """
+    Runs update_range(lo, hi) over Results ids in resumable chunks with progress logging.
+    Options: --start-id / --end-id (inclusive), --chunk-size. Requires an app context.
+    """
+
+    from sqlalchemy.sql.expression import func
+    from application import db
+    from application.models.results import Results
+
+    parser = argparse.ArgumentParser(prog=f"jobs.py {prog}")
+    parser.add_argument("--start-id", type=int, default=None)
+    parser.add_argument("--end-id", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=default_chunk)
+    args = parser.parse_args(list(argv))
+
+    min_id, max_id = db.session.query(func.min(Results.id), func.max(Results.id)).one()
+    if min_id is None:
+        logger.info("No results to backfill.")
+        return 0
+
+    start_id = args.start_id if args.start_id is not None else min_id
+    end_id = args.end_id if args.end_id is not None else max_id
+    started = time.monotonic()
+    updated = 0
+
+    logger.info("Backfilling ids [%d, %d] in chunks of %d", start_id, end_id, args.chunk_size)
+
+    for lo in range(start_id, end_id + 1, args.chunk_size):
+        hi = min(lo + args.chunk_size - 1, end_id)
+        updated += update_range(lo, hi)
+        elapsed = time.monotonic() - started
+        logger.info(
+            "Progress: last_id=%d updated=%d (%.0f rows/s)",
+            hi, updated, updated / elapsed if elapsed else 0
+        )
+
+    logger.info("Backfill complete: %d rows updated", updated)
+    return updated
+
+
+def job_backfill_demographics(app, argv=()):
+    """
+    Fills the typed demographic columns on Results from the demographics JSONB.
+    Intended schedule: once after `migrate`, then set TYPED_DEMOGRAPHIC_FILTERS=true
+    Options:
+        --start-id / --end-id  inclusive id range (resume from the last logged id)
+        --chunk-size           ids per UPDATE
+    """
+
+    from application.controllers.demographics import DemographicsController as Demographics
+
+    with app.app_context():
+        logger.info("Seeding demographic codes...")
+        logger.info("Inserted %d new codes", Demographics.seed_codes_from_results())
+
+        _backfill_id_range("backfill_demographics", argv, Demographics.backfill_range)
+
+
+def job_backfill_arrays(app, argv=()):
+    """
+    Fills Results.answers_arr/scores_arr from the answers/scores JSONB.
+    Intended schedule: once after `migrate`, then set ARRAY_RESULT_COLUMNS=true
+    Options:
+        --start-id / --end-id  inclusive id range (resume from the last logged id)
+        --chunk-size           ids per UPDATE
+    """
+
+    from application.controllers.results import ResultsController as Results
+
+    with app.app_context():
+        _backfill_id_range("backfill_arrays", argv, Results.backfill_arrays_range)
+
+
+def job_rebuild_counts(app, argv=()):
+    """
+    Recomputes the ResultCounts table used to answer filterset counts.
+    Intended schedule: once after `migrate`, then set FILTER_COUNTS=exact|estimate; re-run if counts drift
+    """
+
+    from application.controllers.counts import CountsController as Counts
+
+    with app.app_context():
+        started = time.monotonic()
+        written = Counts.rebuild()
+        logger.info("Rebuilt %d count rows in %.1fs", written, time.monotonic() - started)
+
+
+def job_rollup_results(app, argv=()):
+    """
+    Maintains ResultsDailyRollup for closed days (up to yesterday, UTC).
+    Intended schedule: daily, shortly after midnight UTC; `--full` once before enabling
+    ROLLUP_QUERIES, and after deletions (rescore_results re-rolls the days it changes)
+    Options:
+        --days N           re-roll the last N closed days (default 3, to absorb late writes), any days
+                           since the recorded coverage, and older days that received inserts since
+                           the last run (write-behind replays, backdated imports)
+        --overlap-seconds  rescan window for inserts that commit late (default 600)
+        --full             re-roll every day with results and record coverage up to yesterday
+    """
+
+    from datetime import datetime, timedelta, timezone
+
+    from sqlalchemy import select
+    from sqlalchemy.sql.expression import func
+    from application import db
+    from application.controllers.rollups import RollupsController as Rollups
+    from application.models.results import Results
+
+    parser = argparse.ArgumentParser(prog="jobs.py rollup_results")
+    parser.add_argument("--days", type=int, default=3)
+    parser.add_argument("--full", action="store_true")
+    parser.add_argument("--settle-seconds", type=int, default=600)
+    args = parser.parse_args(list(argv))
+
+    with app.app_context():
+        rolled_at = db.session.query(func.now()).scalar()
+        end = datetime.now(timezone.utc).date() - timedelta(days=1)
+        state = Rollups.state()
+
+        if args.full:
+            start = db.session.query(func.min(Results.date)).scalar()
+            if start is None:
+                Rollups.record_coverage(end, rolled_at)
+                logger.info("No results to roll up; coverage recorded to %s", end)
+                return
+        else:
+            start = end - timedelta(days=args.days - 1)
+            if state is not None:
+                # Close any gap since the last run so coverage stays contiguous
+                start = min(start, state.covered_to + timedelta(days=1))
+
+        started = time.monotonic()
+        total_results = total_rows = 0
+
+        # A week per pass keeps memory bounded
+        day = start
+        while day <= end:
+            chunk_end = min(day + timedelta(days=6), end)
+            n_results, n_rows = Rollups.rollup_days(day, chunk_end)
+            total_results += n_results
+            total_rows += n_rows
+            logger.info("Rolled %s..%s: %d results -> %d rows", day, chunk_end, n_results, n_rows)
+            day = chunk_end + timedelta(days=1)
+
+        if not args.full and state is not None:
+            # Write-behind replays insert rows dated days earlier, and ids do not follow commit order,
+            # so older days with new rows are found by insert time
+            late_days = db.session.scalars(
+                select(Results.date).distinct()
+                .where(Results.inserted_at >= state.rolled_at - timedelta(seconds=args.overlap_seconds))
+                .where(Results.date < start)
+                .order_by(Results.date)
+            ).all()
+            for day in late_days:
+                n_results, n_rows = Rollups.rollup_days(day, day)
+                total_results += n_results
+                total_rows += n_rows
+                logger.info("Re-rolled %s (late inserts): %d results -> %d rows", day, n_results, n_rows)
+
+        if args.full or state is not None:
+            Rollups.record_coverage(end, rolled_at)
+            logger.info("Coverage recorded to %s", end)
+        else:
+            logger.warning("No coverage recorded; run with --full before enabling ROLLUP_QUERIES")
+
+        logger.info(
+            "Rollup complete: %d results -> %d rows in %.1fs",
+            total_results, total_rows, time.monotonic() - started
+        )
+
+
+def job_export_results(app, argv=()):
+    """
+    Writes the results dataset as a public data dump, streaming so memory stays flat.
+    Intended schedule: daily or on demand
+    Output: application/data/exports/8dpolcomp_results.<ext> (or --out)
+    Options:
+        --format csv|ndjson|parquet       (default csv)
+        --compression none|gzip|zstd      (default gzip; parquet compresses internally)
+        --min-date / --max-date YYYY-MM-DD
+        --filterset JSON                  frontend filterset, e.g. '{"country": ["Germany"]}'
+        --chunk-size N                    rows per cursor fetch (default 1000)
+        --out PATH
+    """
+
+    import os
+    from datetime import date
+
+    from application.controllers.results import ResultsController as Results
+    from application.utils.export import check_export, export_filename, stream_export
+
+    parser = argparse.ArgumentParser(prog="jobs.py export_results")
+    parser.add_argument("--format", default="csv", choices=["csv", "ndjson", "parquet"])
+    parser.add_argument("--compression", default="gzip", choices=["none", "gzip", "zstd"])
+    parser.add_argument("--min-date", type=date.fromisoformat, default=None)
+    parser.add_argument("--max-date", type=date.fromisoformat, default=None)
+    parser.add_argument("--filterset", type=json.loads, default=None)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(list(argv))
+
+    check_export(args.format, args.compression)
+
+    out_path = Path(args.out) if args.out else (
+        PROJECT_ROOT / "application" / "data" / "exports" / export_filename(args.format, args.compression)
+    )
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+
+    logger.info("Exporting results to %s...", out_path)
+    started = time.monotonic()
+    written = 0
+
+    with app.app_context():
+        chunks = Results.iter_export(
+            filterset=args.filterset, min_d=args.min_date, max_d=args.max_date, chunk_size=args.chunk_size
+        )
+        with open(tmp_path, "wb") as f:
+            for data in stream_export(chunks, args.format, args.compression):
+                f.write(data)
+                written += len(data)
+
+    os.replace(tmp_path, out_path)
+    logger.info("Export complete: %.1f MB in %.1fs", written / 1e6, time.monotonic() - started)
+
+
 JOBS = {
     "avg_identities": job_avg_identities,
+    "rescore_results": job_rescore_results,
+    "snapshot_index": job_snapshot_index,
+    "sample_rank": job_sample_rank,
+    "migrate": job_migrate,
+    "check_indexes": job_check_indexes,
+    "backfill_demographics": job_backfill_demographics,
+    "backfill_arrays": job_backfill_arrays,
+    "rebuild_counts": job_rebuild_counts,
+    "rollup_results": job_rollup_results,
+    "export_results": job_export_results,
+    "bench_sampling": job_bench_sampling,
 }
 
 
 def print_help():
-    logger.info("Usage:\n  python jobs.py list\n  python jobs.py <job_name>\n")
+    logger.info("Usage:\n  python jobs.py list\n  python jobs.py <job_name> [options]\n")
     logger.info("Available jobs:")
     for name in JOBS:
         logger.info("  - %s", name)
@@ -91,7 +628,7 @@ def main():
 
     logger.info("Running job: %s", cmd)
     try:
-        job_fn(app)
+        job_fn(app, sys.argv[2:])
     except Exception:
         logger.exception("Job failed: %s", cmd)
         sys.exit(3)
@@ -0,0 +1,180 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from application.utils.captcha import CaptchaUnavailable, CaptchaVerifier
+
+
+class _StubVerifyServer(ThreadingHTTPServer):
+    """
+    Local siteverify stand-in. Each POST takes the next queued behaviour:
+    ("ok", success), ("status", code) or ("sleep", seconds); the last one repeats.
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _StubVerifyHandler)
+        self.behaviours = [("ok", True)]
+        self.hits = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/siteverify"
+
+    def next_behaviour(self):
+        with self.lock:
+            self.hits += 1
+            return self.behaviours.pop(0) if len(self.behaviours) > 1 else self.behaviours[0]
+
+
+class _StubVerifyHandler(BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        kind, value = self.server.next_behaviour()
+
+        if kind == "sleep":
+            time.sleep(value)
+            kind, value = "ok", True
+
+        if kind == "status":
+            body, status = b"unavailable", value
+        else:
+            body, status = json.dumps({"success": value}).encode(), 200
+
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up (timeout tests)
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    server = _StubVerifyServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _verifier(stub, **overrides):
+    config = {
+        "HCAPTCHA_VERIFY_URL": stub.url,
+        "HCAPTCHA_SECRET_KEY": "test-secret",
+        "HCAPTCHA_TIMEOUT": 0.5,
+        "HCAPTCHA_DEADLINE": 2,
+        "HCAPTCHA_RETRIES": 1,
+        "HCAPTCHA_POOL_SIZE": 2,
+        "HCAPTCHA_BREAKER_THRESHOLD": 2,
+        "HCAPTCHA_BREAKER_COOLDOWN": 0.3,
+    }
+    config.update(overrides)
+    verifier = CaptchaVerifier()
+    verifier.configure(config)
+    return verifier
+
+
+def test_verify_passes_through_response(stub):
+    stub.behaviours = [("ok", False)]
+    verifier = _verifier(stub)
+
+    assert verifier.verify("token") == {"success": False}
+    assert verifier.stats()["rejected"] == 1
+
+
+def test_retry_after_server_error(stub):
+    stub.behaviours = [("status", 500), ("ok", True)]
+    verifier = _verifier(stub)
+
+    assert verifier.verify("token")["success"] is True
+    assert stub.hits == 2
+
+    stats = verifier.stats()
+    assert stats["errors"] == 1
+    assert stats["verified"] == 1
+    assert stats["breaker"] == "closed"
+
+
+def test_retries_exhausted(stub):
+    stub.behaviours = [("status", 503)]
+    verifier = _verifier(stub, HCAPTCHA_RETRIES=2, HCAPTCHA_BREAKER_THRESHOLD=10)
+
+    with pytest.raises(CaptchaUnavailable):
+        verifier.verify("token")
+    assert stub.hits == 3
+
+
+def test_attempt_timeout(stub):
+    stub.behaviours = [("sleep", 1.0)]
+    verifier = _verifier(stub, HCAPTCHA_TIMEOUT=0.1, HCAPTCHA_RETRIES=0)
+
+    started = time.monotonic()
+    with pytest.raises(CaptchaUnavailable):
+        verifier.verify("token")
+    assert time.monotonic() - started < 0.8
+    assert verifier.stats()["errors"] == 1
+
+
+def test_deadline_bounds_retries(stub):
+    stub.behaviours = [("sleep", 1.0)]
+    verifier = _verifier(
+        stub, HCAPTCHA_TIMEOUT=0.2, HCAPTCHA_DEADLINE=0.3, HCAPTCHA_RETRIES=5, HCAPTCHA_BREAKER_THRESHOLD=10
+    )
+
+    started = time.monotonic()
+    with pytest.raises(CaptchaUnavailable):
+        verifier.verify("token")
+    assert time.monotonic() - started < 0.8
+    assert verifier.stats()["attempts"] == 2
+
+
+def test_breaker_opens_and_recovers(stub):
+    stub.behaviours = [("status", 500), ("status", 500), ("ok", True)]
+    verifier = _verifier(stub, HCAPTCHA_RETRIES=0)
+
+    for _ in range(2):
+        with pytest.raises(CaptchaUnavailable):
+            verifier.verify("token")
+    assert verifier.stats()["breaker"] == "open"
+
+    # Open: fails fast without calling the server
+    with pytest.raises(CaptchaUnavailable, match="circuit open"):
+        verifier.verify("token")
+    assert stub.hits == 2
+    assert verifier.stats()["breaker_open"] == 1
+
+    # After the cooldown one trial call goes through and closes the breaker
+    time.sleep(0.35)
+    assert verifier.stats()["breaker"] == "half-open"
+    assert verifier.verify("token")["success"] is True
+    assert stub.hits == 3
+    assert verifier.stats()["breaker"] == "closed"
+
+
+def test_failed_trial_reopens_breaker(stub):
+    stub.behaviours = [("status", 500)]
+    verifier = _verifier(stub, HCAPTCHA_RETRIES=0)
+
+    for _ in range(2):
+        with pytest.raises(CaptchaUnavailable):
+            verifier.verify("token")
+
+    time.sleep(0.35)
+    with pytest.raises(CaptchaUnavailable):
+        verifier.verify("token")
+    assert stub.hits == 3
+    assert verifier.stats()["breaker"] == "open"
@@ -0,0 +1,83 @@
+from datetime import date
+
+import pytest
+from flask import Flask
+
+from application import db
+from application.controllers.counts import CountsController, _dimensions
+from application.models.counts import ResultCounts
+
+
+DAY = date(2024, 1, 1)
+
+# 100 results: country and party are chosen independently on the form
+TALLIES = {
+    ("total", ""): 100,
+    ("country", "France"): 20,
+    ("country", "United States"): 50,
+    ("party", "Other-I do not vote"): 30,
+    ("party", "United States-Democratic Party"): 40,
+    ("identities", "Liberal"): 25,
+    ("identities", "Left-Wing"): 10,
+}
+
+
+@pytest.fixture
+def app():
+    # ResultCounts is plain date/text/int, so SQLite stands in for Postgres
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    db.init_app(app)
+    with app.app_context():
+        ResultCounts.__table__.create(db.engine)
+        db.session.add_all(
+            ResultCounts(date=DAY, field=field, value=value, n=n) for (field, value), n in TALLIES.items()
+        )
+        db.session.commit()
+        yield app
+
+
+def _count(filterset, estimate=True):
+    return CountsController.count_filtersets({"filtersets": [filterset]}, DAY, DAY, estimate=estimate).get(0)
+
+
+def test_country_and_party_stay_separate_dimensions():
+    dims = _dimensions({"country": ["United States"], "party": ["United States-Democratic Party"]})
+    assert dims == [
+        ("country", ["United States"], "sum"),
+        ("party", ["United States-Democratic Party"], "sum"),
+    ]
+
+    # No prefix matching between values ("Guinea" vs "Guinea-Bissau-...")
+    dims = _dimensions({"country": ["Guinea"], "party": ["Guinea-Bissau-Other"]})
+    assert [field for field, _, _ in dims] == ["country", "party"]
+
+
+def test_group_filters_need_sql():
+    assert _dimensions({"group-ids": ["x"]}) is None
+
+
+def test_single_dimension_is_exact(app):
+    assert _count({"country": ["France", "United States"]}) == (70, True)
+    assert _count({"party": ["Other-I do not vote"]}) == (30, True)
+    assert _count({"identities": ["Liberal"], "any-all": "any"}) == (25, True)
+    assert _count({}) == (100, True)
+
+
+def test_country_and_party_is_estimated(app):
+    # France x non-voters is not 0: independent estimate 100 * 0.2 * 0.3
+    assert _count({"country": ["France"], "party": ["Other-I do not vote"]}) == (6, False)
+    # US x US-Dem is not every US-Dem respondent
+    assert _count({"country": ["United States"], "party": ["United States-Democratic Party"]}) == (20, False)
+
+
+def test_inexact_skipped_without_estimates(app):
+    assert _count({"country": ["France"], "party": ["Other-I do not vote"]}, estimate=False) is None
+    assert _count({"identities": ["Liberal", "Left-Wing"], "any-all": "all"}, estimate=False) is None
+    assert _count({"country": ["France"]}, estimate=False) == (20, True)
+
+
+def test_multi_identity_estimates(app):
+    # any: 1 - (1 - 0.25)(1 - 0.1); all: 0.25 * 0.1
+    assert _count({"identities": ["Liberal", "Left-Wing"], "any-all": "any"}) == (32, False)
+    assert _count({"identities": ["Liberal", "Left-Wing"], "any-all": "all"}) == (2, False)
@@ -0,0 +1,94 @@
+import random
+from bisect import bisect_right
+
+import pytest
+
+from application.controllers.results import COMPASS_PAIRS, _density_grids, _score_histograms, histogram_thresholds
+from application.utils.catalogue import SCORE_AXES
+
+
+BIN_COUNTS = [1, 2, 7, 10, 20, 33]
+
+
+def _d3_thresholds(bins):
+    # static/js/histogram.js hist_thresholds
+    return [(2 * (k + 1) - bins) / bins for k in range(bins - 1)]
+
+
+def _d3_bin(values, thresholds, x0=-1, x1=1):
+    # d3.bin().domain([x0, x1]).thresholds(thresholds): drop out-of-domain thresholds, then
+    # bisectRight each in-domain value
+    tz = list(thresholds)
+    while tz and tz[-1] >= x1:
+        tz.pop()
+    while tz and tz[0] <= x0:
+        tz.pop(0)
+    counts = [0] * (len(tz) + 1)
+    for x in values:
+        if x0 <= x <= x1:
+            counts[bisect_right(tz, x)] += 1
+    return counts
+
+
+def _random_scores(rnd, n):
+    # Scores are stored to 2dp, so many land exactly on thresholds; a few fall outside [-1, 1]
+    edge = [-1.0, 1.0, 0.0, -0.9, 0.5, -1.01, 1.01]
+    return [
+        {axis: rnd.choice(edge) if rnd.random() < 0.1 else round(rnd.uniform(-1, 1), 2) for axis in SCORE_AXES}
+        for _ in range(n)
+    ]
+
+
+@pytest.mark.parametrize("bins", BIN_COUNTS)
+def test_thresholds_match_histogram_js(bins):
+    thresholds = histogram_thresholds(bins)
+    assert thresholds == _d3_thresholds(bins)
+    assert len(thresholds) == bins - 1
+    assert all(-1 < a < b < 1 for a, b in zip(thresholds, thresholds[1:]))
+
+
+@pytest.mark.parametrize("bins", BIN_COUNTS)
+def test_score_histograms_match_d3(bins):
+    all_scores = _random_scores(random.Random(bins), 2000)
+    invert = ["diplomacy", "government", "religion", "society"]
+
+    histograms = _score_histograms(all_scores, bins, invert)
+
+    for axis in SCORE_AXES:
+        sign = -1 if axis in invert else 1
+        expected = _d3_bin([sign * s[axis] for s in all_scores], _d3_thresholds(bins))
+        assert histograms[axis].tolist() == expected, axis
+
+
+def test_every_two_dp_value():
+    values = [round(k / 100, 2) for k in range(-100, 101)]
+    for bins in BIN_COUNTS:
+        histograms = _score_histograms([{axis: v for axis in SCORE_AXES} for v in values], bins)
+        assert histograms["economics"].tolist() == _d3_bin(values, _d3_thresholds(bins))
+
+
+def test_empty():
+    assert {axis: h.tolist() for axis, h in _score_histograms([], 5).items()} == {axis: [0] * 5 for axis in SCORE_AXES}
+    assert all(len(cells) == 0 for cells in _density_grids([], 5)["cells"].values())
+
+
+@pytest.mark.parametrize("size", [1, 4, 20])
+def test_density_grids_match_d3(size):
+    all_scores = _random_scores(random.Random(100 + size), 1500)
+    thresholds = _d3_thresholds(size)
+
+    density = _density_grids(all_scores, size)
+
+    assert density["size"] == size
+    for x_axis, y_axis in COMPASS_PAIRS:
+        expected = {}
+        for s in all_scores:
+            x, y = s[x_axis], s[y_axis]
+            if -1 <= x <= 1 and -1 <= y <= 1:
+                cell = (bisect_right(thresholds, x), bisect_right(thresholds, y))
+                expected[cell] = expected.get(cell, 0) + 1
+
+        cells = density["cells"][f"{x_axis}-{y_axis}"].tolist()
+        assert {(x, y): n for x, y, n in cells} == expected
+        # Non-empty cells only, row-major by y then x
+        assert [(y, x) for x, y, _ in cells] == sorted((y, x) for x, y in expected)
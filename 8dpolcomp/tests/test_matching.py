@@ -0,0 +1,93 @@
+import json
+import os
+import random
+
+import numpy as np
+import pytest
+
+from application.utils.catalogue import AXES
+from application.utils.matching import AXIS_AVERAGES_PATH, ClosestMatcher
+
+
+def _legacy_distances(results, avgs, power=1.3):
+    # The per-identity loop ClosestMatcher replaced (views/results.py euclidean_distances)
+    distances = {}
+    for identity, avg in avgs.items():
+        keys = set(results.keys()).union(avg.keys())
+        distance = 1 / (1 + np.linalg.norm([abs(results.get(key, 0) - avg.get(key, 0)) ** power for key in keys]))
+        distances[identity] = distance
+    return sorted(distances.items(), key=lambda x: x[1], reverse=True)
+
+
+def _legacy_matches(results, avgs):
+    matches = {"overall": _legacy_distances(results, avgs, power=1)}
+    for axis in results:
+        matches[axis] = _legacy_distances({axis: results[axis]}, avgs, power=1.5)
+    return matches
+
+
+def _write_averages(rel_dir, avgs):
+    path = os.path.join(rel_dir, AXIS_AVERAGES_PATH)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(avgs, f)
+    return path
+
+
+def _random_averages(rnd, n=40):
+    return {f"identity-{i}": {axis: round(rnd.uniform(-1, 1), 2) for axis in AXES} for i in range(n)}
+
+
+def _assert_same_ranking(matches, legacy):
+    assert list(matches) == list(legacy)
+    for key, ranking in legacy.items():
+        assert [identity for identity, _ in matches[key]] == [identity for identity, _ in ranking], key
+        assert [d for _, d in matches[key]] == pytest.approx([d for _, d in ranking], abs=1e-12), key
+
+
+def test_matches_legacy_ranking(tmp_path):
+    rnd = random.Random(15)
+    avgs = _random_averages(rnd)
+    _write_averages(tmp_path, avgs)
+    matcher = ClosestMatcher()
+
+    for _ in range(50):
+        results = {axis: round(rnd.uniform(-1, 1), 2) for axis in AXES}
+        _assert_same_ranking(matcher.match(results, str(tmp_path)), _legacy_matches(results, avgs))
+
+
+def test_ties_keep_file_order(tmp_path):
+    same = {axis: 0.25 for axis in AXES}
+    avgs = {"b": same, "a": dict(same), "c": {axis: -0.5 for axis in AXES}}
+    _write_averages(tmp_path, avgs)
+    results = {axis: 0.0 for axis in AXES}
+
+    matches = ClosestMatcher().match(results, str(tmp_path))
+    assert [identity for identity, _ in matches["overall"]] == ["b", "a", "c"]
+    _assert_same_ranking(matches, _legacy_matches(results, avgs))
+
+
+def test_missing_axes_compare_against_zero(tmp_path):
+    # An average without some axes, and a result with an axis no average has
+    avgs = {"partial": {"economics": 0.5}, "full": {axis: 0.1 for axis in AXES}}
+    _write_averages(tmp_path, avgs)
+    results = {"economics": -0.2, "society": 0.4, "extra": 0.3}
+
+    _assert_same_ranking(ClosestMatcher().match(results, str(tmp_path)), _legacy_matches(results, avgs))
+
+
+def test_reloads_when_file_changes(tmp_path):
+    path = _write_averages(tmp_path, {"a": {"economics": 1.0}, "b": {"economics": -1.0}})
+    matcher = ClosestMatcher()
+    results = {"economics": 0.9}
+    assert matcher.match(results, str(tmp_path))["overall"][0][0] == "a"
+
+    _write_averages(tmp_path, {"a": {"economics": -1.0}, "b": {"economics": 1.0}})
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert matcher.match(results, str(tmp_path))["overall"][0][0] == "b"
+
+
+def test_missing_file(tmp_path):
+    with pytest.raises(OSError):
+        ClosestMatcher().match({"economics": 0.0}, str(tmp_path))
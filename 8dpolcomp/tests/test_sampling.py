@@ -0,0 +1,83 @@
+import random
+from collections import Counter
+
+from application.controllers.results import _stratified_sample
+from application.utils.catalogue import SCORE_AXES
+
+
+def _orthant(scores):
+    # Zero counts as positive, as in _stratified_sample
+    return tuple(scores[axis] >= 0 for axis in SCORE_AXES)
+
+
+def _scores(rnd, n, bias=0.0):
+    return [
+        {"id": i, **{axis: round(max(-1.0, min(1.0, rnd.uniform(-1, 1) + bias)), 2) for axis in SCORE_AXES}}
+        for i in range(n)
+    ]
+
+
+def _skewed(rnd, n):
+    # Mostly one orthant, plus a few results scattered over others
+    common = _scores(rnd, n, bias=0.9)
+    rare = _scores(rnd, 40)
+    all_scores = common + rare
+    rnd.shuffle(all_scores)
+    return all_scores
+
+
+def test_small_input_returned_as_is():
+    all_scores = _scores(random.Random(1), 10)
+    assert _stratified_sample(all_scores, 10) is all_scores
+    assert _stratified_sample(all_scores, 50) is all_scores
+    assert _stratified_sample([], 5) == []
+
+
+def test_size_and_order():
+    all_scores = _skewed(random.Random(2), 3000)
+    sample = _stratified_sample(all_scores, 500)
+
+    assert len(sample) == 500
+    positions = [all_scores.index(s) for s in sample]
+    assert positions == sorted(positions)
+    assert len(set(positions)) == 500
+
+
+def test_every_stratum_kept_when_k_allows():
+    all_scores = _skewed(random.Random(3), 3000)
+    strata = Counter(_orthant(s) for s in all_scores)
+    assert len(strata) < 100
+
+    sample = _stratified_sample(all_scores, 100)
+    assert set(_orthant(s) for s in sample) == set(strata)
+
+
+def test_allocation_is_proportional_beyond_one_each():
+    all_scores = _skewed(random.Random(4), 5000)
+    k = 1000
+    strata = Counter(_orthant(s) for s in all_scores)
+    sampled = Counter(_orthant(s) for s in _stratified_sample(all_scores, k))
+
+    # One per stratum, then the remainder split by (size - 1), rounded by largest remainder
+    extra = k - len(strata)
+    rest = sum(strata.values()) - len(strata)
+    for key, size in strata.items():
+        share = extra * (size - 1) / rest
+        assert int(share) <= sampled[key] - 1 <= int(share) + 1, key
+
+
+def test_fewer_slots_than_strata():
+    # 256 orthants, 2000 results: every orthant cannot be kept, the sample is still exactly k
+    all_scores = _scores(random.Random(5), 2000)
+    sample = _stratified_sample(all_scores, 50)
+    assert len(sample) == 50
+    assert len({s["id"] for s in sample}) == 50
+
+
+def test_seeded_and_reproducible():
+    all_scores = _skewed(random.Random(6), 2000)
+    ids = lambda sample: [s["id"] for s in sample]
+
+    assert ids(_stratified_sample(all_scores, 300, seed=7)) == ids(_stratified_sample(all_scores, 300, seed=7))
+    assert ids(_stratified_sample(all_scores, 300)) == ids(_stratified_sample(all_scores, 300, seed=0))
+    assert ids(_stratified_sample(all_scores, 300, seed=7)) != ids(_stratified_sample(all_scores, 300, seed=8))
@@ -0,0 +1,90 @@
+import random
+
+import pytest
+from flask import Flask
+
+from application import db
+from application.models.questions import Questions
+from application.utils.catalogue import AXES, catalogue
+from application.utils.scoring import score_answers, score_batch
+
+
+N_QUESTIONS = 100
+
+
+def _legacy_score(answers, scoring):
+    # The dict-based scorer score_answers replaced (views/api.py calculate_results)
+    missing = set(scoring.keys()) - set(answers.keys())
+    if missing:
+        raise KeyError("Missing answers")
+
+    r_scores = {}
+    for q_id, q_scores in scoring.items():
+        r_scores[q_id] = {axis: q_score * answers[q_id] for axis, q_score in q_scores.items()}
+
+    first = next(iter(r_scores.values()))
+    r_sums = {axis: sum([v[axis] for v in r_scores.values()]) for axis in first.keys()}
+
+    max_scores = {axis: sum(abs(q_scores[axis]) * 2 for q_scores in scoring.values()) for axis in first.keys()}
+    return {axis: round(val / max_scores[axis], 2) for axis, val in r_sums.items()}
+
+
+@pytest.fixture
+def scoring():
+    # Questions is plain int/text, so SQLite stands in for Postgres
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    db.init_app(app)
+    rnd = random.Random(8)
+    with app.app_context():
+        Questions.__table__.create(db.engine)
+        db.session.add_all(
+            Questions(id=q_id, text=f"q{q_id}", **{axis: rnd.choice([-2, -1, 0, 0, 1, 2]) for axis in AXES})
+            for q_id in range(1, N_QUESTIONS + 1)
+        )
+        db.session.commit()
+        catalogue.load()
+        yield {row["id"]: {axis: row[axis] for axis in AXES} for row in catalogue.rows}
+    catalogue.invalidate()
+
+
+def _random_answers(rnd):
+    return {q_id: rnd.choice([-2, -1, 0, 1, 2]) for q_id in range(1, N_QUESTIONS + 1)}
+
+
+def test_matches_legacy_scorer(scoring):
+    rnd = random.Random(1)
+    for _ in range(500):
+        answers = _random_answers(rnd)
+        assert score_answers(answers) == _legacy_score(answers, scoring)
+
+
+def test_extremes_match_legacy_scorer(scoring):
+    for value in (-2, 0, 2):
+        answers = {q_id: value for q_id in range(1, N_QUESTIONS + 1)}
+        assert score_answers(answers) == _legacy_score(answers, scoring)
+
+
+def test_batch_matches_single(scoring):
+    rnd = random.Random(2)
+    answers_list = [_random_answers(rnd) for _ in range(50)]
+    assert score_batch(answers_list) == [score_answers(answers) for answers in answers_list]
+    assert score_batch([]) == []
+
+
+def test_string_keys_and_axis_order(scoring):
+    answers = _random_answers(random.Random(3))
+    scores = score_answers({str(q_id): ans for q_id, ans in answers.items()})
+    assert scores == score_answers(answers)
+    assert list(scores) == AXES
+
+
+def test_missing_answers(scoring):
+    answers = _random_answers(random.Random(4))
+    del answers[N_QUESTIONS]
+    with pytest.raises(KeyError):
+        score_answers(answers)
+    # Unknown question ids are ignored, not counted towards completeness
+    answers[N_QUESTIONS + 1] = 1
+    with pytest.raises(KeyError):
+        score_answers(answers)
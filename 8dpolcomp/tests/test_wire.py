@@ -0,0 +1,115 @@
+import json
+import random
+import struct
+
+import numpy as np
+
+from application.utils.catalogue import SCORE_AXES
+from application.utils.serialise import dumps
+from application.utils.wire import WIRE_ANSWER_LABELS, WIRE_MAGIC, pack_dataset, pack_datasets, pack_preamble
+
+
+def _decode(buffer):
+    # Port of _decode_packed_datasets (static/js/data.js), checking alignment on the way
+    assert buffer[:4] == WIRE_MAGIC
+    offset = 4
+
+    def read_json():
+        nonlocal offset
+        (length,) = struct.unpack_from("<I", buffer, offset)
+        obj = json.loads(buffer[offset + 4:offset + 4 + length].decode("utf-8"))
+        offset += 4 + length
+        assert offset % 4 == 0
+        return obj
+
+    header = read_json()
+    axes, labels = header["axes"], header["answer_labels"]
+    out = []
+
+    while offset < len(buffer):
+        ds = read_json()
+
+        scores = np.frombuffer(buffer, dtype="<f4", count=ds["n"] * len(axes), offset=offset)
+        offset += scores.nbytes
+        ds["all_scores"] = [
+            {axis: round(float(v), 2) for axis, v in zip(axes, row)} for row in scores.reshape(ds["n"], len(axes))
+        ]
+
+        counts = np.frombuffer(buffer, dtype="<u4", count=100 * len(labels), offset=offset)
+        offset += counts.nbytes
+        ds["raw_answer_counts"] = {
+            str(q + 1): {label: int(n) for label, n in zip(labels, row)}
+            for q, row in enumerate(counts.reshape(100, len(labels)))
+        }
+
+        del ds["n"]
+        out.append(ds)
+
+    assert offset == len(buffer)
+    return header, out
+
+
+def _answer_counts(rnd):
+    return {str(q): {label: rnd.randint(0, 500) for label in WIRE_ANSWER_LABELS} for q in range(1, 101)}
+
+
+def _dataset(rnd, n, **extra):
+    return {
+        "label": "Set é ✓",
+        "color": "#123456",
+        "count": n,
+        "all_scores": [{axis: round(rnd.uniform(-1, 1), 2) for axis in SCORE_AXES} for _ in range(n)],
+        "raw_answer_counts": _answer_counts(rnd),
+        "mean_scores": {axis: 0.1 for axis in SCORE_AXES},
+        "median_scores": {axis: -0.1 for axis in SCORE_AXES},
+        **extra,
+    }
+
+
+def test_round_trip_matches_json_form():
+    rnd = random.Random(21)
+    datasets = [
+        _dataset(rnd, 250, histograms={axis: np.arange(20, dtype=np.int64) for axis in SCORE_AXES}),
+        _dataset(rnd, 0),
+        _dataset(rnd, 3, density={"size": 4, "cells": {"society-politics": np.array([[0, 1, 2]], dtype=np.int64)}}),
+    ]
+
+    header, decoded = _decode(pack_preamble() + pack_datasets(datasets))
+
+    assert header == {"status": "success", "axes": SCORE_AXES, "answer_labels": WIRE_ANSWER_LABELS}
+    # Scores are float32 on the wire but carry 2 dp, so rounding restores the JSON values
+    assert decoded == json.loads(dumps(datasets))
+
+
+def test_your_results_counts():
+    # Session datasets carry raw counts under "answer_counts" and no all_scores
+    rnd = random.Random(22)
+    counts = _answer_counts(rnd)
+    dataset = {"label": "Your Results", "color": "#000", "answer_counts": counts}
+
+    _, [decoded] = _decode(pack_preamble() + pack_dataset(dataset))
+
+    assert decoded["raw_answer_counts"] == counts
+    assert decoded["all_scores"] == []
+    assert "answer_counts" not in decoded
+
+
+def test_missing_axes_and_questions():
+    scores = [{"economics": 0.5}, {axis: 1.0 for axis in SCORE_AXES}]
+    dataset = {"label": "partial", "all_scores": scores, "raw_answer_counts": {"1": {"Agree": 3}, "999": {"Agree": 1}}}
+
+    _, [decoded] = _decode(pack_preamble() + pack_dataset(dataset))
+
+    assert decoded["all_scores"][0] == {axis: 0.5 if axis == "economics" else 0.0 for axis in SCORE_AXES}
+    assert decoded["all_scores"][1] == scores[1]
+    assert decoded["raw_answer_counts"]["1"] == {label: 3 if label == "Agree" else 0 for label in WIRE_ANSWER_LABELS}
+    assert sum(sum(row.values()) for row in decoded["raw_answer_counts"].values()) == 3
+
+
+def test_records_concatenate():
+    rnd = random.Random(23)
+    first, second = _dataset(rnd, 5), _dataset(rnd, 7)
+
+    _, decoded = _decode(pack_preamble("success") + pack_dataset(first) + pack_datasets([second]))
+
+    assert [d["count"] for d in decoded] == [5, 7]